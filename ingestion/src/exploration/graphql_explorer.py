@@ -12,7 +12,9 @@ from pydantic import BaseModel, Field
 import pandas as pd
 from tabulate import tabulate
 
+from ..utils import json_codec
 from ..utils.graphql_client import GraphQLOAuthClient
+from ..utils.response_cache import ResponseCache
 from ..utils.data_analysis import (
     analyze_structure,
     profile_data,
@@ -51,6 +53,7 @@ class ExplorationConfig:
     output_dir: str = "exploration_outputs"
     query_name: str = "query"
     max_depth: int = MAX_NESTED_DEPTH
+    response_cache_ttl: Optional[float] = None
     
     def validate(self) -> None:
         """Validate configuration parameters."""
@@ -77,12 +80,19 @@ class GraphQLExplorer:
         """
         config.validate()
         self.config = config
+        response_cache = None
+        if config.response_cache_ttl:
+            response_cache = ResponseCache(
+                cache_dir=Path(config.output_dir) / ".response_cache",
+                ttl=config.response_cache_ttl
+            )
         self.client = GraphQLOAuthClient(
             graphql_url=config.graphql_url,
             token_url=config.token_url,
             client_id=config.client_id,
             client_secret=config.client_secret,
-            scope=config.scope
+            scope=config.scope,
+            response_cache=response_cache
         )
         self.output_dir = Path(config.output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -334,8 +344,8 @@ class GraphQLExplorer:
         output_dir.mkdir(exist_ok=True)
         
         # Save raw response
-        with open(output_dir / RAW_DATA_FILE, "w") as f:
-            json.dump(response, f, indent=2)
+        with open(output_dir / RAW_DATA_FILE, "wb") as f:
+            json_codec.dump(response, f, pretty=True)
             
         logger.info(f"Query executed in {(datetime.now() - start_time).total_seconds():.2f}s")
         return response, output_dir
@@ -388,8 +398,8 @@ class GraphQLExplorer:
                 logger.info(f"Analyzing sample of {len(flattened_data)} records")
                 
             # Save flattened data
-            with open(output_dir / FLAT_DATA_FILE, "w") as f:
-                json.dump(flattened_data, f, indent=2)
+            with open(output_dir / FLAT_DATA_FILE, "wb") as f:
+                json_codec.dump(flattened_data, f, pretty=True)
                 
             # Analyze structure and generate profile
             start_time = datetime.now()
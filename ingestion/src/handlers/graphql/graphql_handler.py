@@ -2,8 +2,10 @@
 
 import os
 import json
+import asyncio
 import logging
 import time
+import shutil
 from pathlib import Path
 from typing import Dict, Any, Optional, Union, Literal, List, Generic, TypeVar
 from datetime import datetime
@@ -12,9 +14,33 @@ from botocore.exceptions import ClientError
 import boto3
 import tempfile
 import yaml
+from dataclasses import replace
 
 from ingestion.base.base_handler import BaseHandler
-from ingestion.utils.graphql_client import GraphQLOAuthClient, GraphQLQueryLoader
+from ingestion.utils.graphql_client import (
+    AsyncGraphQLOAuthClient,
+    GraphQLOAuthClient,
+    GraphQLQueryLoader
+)
+from ingestion.utils import json_codec
+from ingestion.utils.checkpoint import Checkpoint, task_identity
+from ingestion.utils.concurrency import AdaptiveConcurrencyController
+from ingestion.utils.incremental import IncrementalSync
+from ingestion.utils.metrics import MetricsCollector
+from ingestion.utils.ndjson_writer import NDJSONWriter, ndjson_suffix
+from ingestion.utils.pagination import PagePaginator, get_path, replace_path
+from ingestion.utils.parquet_writer import ParquetRecordWriter, infer_schema
+from ingestion.utils.part_writer import PartWriter
+from ingestion.utils.partitioned_writer import PartitionedWriter
+from ingestion.utils.query_dag import QueryDAG, QueryNode
+from ingestion.utils.query_planner import QueryPlanner
+from ingestion.utils.rate_limiter import TokenBucketRateLimiter
+from ingestion.utils.response_cache import ResponseCache
+from ingestion.utils.retry import DEFAULT_POLICIES, CircuitBreaker, Retrier, RetryPolicy
+from ingestion.utils.schema_cache import SchemaCache
+from ingestion.utils.sinks import DataSink
+from ingestion.utils.state_store import StateStore
+from ingestion.utils.worker_pool import CANCELLED, FAILED, WorkerPool, summarize
 from observability.tracking.job_metrics import JobMetricsTracker
 from observability.models.job_metrics import JobType
 
@@ -45,18 +71,210 @@ class SinkConfig(BaseModel):
     """Configuration for data sink."""
     type: Literal['s3'] = Field(description="Type of sink (currently only s3 supported)")
     key_prefix: str = Field(description="Prefix for output files")
-    format: Literal['json'] = Field(description="Output format (currently only json supported)")
-    compression: Optional[str] = Field(None, description="Compression format (if any)")
+    format: Literal['json', 'ndjson', 'parquet'] = Field(description="Output format")
+    compression: Optional[str] = Field(
+        None, description="Compression format (if any), gzip or zstd for ndjson and snappy or zstd for parquet"
+    )
+    compression_level: Optional[int] = Field(
+        None, ge=0, description="Level of ndjson compression, 6 for gzip and 3 for zstd when unset"
+    )
+    row_group_size: int = Field(10000, gt=0, description="Records per parquet row group")
     base_path: str = Field(description="Base path for output files")
+    stream: bool = Field(
+        False, description="Write records to part files as pages arrive instead of one file per run"
+    )
+    batch_size: int = Field(1000, gt=0, description="Records per part file when streaming")
+    bucket: Optional[str] = Field(
+        None, description="Bucket streamed part files are uploaded to under base_path, DATA_DIR when not set"
+    )
+    items_path: Optional[str] = Field(
+        None, description="Dotted path to the records to stream, defaults to pagination.items_path"
+    )
+    partitioned: bool = Field(
+        False, description="Stream into Hive-style entity=/dt=/<column>= partitions with a manifest per run"
+    )
+    entity: Optional[str] = Field(None, description="Entity partition value, defaults to key_prefix")
+    partition_by: Dict[str, str] = Field(
+        default_factory=dict,
+        description="Partition column to dotted record path, e.g. {'org_id': 'organisation.id'}"
+    )
+    partition_date_field: Optional[str] = Field(
+        None, description="Dotted path to the record date used for dt, the run date when not set"
+    )
+    max_file_rows: int = Field(100000, gt=0, description="Records per partitioned part file")
+    target_file_mb: int = Field(64, gt=0, description="Target size of a partitioned part file in MiB")
 
 class RateLimitConfig(BaseModel):
     """Configuration for rate limiting."""
-    requests_per_second: int = Field(description="Number of requests allowed per second")
-    burst: int = Field(description="Number of requests allowed to burst")
+    requests_per_second: int = Field(gt=0, description="Number of requests allowed per second")
+    burst: int = Field(gt=0, description="Number of requests allowed to burst")
+
+class PaginationConfig(BaseModel):
+    """Configuration for page/per pagination."""
+    total_count_path: str = Field(
+        description="Dotted path to the total record count, e.g. data.organisationAthletes.totalCount"
+    )
+    items_path: str = Field(
+        description="Dotted path to the records of each page, e.g. data.organisationAthletes.athletes"
+    )
+    page_variable: str = Field("page", description="Name of the page number variable")
+    per_variable: str = Field("per", description="Name of the page size variable")
+    max_concurrency: int = Field(5, gt=0, description="Maximum number of pages fetched concurrently")
+    max_query_cost: Optional[int] = Field(
+        None, gt=0, description="Estimated cost above which a page is split into several requests"
+    )
+
+class ConcurrencyConfig(BaseModel):
+    """Configuration for adaptive request concurrency."""
+    initial_limit: int = Field(4, gt=0, description="Starting number of in-flight requests")
+    min_limit: int = Field(1, gt=0, description="Lower bound of in-flight requests")
+    max_limit: int = Field(32, gt=0, description="Upper bound of in-flight requests")
+
+class RetryConfig(BaseModel):
+    """Configuration for retries and the circuit breaker."""
+    max_attempts: Optional[int] = Field(
+        None, gt=0, description="Attempts per request, overriding the per-error-class defaults"
+    )
+    base_delay: Optional[float] = Field(
+        None, gt=0,
+        description="Minimum delay between attempts in seconds, overriding the per-error-class defaults"
+    )
+    max_delay: Optional[float] = Field(
+        None, gt=0,
+        description="Maximum delay between attempts in seconds, overriding the per-error-class defaults"
+    )
+    failure_threshold: int = Field(5, gt=0, description="Consecutive failures that open the circuit")
+    reset_timeout: float = Field(30.0, gt=0, description="Seconds the circuit stays open")
+
+    def policies(self) -> Optional[Dict[str, RetryPolicy]]:
+        """Build the retry policies, overriding only the settings given.
+
+        Returns:
+            Per-error-class policies, or None to use the defaults
+        """
+        overrides = self.dict(include={"max_attempts", "base_delay", "max_delay"}, exclude_none=True)
+        if not overrides:
+            return None
+        return {
+            error_class: replace(policy, **overrides) for error_class, policy in DEFAULT_POLICIES.items()
+        }
+
+class ResponseCacheConfig(BaseModel):
+    """Configuration for caching responses of repeated queries."""
+    ttl_seconds: float = Field(300.0, gt=0, description="Seconds a cached response is fresh")
+    stale_seconds: float = Field(
+        600.0, ge=0, description="Seconds after expiry a response is served while it is refreshed"
+    )
+    max_entries: int = Field(256, gt=0, description="Maximum number of responses held in memory")
+    cache_dir: Optional[str] = Field(
+        None, description="Directory of the on-disk tier, defaults to GRAPHQL_RESPONSE_CACHE_DIR"
+    )
+    query_ttls: Dict[str, float] = Field(
+        default_factory=dict, description="Fresh TTLs by operation name"
+    )
 
 class HandlerConfig(BaseModel):
     """Additional handler configuration."""
     rate_limit: RateLimitConfig = Field(description="Rate limiting configuration")
+    concurrency: ConcurrencyConfig = Field(
+        default_factory=ConcurrencyConfig,
+        description="Adaptive concurrency configuration"
+    )
+    retry: RetryConfig = Field(
+        default_factory=RetryConfig,
+        description="Retry and circuit breaker configuration"
+    )
+    persisted_queries: bool = Field(
+        False, description="Send automatic persisted query hashes instead of full query text"
+    )
+    persisted_query_get: bool = Field(
+        False, description="Send persisted query hashes as cacheable GET requests"
+    )
+    response_cache: Optional[ResponseCacheConfig] = Field(
+        None, description="Response cache configuration, disabled when not set"
+    )
+
+class StateStoreConfig(BaseModel):
+    """Configuration for the store keeping state between runs."""
+    type: Literal['json', 'sqlite'] = Field('sqlite', description="Type of state store")
+    path: Optional[str] = Field(None, description="State file, defaults to INGESTION_STATE_PATH")
+
+class IncrementalConfig(BaseModel):
+    """Configuration for watermark-based incremental sync."""
+    cursor_field: str = Field(
+        description="Dotted path to the cursor within each record, e.g. memberships.createdAt"
+    )
+    filter_variable: str = Field(description="Query variable receiving the high-water mark")
+    items_path: Optional[str] = Field(
+        None, description="Dotted path to the records, defaults to pagination.items_path"
+    )
+    state_key: Optional[str] = Field(None, description="Key of the high-water mark, defaults to query_name")
+    initial_value: Optional[Any] = Field(None, description="High-water mark used before the first run")
+    store: StateStoreConfig = Field(
+        default_factory=StateStoreConfig,
+        description="State store holding the high-water mark"
+    )
+
+class CheckpointConfig(BaseModel):
+    """Configuration for resuming interrupted paginated extractions."""
+    task_id: Optional[str] = Field(
+        None,
+        description="Identity of the task, defaults to a hash of the query, variables and sink prefix"
+    )
+    path: Optional[str] = Field(None, description="Checkpoint directory, defaults next to DATA_DIR")
+    store_type: Literal['json', 'sqlite'] = Field('sqlite', description="Type of state store")
+
+class FanOutConfig(BaseModel):
+    """Configuration for running the query once per entity."""
+    variable_sets: Optional[List[Dict[str, Any]]] = Field(
+        None,
+        description="Variables merged into the query variables for each run"
+    )
+    ids_query: Optional[str] = Field(None, description="Query in query_config producing the entity IDs")
+    ids_path: Optional[str] = Field(None, description="Dotted path to the list of IDs in the ids_query response")
+    id_field: Optional[str] = Field(None, description="Dotted path to the ID within each listed object")
+    id_variable: str = Field("id", description="Query variable receiving each ID")
+    max_workers: int = Field(5, gt=0, description="Maximum number of entities fetched concurrently")
+    fail_fast: bool = Field(False, description="Cancel the remaining entities after any failure")
+    
+    @root_validator(pre=True)
+    def validate_source(cls, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate exactly one source of variable sets is given.
+        
+        Args:
+            values: Configuration values to validate
+            
+        Returns:
+            Validated configuration values
+            
+        Raises:
+            ValueError: If both or neither of variable_sets and ids_query are set
+        """
+        if (values.get('variable_sets') is None) == (values.get('ids_query') is None):
+            raise ValueError("fan_out requires exactly one of variable_sets or ids_query")
+        if values.get('ids_query') and not values.get('ids_path'):
+            raise ValueError("fan_out.ids_path must be provided with ids_query")
+        return values
+
+class DAGNodeConfig(BaseModel):
+    """Configuration for a query in a dependent-query DAG."""
+    name: str = Field(description="Name of the query in query_config")
+    parent: Optional[str] = Field(None, description="Query whose records produce this query's variables")
+    records_path: Optional[str] = Field(
+        None, description="Dotted path to the records in the parent's response, e.g. data.accounts"
+    )
+    bindings: Dict[str, str] = Field(
+        default_factory=dict,
+        description="Variable name to dotted path within a parent record, e.g. {federation: federation}"
+    )
+    total_count_path: Optional[str] = Field(None, description="Dotted path to the total count of a paginated query")
+    page_variable: str = Field("page", description="Name of the page number variable")
+    per_variable: str = Field("per", description="Name of the page size variable")
+
+class DAGConfig(BaseModel):
+    """Configuration for crawling chains of dependent queries."""
+    nodes: List[DAGNodeConfig] = Field(description="Queries of the DAG")
+    max_concurrency: int = Field(5, gt=0, description="Maximum number of requests in flight across the DAG")
 
 class GraphQLConfig(BaseModel):
     """Configuration for GraphQL handler."""
@@ -77,6 +295,26 @@ class GraphQLConfig(BaseModel):
     config: HandlerConfig = Field(
         description="Additional configuration options"
     )
+    pagination: Optional[PaginationConfig] = Field(
+        None,
+        description="Fetch every page of a page/per paginated query"
+    )
+    incremental: Optional[IncrementalConfig] = Field(
+        None,
+        description="Only fetch records changed since the last successful run"
+    )
+    checkpoint: Optional[CheckpointConfig] = Field(
+        None,
+        description="Write pages as they arrive and resume from the first incomplete page after a failure"
+    )
+    fan_out: Optional[FanOutConfig] = Field(
+        None,
+        description="Run the query for many entities on a pool of workers sharing one client"
+    )
+    dag: Optional[DAGConfig] = Field(
+        None,
+        description="Crawl dependent queries, feeding parent records into child variables"
+    )
     
     @root_validator(pre=True)
     def validate_query_config(cls, values: Dict[str, Any]) -> Dict[str, Any]:
@@ -105,6 +343,14 @@ class GraphQLConfig(BaseModel):
             
         if 'query' not in query_config[query_name]:
             raise ValueError(f"Query {query_name} must contain a 'query' field")
+        
+        ids_query = (values.get('fan_out') or {}).get('ids_query')
+        if ids_query and ids_query not in query_config:
+            raise ValueError(f"Query {ids_query} not found in query_config")
+        
+        for node in (values.get('dag') or {}).get('nodes', []):
+            if node.get('name') not in query_config:
+                raise ValueError(f"Query {node.get('name')} not found in query_config")
             
         return values
         
@@ -188,13 +434,112 @@ class GraphQLHandler(BaseHandler[GraphQLConfig]):
             )
             os.environ.update(clickhouse_secrets)
             
+            # Initialize rate limiter shared by both clients
+            self.rate_limiter = TokenBucketRateLimiter(
+                requests_per_second=self.config.config.rate_limit.requests_per_second,
+                burst=self.config.config.rate_limit.burst
+            )
+            
+            # Initialize adaptive concurrency for the async client
+            self.metrics = MetricsCollector()
+            concurrency = self.config.config.concurrency
+            self.concurrency = AdaptiveConcurrencyController(
+                initial_limit=concurrency.initial_limit,
+                min_limit=concurrency.min_limit,
+                max_limit=concurrency.max_limit,
+                metrics=self.metrics
+            )
+            
+            # Initialize retries shared by both clients
+            retry = self.config.config.retry
+            retrier = Retrier(
+                policies=retry.policies(),
+                circuit_breaker=CircuitBreaker.for_endpoint(
+                    os.environ['GRAPHQL_URL'],
+                    failure_threshold=retry.failure_threshold,
+                    reset_timeout=retry.reset_timeout
+                )
+            )
+            
+            # Initialize the response cache, shared across warm invocations
+            self.response_cache = None
+            cache_config = self.config.config.response_cache
+            if cache_config:
+                self.response_cache = ResponseCache.shared(
+                    cache_config.cache_dir or os.environ.get('GRAPHQL_RESPONSE_CACHE_DIR'),
+                    ttl=cache_config.ttl_seconds,
+                    stale_ttl=cache_config.stale_seconds,
+                    max_entries=cache_config.max_entries,
+                    query_ttls=cache_config.query_ttls
+                )
+            
+            if self.config.dag and (self.config.fan_out or self.config.incremental):
+                raise ValueError("dag cannot be combined with fan_out or incremental")
+            if self.config.sink.stream:
+                if self.config.fan_out or self.config.dag or self.config.checkpoint:
+                    raise ValueError("sink.stream cannot be combined with fan_out, dag or checkpoint")
+                if not (self.config.sink.items_path or self.config.pagination):
+                    raise ValueError("sink.items_path is required to stream without pagination")
+            elif self.config.sink.partitioned:
+                raise ValueError("sink.partitioned requires sink.stream")
+            
+            # Initialize incremental sync
+            self.incremental = None
+            self.incremental_items_path = None
+            incremental = self.config.incremental
+            if incremental:
+                self.incremental_items_path = incremental.items_path or (
+                    self.config.pagination.items_path if self.config.pagination else None
+                )
+                if not self.incremental_items_path:
+                    raise ValueError("incremental.items_path is required when pagination is not configured")
+                self.incremental = IncrementalSync(
+                    StateStore.create(incremental.store.dict()),
+                    state_key=incremental.state_key or self.config.query_name,
+                    cursor_field=incremental.cursor_field,
+                    filter_variable=incremental.filter_variable,
+                    initial_value=incremental.initial_value
+                )
+            
+            # Initialize the planner splitting over-budget pages
+            query_planner = None
+            pagination = self.config.pagination
+            if pagination and pagination.max_query_cost:
+                query_planner = QueryPlanner(
+                    max_cost=pagination.max_query_cost,
+                    items_path=pagination.items_path,
+                    page_variable=pagination.page_variable,
+                    per_variable=pagination.per_variable
+                )
+            
             # Initialize clients
+            schema_cache = SchemaCache()
             self.client = GraphQLOAuthClient(
                 graphql_url=os.environ['GRAPHQL_URL'],
                 token_url=os.environ['AUTH_URL'],
                 client_id=os.environ['CLIENT_ID'],
                 client_secret=os.environ['CLIENT_SECRET'],
-                scope=os.environ['SCOPE']
+                scope=os.environ['SCOPE'],
+                schema_cache=schema_cache,
+                rate_limiter=self.rate_limiter,
+                retrier=retrier,
+                response_cache=self.response_cache,
+                query_planner=query_planner
+            )
+            self.async_client = AsyncGraphQLOAuthClient(
+                graphql_url=os.environ['GRAPHQL_URL'],
+                token_url=os.environ['AUTH_URL'],
+                client_id=os.environ['CLIENT_ID'],
+                client_secret=os.environ['CLIENT_SECRET'],
+                scope=os.environ['SCOPE'],
+                schema_cache=schema_cache,
+                rate_limiter=self.rate_limiter,
+                concurrency=self.concurrency,
+                retrier=retrier,
+                persisted_queries=self.config.config.persisted_queries,
+                persisted_query_get=self.config.config.persisted_query_get,
+                response_cache=self.response_cache,
+                query_planner=query_planner
             )
             
             # Handle query config - can be either a file path or dictionary
@@ -215,13 +560,27 @@ class GraphQLHandler(BaseHandler[GraphQLConfig]):
                 job_type=JobType.INGESTION
             )
             
-            # Initialize rate limiter
-            self.rate_limiter = None
-            
             # Ensure data directory exists
             self.data_dir = Path(os.environ.get('DATA_DIR', '/tmp/data'))
             self.data_dir.mkdir(parents=True, exist_ok=True)
             
+            # Initialize checkpoints, kept outside DATA_DIR so cleanup does not remove them
+            self.checkpoint = None
+            self.checkpoint_store = None
+            if self.config.checkpoint:
+                if not self.config.pagination:
+                    raise ValueError("checkpoint requires pagination to be configured")
+                if self.config.fan_out or self.config.dag:
+                    raise ValueError("checkpoint cannot be combined with fan_out or dag")
+                self.checkpoint_dir = Path(
+                    self.config.checkpoint.path
+                    or self.data_dir.parent / f"{self.data_dir.name}_checkpoints"
+                )
+                self.checkpoint_store = StateStore.create({
+                    'type': self.config.checkpoint.store_type,
+                    'path': str(self.checkpoint_dir / 'checkpoints')
+                })
+            
         except Exception as e:
             error_msg = f"Failed to initialize handler: {str(e)}"
             logger.error(error_msg)
@@ -307,6 +666,7 @@ class GraphQLHandler(BaseHandler[GraphQLConfig]):
         """
         try:
             self.job_metrics.start()
+            self.partial = False
             
             # Get query configuration
             query_config = self.config.query_config[self.config.query_name]
@@ -314,18 +674,57 @@ class GraphQLHandler(BaseHandler[GraphQLConfig]):
             
             # Merge default variables with provided variables
             variables = {**query_config.get('variables', {}), **self.config.variables}
+            if self.incremental:
+                variables = self.incremental.apply(variables)
             
             # Execute query
             logger.info(f"Executing GraphQL query: {self.config.query_name}")
-            result = self.client.execute_query(query, variables)
+            if self.config.sink.stream:
+                result = asyncio.run(self._stream_to_sink(query, variables))
+            elif self.config.dag:
+                result = asyncio.run(self._crawl_dag())
+            elif self.config.fan_out:
+                result = asyncio.run(self._fan_out(query, variables))
+            elif self.checkpoint_store:
+                self.checkpoint = Checkpoint(
+                    self.checkpoint_store,
+                    self.config.checkpoint.task_id or task_identity(
+                        os.environ.get('TASK_NAME'), self.config.query_name, variables, self.config.sink.key_prefix
+                    )
+                )
+                result = asyncio.run(self._fetch_checkpointed_pages(query, variables))
+            elif self.config.pagination:
+                result = asyncio.run(self._fetch_all_pages(query, variables))
+            else:
+                result = self.client.execute_query(query, variables)
             
             if result.get('errors'):
                 error_msg = f"GraphQL query returned errors: {result['errors']}"
                 logger.error(error_msg)
                 self.job_metrics.end(status="error", error=error_msg)
                 raise GraphQLError(error_msg)
+            
+            if self.incremental and not self.config.sink.stream:
+                if self.config.fan_out:
+                    for item in result['items']:
+                        if 'result' in item:
+                            item['result'] = self._observe_records(item['result'])
+                else:
+                    result = self._observe_records(result)
                 
-            self.job_metrics.end(status="completed")
+            logger.info(f"Rate limiter stats: {self.rate_limiter.stats()}")
+            logger.info(f"Concurrency limit: {self.concurrency.limit}")
+            
+            # Entities that failed were not fetched, the run only holds part of the data
+            if self.config.fan_out:
+                missing = result['summary'][FAILED] + result['summary'][CANCELLED]
+                self.partial = missing > 0
+            if self.partial:
+                error_msg = f"{missing} of {len(result['items'])} fan-out entities did not succeed"
+                logger.warning(error_msg)
+                self.job_metrics.end(status="partial", error=error_msg)
+            else:
+                self.job_metrics.end(status="completed")
             return result
             
         except GraphQLError as e:
@@ -344,6 +743,359 @@ class GraphQLHandler(BaseHandler[GraphQLConfig]):
             self.job_metrics.end(status="error", error=error_msg)
             raise
 
+    def _observe_records(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        """Pass a response's records through the incremental cursor.
+        
+        Args:
+            response: Query response
+            
+        Returns:
+            Copy of the response holding only the records past the cursor
+        """
+        records = get_path(response, self.incremental_items_path)
+        if not isinstance(records, list):
+            return response
+        return replace_path(response, self.incremental_items_path, self.incremental.observe(records))
+    
+    async def _close_pools(self) -> None:
+        """Finish background cache refreshes, then close the shared connection pools.
+        
+        Refreshes use the pools and would be cancelled with the event loop.
+        """
+        try:
+            if self.response_cache is not None:
+                await self.response_cache.drain()
+        finally:
+            await AsyncGraphQLOAuthClient.close_pools()
+    
+    async def _fetch_all_pages(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Fetch every page of a paginated query concurrently.
+        
+        Args:
+            query: GraphQL query string
+            variables: Query variables including the page size
+            
+        Returns:
+            First page response with the records of all pages merged into items_path
+        """
+        try:
+            return await self._collect_pages(query, variables)
+        finally:
+            await self._close_pools()
+    
+    def _page_paginator(self) -> PagePaginator:
+        """Create a paginator for the configured pagination.
+        
+        Returns:
+            PagePaginator over the async client
+        """
+        pagination = self.config.pagination
+        return PagePaginator(
+            self.async_client,
+            total_count_path=pagination.total_count_path,
+            page_variable=pagination.page_variable,
+            per_variable=pagination.per_variable,
+            max_concurrency=pagination.max_concurrency
+        )
+    
+    async def _stream_to_sink(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Write records to the sink in part files as they arrive.
+        
+        Only the pages in flight and one batch of records are held in memory.
+        Without pagination the records are decoded one by one from the
+        response body. With sink.partitioned the parts are laid out in
+        Hive-style partitions and rolled by size and row count.
+        
+        Args:
+            query: GraphQL query string
+            variables: Query variables
+            
+        Returns:
+            Keys of the part files under parts and the number of records under records
+        """
+        sink_config = self.config.sink
+        items_path = sink_config.items_path or self.config.pagination.items_path
+        # Partitions start at the entity, which defaults to key_prefix
+        key_prefix = '' if sink_config.partitioned else sink_config.key_prefix
+        if sink_config.bucket:
+            sink = DataSink.create({
+                'type': 's3',
+                'bucket_url': sink_config.bucket,
+                'key_prefix': '/'.join(p for p in (sink_config.base_path.strip('/'), key_prefix) if p)
+            })
+        else:
+            sink = DataSink.create({
+                'type': 'local',
+                'base_path': str(self.data_dir),
+                'key_prefix': key_prefix
+            })
+        if sink_config.partitioned:
+            writer = PartitionedWriter(
+                sink,
+                sink_config.entity or sink_config.key_prefix,
+                partition_by=sink_config.partition_by,
+                date_field=sink_config.partition_date_field,
+                format=sink_config.format,
+                compression=sink_config.compression,
+                row_group_size=sink_config.row_group_size,
+                max_rows=sink_config.max_file_rows,
+                max_bytes=sink_config.target_file_mb * 1024 * 1024,
+                compression_level=sink_config.compression_level
+            )
+        else:
+            writer = PartWriter(
+                sink,
+                batch_size=sink_config.batch_size,
+                format=sink_config.format,
+                compression=sink_config.compression,
+                row_group_size=sink_config.row_group_size,
+                compression_level=sink_config.compression_level
+            )
+        
+        def keep(records: List[Any]) -> List[Any]:
+            return self.incremental.observe(records) if self.incremental else records
+        
+        try:
+            if self.config.pagination:
+                async for page in self._page_paginator().iter_pages(query, variables):
+                    if page.get('errors'):
+                        raise GraphQLError(f"GraphQL query returned errors: {page['errors']}")
+                    await writer.write(keep(get_path(page, items_path, [])))
+            else:
+                async for item in self.async_client.stream_items(query, items_path, variables):
+                    await writer.write(keep([item]))
+            keys = await writer.close()
+        finally:
+            await sink.close()
+            await self._close_pools()
+        
+        return {'parts': keys, 'records': writer.records_written}
+    
+    async def _collect_pages(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Fetch every page of a paginated query and merge their records.
+        
+        Args:
+            query: GraphQL query string
+            variables: Query variables including the page size
+            
+        Returns:
+            First page response with the records of all pages merged into items_path
+        """
+        pages = [page async for page in self._page_paginator().iter_pages(query, variables)]
+        return self._merge_pages(pages)
+    
+    def _merge_pages(self, pages: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Merge the records of every page into a copy of the first.
+        
+        Pages are left untouched, they may be shared with the response cache.
+        
+        Args:
+            pages: Page responses, first page first
+            
+        Returns:
+            First page response with the records of all pages under items_path, None without pages
+            
+        Raises:
+            ValueError: If the first page has no records list at items_path
+        """
+        items_path = self.config.pagination.items_path
+        if not pages:
+            return None
+        if not isinstance(get_path(pages[0], items_path), list):
+            raise ValueError(f"Records not found at path: {items_path}")
+        items = []
+        for page in pages:
+            items.extend(get_path(page, items_path, []))
+        return replace_path(pages[0], items_path, items)
+    
+    async def _fan_out(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the query once per entity on a bounded pool of workers.
+        
+        Every worker shares the async client, so its connection pool, token
+        and rate limiter are reused across entities.
+        
+        Args:
+            query: GraphQL query string
+            variables: Variables shared by every entity
+            
+        Returns:
+            Outcome of each entity under items and counts by status under summary
+            
+        Raises:
+            Exception: The fatal error that cancelled the fan-out
+        """
+        fan_out = self.config.fan_out
+        
+        async def run_item(item_variables: Dict[str, Any]) -> Dict[str, Any]:
+            item_variables = {**variables, **item_variables}
+            if self.config.pagination:
+                response = await self._collect_pages(query, item_variables)
+            else:
+                response = await self.async_client.execute_query(query, item_variables)
+            if response.get('errors'):
+                raise GraphQLError(f"GraphQL query returned errors: {response['errors']}")
+            return response
+        
+        try:
+            variable_sets = fan_out.variable_sets
+            if variable_sets is None:
+                variable_sets = await self._fan_out_ids()
+            pool = WorkerPool(max_workers=fan_out.max_workers, fail_fast=fan_out.fail_fast)
+            outcomes = await pool.run(variable_sets, run_item)
+        finally:
+            await self._close_pools()
+        
+        summary = summarize(outcomes)
+        logger.info(f"Fan-out over {len(outcomes)} entities: {summary}")
+        if pool.fatal_error:
+            raise pool.fatal_error
+        return {'items': [outcome.to_dict() for outcome in outcomes], 'summary': summary}
+    
+    async def _crawl_dag(self) -> Dict[str, Any]:
+        """Crawl the configured DAG of dependent queries.
+        
+        Returns:
+            Responses of each query, with the variables each ran with, under data
+        """
+        dag_config = self.config.dag
+        nodes = []
+        for node in dag_config.nodes:
+            node_query = self.config.query_config[node.name]
+            variables = dict(node_query.get('variables', {}))
+            if node.name == self.config.query_name:
+                variables.update(self.config.variables)
+            nodes.append(QueryNode(
+                name=node.name,
+                query=node_query['query'],
+                variables=variables,
+                parent=node.parent,
+                records_path=node.records_path,
+                bindings=node.bindings,
+                total_count_path=node.total_count_path,
+                page_variable=node.page_variable,
+                per_variable=node.per_variable
+            ))
+        dag = QueryDAG(self.async_client, nodes, max_concurrency=dag_config.max_concurrency)
+        
+        try:
+            results = await dag.collect()
+        finally:
+            await self._close_pools()
+        
+        logger.info(f"DAG crawl finished: {({name: len(responses) for name, responses in results.items()})}")
+        return {'data': {name: [r.to_dict() for r in responses] for name, responses in results.items()}}
+    
+    async def _fan_out_ids(self) -> List[Dict[str, Any]]:
+        """Run the IDs query and build one variable set per ID.
+        
+        Returns:
+            Variable sets binding id_variable to each ID
+            
+        Raises:
+            ValueError: If the IDs cannot be found in the response
+        """
+        fan_out = self.config.fan_out
+        ids_config = self.config.query_config[fan_out.ids_query]
+        response = await self.async_client.execute_query(ids_config['query'], ids_config.get('variables', {}))
+        values = get_path(response, fan_out.ids_path)
+        if not isinstance(values, list):
+            raise ValueError(f"IDs not found at path: {fan_out.ids_path}")
+        ids = [get_path(value, fan_out.id_field) if fan_out.id_field else value for value in values]
+        logger.info(f"Fanning out over {len(ids)} IDs from {fan_out.ids_query}")
+        return [{fan_out.id_variable: entity_id} for entity_id in ids if entity_id is not None]
+
+    async def _fetch_checkpointed_pages(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Fetch the pages missing from the checkpoint, writing each one as it arrives.
+        
+        Every page that was fetched is written and checkpointed even if
+        others fail, so a rerun only fetches the failed pages.
+        
+        Args:
+            query: GraphQL query string
+            variables: Query variables including the page size
+            
+        Returns:
+            First page response with the records of all pages merged into items_path
+            
+        Raises:
+            Exception: The error of the first page that failed
+        """
+        pagination = self.config.pagination
+        checkpoint = self.checkpoint
+        paginator = self._page_paginator()
+        if pagination.per_variable not in variables:
+            raise ValueError(f"Variables must include page size variable: {pagination.per_variable}")
+        start_page = int(variables.get(pagination.page_variable, 1))
+        
+        try:
+            if checkpoint.total_units is None:
+                first_page = await self.async_client.execute_query(
+                    query, {**variables, pagination.page_variable: start_page}
+                )
+                self._write_page(start_page, first_page)
+                checkpoint.set_total(paginator.page_count(first_page, int(variables[pagination.per_variable])))
+            
+            pages = range(start_page, start_page + checkpoint.total_units)
+            pending = checkpoint.pending(pages, exists=lambda key: Path(key).exists())
+            logger.info(f"Fetching {len(pending)} of {len(pages)} pages for task {checkpoint.task_id}")
+            
+            errors = []
+            async for page, response in paginator.fetch_pages(query, variables, pending, return_exceptions=True):
+                if isinstance(response, BaseException):
+                    logger.error(f"Failed to fetch page {page}: {str(response)}")
+                    errors.append(response)
+                else:
+                    self._write_page(page, response)
+        finally:
+            await self._close_pools()
+        
+        if errors:
+            logger.error(f"{len(errors)} pages failed, rerun task {checkpoint.task_id} to fetch them")
+            raise errors[0]
+        
+        return self._merge_pages([
+            json_codec.loads(Path(output_key).read_bytes()) for output_key in checkpoint.output_keys(pages)
+        ])
+    
+    def _write_page(self, page: int, response: Dict[str, Any]) -> None:
+        """Durably write a page and record it in the checkpoint.
+        
+        Args:
+            page: Page number
+            response: Page response
+        """
+        parts_dir = self.checkpoint_dir / self.checkpoint.task_id
+        parts_dir.mkdir(parents=True, exist_ok=True)
+        output_path = parts_dir / f"page-{page:06d}.json"
+        tmp_path = output_path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            json_codec.dump(response, f)
+            f.flush()
+            os.fsync(f.fileno())
+        tmp_path.replace(output_path)
+        self.checkpoint.record(page, str(output_path))
+    
+    def _finish_checkpoint(self) -> None:
+        """Drop the checkpoint and its pages once the output is complete."""
+        if self.checkpoint:
+            shutil.rmtree(self.checkpoint_dir / self.checkpoint.task_id, ignore_errors=True)
+            self.checkpoint.clear()
+    
+    def _commit_incremental(self) -> None:
+        """Advance the incremental watermark, unless the run only fetched part of the data.
+        
+        After a partial fan-out the watermark stays put, so the next run
+        fetches the records of the entities that failed again.
+        """
+        if not self.incremental:
+            return
+        if self.partial:
+            logger.warning(
+                f"Not advancing watermark {self.incremental.state_key}, rerun to fetch the entities that failed"
+            )
+            return
+        self.incremental.commit()
+    
     def execute(self) -> Dict[str, Any]:
         """Execute the GraphQL query and return results.
         
@@ -354,7 +1106,10 @@ class GraphQLHandler(BaseHandler[GraphQLConfig]):
             Exception: If query execution fails
         """
         try:
-            return self.process_data()
+            result = self.process_data()
+            self._commit_incremental()
+            self._finish_checkpoint()
+            return result
         except Exception as e:
             logger.error(f"Failed to execute GraphQL query: {str(e)}")
             raise
@@ -366,18 +1121,67 @@ class GraphQLHandler(BaseHandler[GraphQLConfig]):
             data = self.process_data()
             
             # Write to sink
-            if self.config.sink.type == 's3':
-                output_path = self.data_dir / f"{self.config.sink.key_prefix}.json"
-                with open(output_path, 'w') as f:
-                    json.dump(data, f)
+            if self.config.sink.stream:
+                logger.info(f"Streamed {data['records']} records to {len(data['parts'])} part files")
+            elif self.config.sink.type == 's3':
+                output_path = self.data_dir / f"{self.config.sink.key_prefix}.{self.config.sink.format}"
+                if self.config.sink.format == 'parquet':
+                    self._write_parquet(output_path, data)
+                elif self.config.sink.format == 'ndjson':
+                    output_path = self.data_dir / f"{self.config.sink.key_prefix}{ndjson_suffix(self.config.sink.compression)}"
+                    with NDJSONWriter(
+                        output_path,
+                        compression=self.config.sink.compression,
+                        level=self.config.sink.compression_level
+                    ) as writer:
+                        writer.write(self._output_records(data))
+                else:
+                    with open(output_path, 'wb') as f:
+                        json_codec.dump(data, f)
                     
             else:
                 raise ValueError(f"Unsupported sink type: {self.config.sink.type}")
+            
+            # Advance the watermark and drop the checkpoint only once the data is written
+            self._commit_incremental()
+            self._finish_checkpoint()
                 
         except Exception as e:
             logger.error(f"Error running GraphQL handler: {str(e)}")
             raise
 
+    def _write_parquet(self, output_path: Path, data: Dict[str, Any]) -> None:
+        """Write the records of a response as a Parquet file.
+        
+        Args:
+            output_path: File to write
+            data: Query response
+        """
+        sink_config = self.config.sink
+        records = self._output_records(data)
+        with ParquetRecordWriter(
+            output_path,
+            row_group_size=sink_config.row_group_size,
+            compression=sink_config.compression or 'snappy',
+            schema=infer_schema(records)
+        ) as writer:
+            writer.write(records)
+        logger.info(f"Wrote {writer.rows_written} records to {output_path}")
+    
+    def _output_records(self, data: Dict[str, Any]) -> List[Any]:
+        """Get the records written by record-oriented formats.
+        
+        Args:
+            data: Query response
+            
+        Returns:
+            Records at sink.items_path or pagination.items_path, or the whole response as one record
+        """
+        items_path = self.config.sink.items_path or (
+            self.config.pagination.items_path if self.config.pagination else None
+        )
+        return get_path(data, items_path, []) if items_path else [data]
+    
     def _validate_and_load_secrets(self, secrets_client: Any, secret_arn: str, required_secrets: List[str], secret_type: str) -> Dict[str, str]:
         """Validate and load secrets from AWS Secrets Manager.
         
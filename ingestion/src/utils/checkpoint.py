@@ -0,0 +1,136 @@
+"""Checkpoints letting interrupted extractions resume where they stopped."""
+
+import hashlib
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from ingestion.utils import json_codec
+from ingestion.utils.state_store import StateStore
+
+logger = logging.getLogger(__name__)
+
+
+def task_identity(*parts: Any) -> str:
+    """Derive a stable task identity from the parts defining a run.
+
+    Args:
+        *parts: JSON serializable values, e.g. query name, variables and output prefix
+
+    Returns:
+        Hex digest identifying the task
+    """
+    return hashlib.sha256(json_codec.dumps(list(parts), pretty=False)).hexdigest()[:32]
+
+
+class Checkpoint:
+    """Progress of one extraction task, persisted after every durable write.
+
+    A unit of work is a page number or a cursor. Each completed unit is
+    recorded together with the output key its data was written to, so a
+    restarted task with the same identity only fetches the units that are
+    still missing.
+
+    Example:
+        checkpoint = Checkpoint(store, task_identity("athletes", variables))
+        for page in checkpoint.pending(range(1, pages + 1)):
+            checkpoint.record(page, write_part(page, fetch(page)))
+        checkpoint.clear()
+    """
+
+    def __init__(self, store: StateStore, task_id: str):
+        """Initialize the checkpoint, loading any progress already recorded.
+
+        Args:
+            store: Store holding checkpoints
+            task_id: Identity of the task
+        """
+        self.store = store
+        self.task_id = task_id
+        self.key = f"checkpoint:{task_id}"
+        state = store.get(self.key) or {}
+        self.total_units: Optional[int] = state.get("total_units")
+        self.cursor: Optional[str] = state.get("cursor")
+        self.outputs: Dict[str, str] = state.get("outputs", {})
+        if self.outputs:
+            logger.info(f"Resuming task {task_id} with {len(self.outputs)} completed units")
+
+    @property
+    def resumed(self) -> bool:
+        """Whether progress from an earlier run was found."""
+        return bool(self.outputs) or self.total_units is not None
+
+    def _save(self) -> None:
+        """Persist the checkpoint."""
+        self.store.set(self.key, {
+            "total_units": self.total_units,
+            "cursor": self.cursor,
+            "outputs": self.outputs
+        })
+
+    def set_total(self, total_units: int) -> None:
+        """Record the number of units of the task.
+
+        Args:
+            total_units: Number of units, e.g. pages
+        """
+        self.total_units = total_units
+        self._save()
+
+    def is_complete(self, unit: Any) -> bool:
+        """Check whether a unit has been written.
+
+        Args:
+            unit: Page number or cursor
+
+        Returns:
+            True if the unit's data was written
+        """
+        return str(unit) in self.outputs
+
+    def pending(self, units: Iterable[Any], exists: Optional[Callable[[str], bool]] = None) -> List[Any]:
+        """Filter units down to those still to be fetched.
+
+        Args:
+            units: Every unit of the task
+            exists: Check an output key still exists; units whose output is gone are fetched again
+
+        Returns:
+            Units not completed yet, in order
+        """
+        pending = []
+        for unit in units:
+            output_key = self.outputs.get(str(unit))
+            if output_key is None or (exists is not None and not exists(output_key)):
+                pending.append(unit)
+        return pending
+
+    def record(self, unit: Any, output_key: str, cursor: Optional[str] = None) -> None:
+        """Record a unit whose data has been durably written.
+
+        Args:
+            unit: Page number or cursor
+            output_key: Key or path the unit's data was written to
+            cursor: Cursor to resume cursor-paginated queries from
+        """
+        self.outputs[str(unit)] = output_key
+        if cursor is not None:
+            self.cursor = cursor
+        self._save()
+
+    def output_keys(self, units: Iterable[Any]) -> List[str]:
+        """Get the output keys of units in order.
+
+        Args:
+            units: Completed units
+
+        Returns:
+            Output key of each unit
+        """
+        return [self.outputs[str(unit)] for unit in units]
+
+    def clear(self) -> None:
+        """Forget the task's progress once its output is complete."""
+        self.store.delete(self.key)
+        self.total_units = None
+        self.cursor = None
+        self.outputs = {}
@@ -0,0 +1,276 @@
+"""Adaptive concurrency control for outbound API calls."""
+
+import time
+import math
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Deque, Optional
+
+from ingestion.utils.metrics import MetricsCollector
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses telling us the upstream is overloaded
+OVERLOAD_STATUSES = frozenset({429, 503})
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header.
+
+    Args:
+        value: Header value, either delay seconds or an HTTP date
+
+    Returns:
+        Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class ConcurrencySlot:
+    """A single in-flight request admitted by the controller."""
+
+    def __init__(self, epoch: int):
+        self.epoch = epoch
+        self.overloaded = False
+        self.retry_after: Optional[float] = None
+        self.idle = 0.0
+
+    def mark_overloaded(self, retry_after: Optional[float] = None) -> None:
+        """Report that the upstream rejected this request as overloaded.
+
+        Args:
+            retry_after: Seconds the upstream asked us to wait, if any
+        """
+        self.overloaded = True
+        self.retry_after = retry_after
+
+    def exclude(self, seconds: float) -> None:
+        """Leave time spent outside the request out of its latency sample.
+
+        Streaming callers hold the slot while the consumer processes each
+        item; that time says nothing about the upstream.
+
+        Args:
+            seconds: Time the caller spent away from the request
+        """
+        self.idle += seconds
+
+
+class AdaptiveConcurrencyController:
+    """AIMD controller for the number of in-flight requests.
+
+    The window grows additively (by ``increase`` per window's worth of
+    successful requests) while latency and error rate stay healthy, and is
+    multiplied by ``decrease_factor`` on 429/503 responses or when the p95
+    latency of recent requests exceeds ``latency_spike_factor`` times the
+    best p95 seen so far. A decrease only happens once per window generation,
+    so a burst of rejections from requests that were already in flight halves
+    the window once rather than collapsing it. ``Retry-After`` pauses new
+    requests until the upstream is ready again.
+
+    Example:
+        controller = AdaptiveConcurrencyController(initial_limit=4, max_limit=32)
+        async with controller.slot() as slot:
+            response = await send()
+            if response.status == 429:
+                slot.mark_overloaded(parse_retry_after(response.headers.get("Retry-After")))
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        increase: float = 1.0,
+        decrease_factor: float = 0.5,
+        latency_window: int = 50,
+        latency_spike_factor: float = 2.0,
+        max_error_rate: float = 0.1,
+        metrics: Optional[MetricsCollector] = None,
+        name: str = "graphql"
+    ):
+        """Initialize the controller.
+
+        Args:
+            initial_limit: Starting number of in-flight requests
+            min_limit: Lower bound of the window
+            max_limit: Upper bound of the window
+            increase: Window growth per window's worth of successful requests
+            decrease_factor: Multiplier applied to the window on overload
+            latency_window: Number of recent requests used for latency and error rate
+            latency_spike_factor: Ratio of recent to best p95 latency treated as a spike
+            max_error_rate: Error rate above which the window stops growing
+            metrics: Optional collector receiving the window on every change
+            name: Prefix of the recorded metric
+        """
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Limits must satisfy 1 <= min_limit <= initial_limit <= max_limit")
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_spike_factor = latency_spike_factor
+        self.max_error_rate = max_error_rate
+        self.metrics = metrics
+        self.metric_name = f"{name}_concurrency_limit"
+
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._epoch = 0
+        self._paused_until = 0.0
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+        self._outcomes: Deque[bool] = deque(maxlen=latency_window)
+        self._best_p95: Optional[float] = None
+        self._condition: Optional[asyncio.Condition] = None
+        self._condition_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._record_limit()
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed in flight."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests currently in flight."""
+        return self._in_flight
+
+    def _get_condition(self) -> asyncio.Condition:
+        """Get the condition used to wake waiting requests on this event loop."""
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._condition_loop is not loop:
+            self._condition = asyncio.Condition()
+            self._condition_loop = loop
+        return self._condition
+
+    def _record_limit(self) -> None:
+        """Publish the current window."""
+        if self.metrics is not None:
+            self.metrics.record_metric(self.metric_name, self.limit)
+
+    def _p95(self) -> Optional[float]:
+        """p95 of recent latencies, once enough samples are available."""
+        if len(self._latencies) < max(10, self._latencies.maxlen // 2):
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+
+    def _set_limit(self, limit: float) -> None:
+        """Change the window, recording it if its integer value changed."""
+        previous = self.limit
+        self._limit = min(float(self.max_limit), max(float(self.min_limit), limit))
+        if self.limit != previous:
+            logger.info(f"Concurrency limit changed from {previous} to {self.limit}")
+            self._record_limit()
+
+    def _decrease(self, epoch: int) -> None:
+        """Shrink the window once per generation."""
+        if epoch != self._epoch:
+            return
+        self._epoch += 1
+        self._latencies.clear()
+        self._outcomes.clear()
+        self._set_limit(self._limit * self.decrease_factor)
+
+    def _on_success(self, epoch: int, latency: float) -> None:
+        """Record a successful request and grow or shrink the window."""
+        self._latencies.append(latency)
+        self._outcomes.append(True)
+
+        p95 = self._p95()
+        if p95 is not None:
+            if self._best_p95 is None or p95 < self._best_p95:
+                self._best_p95 = p95
+            elif p95 > self._best_p95 * self.latency_spike_factor:
+                logger.warning(f"p95 latency spike: {p95:.3f}s vs best {self._best_p95:.3f}s")
+                self._decrease(epoch)
+                return
+
+        errors = self._outcomes.count(False)
+        if errors / len(self._outcomes) <= self.max_error_rate:
+            self._set_limit(self._limit + self.increase / self._limit)
+
+    def _on_error(self) -> None:
+        """Record a failed request that was not an overload signal."""
+        self._outcomes.append(False)
+
+    def _on_overload(self, epoch: int, retry_after: Optional[float]) -> None:
+        """Record an overload response."""
+        self._outcomes.append(False)
+        if retry_after:
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            logger.warning(f"Upstream asked to retry after {retry_after:.1f}s")
+        self._decrease(epoch)
+
+    async def acquire(self) -> int:
+        """Wait for a free slot in the window.
+
+        Returns:
+            Window generation the slot was admitted in
+        """
+        condition = self._get_condition()
+        async with condition:
+            while True:
+                pause = self._paused_until - time.monotonic()
+                if pause > 0:
+                    try:
+                        await asyncio.wait_for(condition.wait(), timeout=pause)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if self._in_flight < self.limit:
+                    break
+                await condition.wait()
+            self._in_flight += 1
+            return self._epoch
+
+    async def release(self) -> None:
+        """Free a slot and wake waiting requests."""
+        condition = self._get_condition()
+        async with condition:
+            self._in_flight -= 1
+            condition.notify_all()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[ConcurrencySlot]:
+        """Run one request inside the window.
+
+        Yields:
+            Slot the caller marks as overloaded on 429/503 responses
+        """
+        slot = ConcurrencySlot(await self.acquire())
+        start = time.monotonic()
+        try:
+            yield slot
+        except Exception:
+            if slot.overloaded:
+                self._on_overload(slot.epoch, slot.retry_after)
+            else:
+                self._on_error()
+            raise
+        else:
+            if slot.overloaded:
+                self._on_overload(slot.epoch, slot.retry_after)
+            else:
+                self._on_success(slot.epoch, time.monotonic() - start - slot.idle)
+        finally:
+            await self.release()
@@ -1,23 +1,77 @@
 """GraphQL client with OAuth2 authentication."""
 
 import os
-import json
 import gzip
 import boto3
+import asyncio
+import time
 import logging
+import weakref
+import threading
 import yaml
-from io import BytesIO
+import aiohttp
+import requests
+from contextlib import AsyncExitStack, nullcontext
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any, Optional, Union, BinaryIO, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Union, BinaryIO, Tuple, Iterator, AsyncIterator
 
 from gql import gql, Client
+from gql.transport.exceptions import TransportQueryError, TransportServerError
 from gql.transport.requests import RequestsHTTPTransport
+from graphql import GraphQLSchema, parse, validate
 from oauthlib.oauth2 import BackendApplicationClient
 from requests_oauthlib import OAuth2Session
 
+from ingestion.utils.concurrency import (
+    OVERLOAD_STATUSES,
+    AdaptiveConcurrencyController,
+    ConcurrencySlot,
+    parse_retry_after
+)
+from ingestion.utils import json_codec
+from ingestion.utils.json_stream import aiter_items, iter_items
+from ingestion.utils.ndjson_writer import NDJSONWriter, ndjson_suffix
+from ingestion.utils.pagination import (
+    CursorPaginator,
+    connection_next_cursor,
+    connection_nodes,
+    get_path
+)
+from ingestion.utils.parquet_writer import ParquetRecordWriter, infer_schema
+from ingestion.utils.persisted_queries import (
+    PERSISTED_QUERY_NOT_SUPPORTED,
+    persist_query,
+    persisted_query_error,
+    persisted_query_extensions
+)
+from ingestion.utils.query_batching import QueryBatcher
+from ingestion.utils.query_planner import QueryPlanner
+from ingestion.utils.rate_limiter import TokenBucketRateLimiter
+from ingestion.utils.response_cache import ResponseCache
+from ingestion.utils.retry import CircuitBreaker, Retrier
+from ingestion.utils.s3_multipart import S3MultipartWriter
+from ingestion.utils.schema_cache import SchemaCache
+from ingestion.utils.single_flight import SingleFlight
+from ingestion.utils.token_manager import OAuthTokenManager
+
 logger = logging.getLogger(__name__)
 
+class GraphQLHTTPError(TransportServerError):
+    """HTTP error response from a GraphQL endpoint."""
+    
+    def __init__(self, status: int, reason: Optional[str] = None, retry_after: Optional[float] = None):
+        """Initialize the error.
+        
+        Args:
+            status: HTTP status code
+            reason: HTTP reason phrase
+            retry_after: Seconds the server asked us to wait before retrying
+        """
+        super().__init__(f"{status}, message='{reason}'", status)
+        self.retry_after = retry_after
+
 class GraphQLQueryLoader:
     """Loads and manages GraphQL queries from a YAML configuration file."""
     
@@ -70,7 +124,15 @@ class GraphQLOAuthClient:
         client_secret: str,
         scope: Optional[str] = None,
         data_dir: Optional[Path] = None,
-        sink_config: Optional[Dict[str, Any]] = None
+        sink_config: Optional[Dict[str, Any]] = None,
+        schema_cache: Optional[SchemaCache] = None,
+        token_manager: Optional[OAuthTokenManager] = None,
+        rate_limiter: Optional[TokenBucketRateLimiter] = None,
+        retrier: Optional[Retrier] = None,
+        timeout: float = 60.0,
+        response_cache: Optional[ResponseCache] = None,
+        single_flight: Optional[SingleFlight] = None,
+        query_planner: Optional[QueryPlanner] = None
     ):
         """Initialize GraphQL client with OAuth2 authentication.
         
@@ -82,6 +144,18 @@ class GraphQLOAuthClient:
             scope: OAuth2 scope (if required)
             data_dir: Directory for storing data (if using local sink)
             sink_config: Configuration for data sink (type, key_prefix, etc.)
+            schema_cache: Cache used to validate queries without introspecting
+                on every setup, defaults to the on-disk SchemaCache
+            token_manager: Token cache refreshing the OAuth2 token before it
+                expires, shared through OAUTH_TOKEN_CACHE_DIR when set
+            rate_limiter: Optional limiter applied to every GraphQL request
+            retrier: Retry policy for failed requests, defaults to the standard
+                policies guarded by the endpoint's shared circuit breaker
+            timeout: Timeout in seconds for a single request
+            response_cache: Optional cache answering repeated queries
+            single_flight: Group deduplicating identical concurrent queries,
+                defaults to the one shared by the whole process
+            query_planner: Optional planner splitting queries over its cost budget
         """
         self.graphql_url = graphql_url
         self.token_url = token_url
@@ -90,8 +164,19 @@ class GraphQLOAuthClient:
         self.scope = scope
         self.token = None
         self.client = None
+        self._client_lock = threading.RLock()
+        self.timeout = timeout
+        self.response_cache = response_cache
+        self.single_flight = single_flight or SingleFlight.default()
+        self.query_planner = query_planner
+        self.retrier = retrier or Retrier(circuit_breaker=CircuitBreaker.for_endpoint(graphql_url))
         self.data_dir = data_dir or Path("/tmp/data")
         self.sink_config = sink_config or {"type": "local", "key_prefix": "data"}
+        self.schema_cache = schema_cache or SchemaCache()
+        self.token_manager = token_manager or OAuthTokenManager(
+            cache_path=OAuthTokenManager.default_cache_path(token_url, client_id)
+        )
+        self.rate_limiter = rate_limiter
         
         # Initialize S3 client if needed
         self._s3_client = None
@@ -102,8 +187,28 @@ class GraphQLOAuthClient:
         if os.environ.get('TESTING'):
             os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
 
+    def _fetch_token(self) -> Dict[str, Any]:
+        """Fetch a new OAuth2 token using client credentials flow.
+        
+        Returns:
+            OAuth2 token information
+        """
+        oauth2_client = BackendApplicationClient(client_id=self.client_id)
+        oauth = OAuth2Session(
+            client=oauth2_client,
+            scope=self.scope
+        )
+        
+        return oauth.fetch_token(
+            token_url=self.token_url,
+            client_id=self.client_id,
+            client_secret=self.client_secret,
+            include_client_id=True,
+            scope=self.scope
+        )
+
     def _get_oauth_token(self) -> Dict[str, Any]:
-        """Get OAuth2 token using client credentials flow.
+        """Get a valid OAuth2 token, fetching a new one only when needed.
         
         Returns:
             OAuth2 token information
@@ -112,55 +217,64 @@ class GraphQLOAuthClient:
             Exception: If token retrieval fails
         """
         try:
-            oauth2_client = BackendApplicationClient(client_id=self.client_id)
-            oauth = OAuth2Session(
-                client=oauth2_client,
-                scope=self.scope
-            )
-            
-            self.token = oauth.fetch_token(
-                token_url=self.token_url,
-                client_id=self.client_id,
-                client_secret=self.client_secret,
-                include_client_id=True,
-                scope=self.scope
-            )
-            
+            self.token = self.token_manager.get_token(self._fetch_token)
             return self.token
             
         except Exception as e:
             logger.error(f"Failed to get OAuth token: {str(e)}")
             raise
 
+    def _make_transport(self) -> RequestsHTTPTransport:
+        """Create an authenticated transport for the GraphQL endpoint.
+        
+        Returns:
+            Requests transport carrying the OAuth2 bearer token
+        """
+        self._get_oauth_token()
+        
+        return RequestsHTTPTransport(
+            url=self.graphql_url,
+            headers={
+                'Authorization': f'Bearer {self.token["access_token"]}',
+                'Content-Type': 'application/json',
+            },
+            verify=not os.environ.get('TESTING', False),
+            timeout=self.timeout,
+        )
+
     def _setup_client(self) -> None:
         """Setup GQL client with OAuth2 authentication.
         
+        Queries are validated against the cached schema; the endpoint is only
+        introspected when no valid cached schema exists.
+        
         Raises:
             Exception: If client setup fails
         """
         try:
-            if not self.token:
-                self._get_oauth_token()
-            
-            transport = RequestsHTTPTransport(
-                url=self.graphql_url,
-                headers={
-                    'Authorization': f'Bearer {self.token["access_token"]}',
-                    'Content-Type': 'application/json',
-                },
-                verify=not os.environ.get('TESTING', False),
-                retries=3,
-            )
+            transport = self._make_transport()
             
-            self.client = Client(
-                transport=transport,
-                fetch_schema_from_transport=True
-            )
+            schema = self.schema_cache.load_schema(self.graphql_url)
+            if schema is None:
+                schema = self.schema_cache.refresh(self.graphql_url, transport)
+            
+            self.client = Client(transport=transport, schema=schema)
             
         except Exception as e:
             logger.error(f"Failed to setup GraphQL client: {str(e)}")
             raise
 
+    def refresh_schema(self) -> GraphQLSchema:
+        """Re-introspect the endpoint and update the schema cache.
+        
+        Returns:
+            Freshly introspected schema
+        """
+        schema = self.schema_cache.refresh(self.graphql_url, self._make_transport())
+        with self._client_lock:
+            self.client = None
+        return schema
+
     def execute_query(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Execute GraphQL query with authentication.
         
@@ -175,19 +289,237 @@ class GraphQLOAuthClient:
             Exception: If query execution fails
         """
         try:
+            key = ResponseCache.make_key(self.graphql_url, query, variables)
+            fetch = lambda: self.single_flight.do(key, lambda: self._fetch_query(query, variables))
+            if self.response_cache is not None:
+                return self.response_cache.get_or_fetch(self.graphql_url, query, variables, fetch)
+            return fetch()
+            
+        except Exception as e:
+            logger.error(f"Failed to execute query: {str(e)}")
+            raise
+
+    def _fetch_query(self, query: str, variables: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Execute a query against the endpoint, bypassing the response cache.
+        
+        Queries over the planner's cost budget are split into several
+        requests whose responses are merged.
+        
+        Args:
+            query: GraphQL query string
+            variables: Query variables
+            
+        Returns:
+            Query response
+        """
+        if self.query_planner is None:
+            return self._fetch_single(query, variables)
+        self._ensure_client()
+        plan = self.query_planner.plan(query, variables, schema=self.client.schema)
+        return self.query_planner.merge(plan, [self._fetch_single(q, v) for q, v in plan.parts])
+
+    def _fetch_single(self, query: str, variables: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Execute a query in a single request.
+        
+        Args:
+            query: GraphQL query string
+            variables: Query variables
+            
+        Returns:
+            Query response
+        """
+        self._ensure_client()
+        parsed_query = gql(query)
+        result = self.retrier.call(self._execute, parsed_query, variables)
+        
+        # Wrap result in data field to match GraphQL convention
+        return {"data": result}
+
+    def _ensure_client(self) -> None:
+        """Set up the client, or refresh its bearer token if it already exists."""
+        with self._client_lock:
             if not self.client:
                 self._setup_client()
+            else:
+                token = self._get_oauth_token()
+                self.client.transport.headers['Authorization'] = f'Bearer {token["access_token"]}'
+
+    def execute_batch(
+        self,
+        query: str,
+        variable_sets: List[Dict[str, Any]],
+        max_batch_size: int = 20,
+        max_complexity: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Execute one query for many variable sets in as few requests as possible.
+        
+        Copies of the query are merged into aliased documents of up to
+        max_batch_size copies, or fewer if max_complexity would be exceeded.
+        
+        Args:
+            query: GraphQL query string containing a single operation
+            variable_sets: Variables for every execution of the query
+            max_batch_size: Maximum number of variable sets per request
+            max_complexity: Optional maximum number of fields per request
             
-            parsed_query = gql(query)
-            result = self.client.execute(parsed_query, variable_values=variables)
+        Returns:
+            One response per variable set, in order. Responses carry an
+            ``errors`` list when the server reported errors for them.
             
-            # Wrap result in data field to match GraphQL convention
-            return {"data": result}
+        Raises:
+            ValueError: If the query cannot be batched
+            Exception: If a request fails
+        """
+        batcher = QueryBatcher(query, max_batch_size=max_batch_size, max_complexity=max_complexity)
+        results: List[Dict[str, Any]] = []
+        try:
+            self._ensure_client()
+            chunks = batcher.chunks(variable_sets)
+            for chunk in chunks:
+                document, variables = batcher.build(chunk)
+                try:
+                    data, errors = self.retrier.call(self._execute, gql(document), variables), None
+                except TransportQueryError as e:
+                    data, errors = e.data, e.errors
+                results.extend(batcher.split(data, errors, len(chunk)))
+            logger.info(f"Executed {len(variable_sets)} queries in {len(chunks)} requests")
+            return results
             
         except Exception as e:
-            logger.error(f"Failed to execute query: {str(e)}")
+            logger.error(f"Failed to execute batch: {str(e)}")
             raise
 
+    def _execute(self, document: Any, variables: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Send a single request for a parsed query.
+        
+        Requests take turns: gql's sync client carries one request at a time,
+        and background cache refreshes share it with the caller. HTTP errors
+        carry the response's Retry-After delay for the retrier.
+        
+        Args:
+            document: Parsed GraphQL document
+            variables: Query variables
+            
+        Returns:
+            Query result data
+        """
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        with self._client_lock:
+            try:
+                return self.client.execute(document, variable_values=variables)
+            except TransportServerError as e:
+                headers = getattr(self.client.transport, 'response_headers', None) or {}
+                e.retry_after = parse_retry_after(headers.get('Retry-After'))
+                raise
+
+    def stream_items(
+        self,
+        query: str,
+        items_path: str,
+        variables: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Any]:
+        """Execute a query and yield the items of one list as the body is read.
+        
+        Only one item is decoded and held in memory at a time, so large pages
+        can be written out while the response is still arriving.
+        
+        Args:
+            query: GraphQL query string
+            items_path: Dotted path to the list, e.g. data.organisationAthletes.athletes
+            variables: Query variables
+            
+        Yields:
+            List items in order
+            
+        Raises:
+            GraphQLHTTPError: If the server responds with an HTTP error
+            TransportQueryError: If the response contains GraphQL errors
+        """
+        payload = {"query": persist_query(query)[0], "variables": variables or {}}
+        response = self.retrier.call(self._open_stream, payload)
+        with response:
+            yield from iter_items(response.raw, items_path)
+
+    def _open_stream(self, payload: Dict[str, Any]) -> requests.Response:
+        """Send a request and return the response with its body unread.
+        
+        Args:
+            payload: JSON request body
+            
+        Returns:
+            Streaming response
+            
+        Raises:
+            GraphQLHTTPError: If the server responds with an HTTP error
+        """
+        token = self._get_oauth_token()
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        response = requests.post(
+            self.graphql_url,
+            json=payload,
+            headers={'Authorization': f'Bearer {token["access_token"]}'},
+            verify=not os.environ.get('TESTING', False),
+            timeout=self.timeout,
+            stream=True,
+        )
+        if response.status_code >= 400:
+            response.close()
+            if response.status_code == 401:
+                self.token_manager.invalidate(token)
+            raise GraphQLHTTPError(
+                response.status_code,
+                response.reason,
+                parse_retry_after(response.headers.get('Retry-After'))
+            )
+        response.raw.decode_content = True
+        return response
+
+    def iter_connection(
+        self,
+        query: str,
+        connection_path: str,
+        variables: Optional[Dict[str, Any]] = None,
+        cursor_variable: str = "after"
+    ) -> Iterator[Any]:
+        """Stream the nodes of a Relay-style cursor connection.
+        
+        The next page is fetched on a background thread while the caller
+        processes the nodes of the current page. The prefetch shares the gql
+        client with the caller and requests take turns on it, so queries the
+        caller sends while iterating wait for an in-flight prefetch rather
+        than overlapping it.
+        
+        Args:
+            query: GraphQL query string accepting the cursor variable
+            connection_path: Dotted path to the connection, e.g. data.organisation.athletes
+            variables: Query variables
+            cursor_variable: Name of the query variable holding the cursor
+            
+        Yields:
+            Connection nodes in order
+            
+        Raises:
+            ValueError: If the connection is missing from a response
+        """
+        variables = dict(variables or {})
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = executor.submit(self.execute_query, query, variables)
+            while pending is not None:
+                connection = get_path(pending.result(), connection_path)
+                if not isinstance(connection, dict):
+                    raise ValueError(f"Connection not found at path: {connection_path}")
+                
+                cursor = connection_next_cursor(connection)
+                pending = None
+                if cursor is not None:
+                    pending = executor.submit(
+                        self.execute_query, query, {**variables, cursor_variable: cursor}
+                    )
+                
+                yield from connection_nodes(connection)
+
     def _get_output_key(self) -> str:
         """Get output key for storing query results.
         
@@ -200,12 +532,14 @@ class GraphQLOAuthClient:
         format = self.sink_config.get("format", "json")
         compression = self.sink_config.get("compression")
         
-        # Create timestamp for filename
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        # Create timestamp for filename, to the microsecond so runs in the same second don't collide
+        timestamp = datetime.now().strftime("%Y%m%d%H%M%S%f")
         
         # Build filename with format and optional compression
         filename = f"{key_prefix}_{timestamp}.{format}"
-        if compression == "gzip":
+        if format == "ndjson":
+            filename = f"{key_prefix}_{timestamp}{ndjson_suffix(compression)}"
+        elif compression == "gzip" and format == "json":
             filename += ".gz"
             
         # Combine parts for full path/key
@@ -246,26 +580,52 @@ class GraphQLOAuthClient:
         compression = self.sink_config.get("compression")
         
         try:
+            records = data
+            items_path = self.sink_config.get("items_path")
+            if items_path:
+                records = get_path(data, items_path, [])
+            
+            # Write one record per line through a streaming compressor
+            if format == "ndjson":
+                with NDJSONWriter(
+                    file, compression=compression, level=self.sink_config.get("compression_level")
+                ) as writer:
+                    writer.write(records if isinstance(records, list) else [records])
+                return
+            
+            # Parquet compresses its own row groups
+            if format == "parquet":
+                records = records if isinstance(records, list) else [records]
+                # Infer the schema from every record, not only the first row group
+                with ParquetRecordWriter(
+                    file,
+                    row_group_size=self.sink_config.get("row_group_size", 10000),
+                    compression=compression or "snappy",
+                    schema=infer_schema(records)
+                ) as writer:
+                    writer.write(records)
+                return
+            
             # Convert data to appropriate format
             if format == "json":
-                content = json.dumps(data, indent=2)
+                content = json_codec.dumps(data)
             else:
                 raise ValueError(f"Unsupported format: {format}")
             
             # Write with appropriate compression
             if compression == "gzip":
                 if isinstance(file, (str, Path)):
-                    with gzip.open(file, 'wt') as f:
+                    with gzip.open(file, 'wb') as f:
                         f.write(content)
                 else:
                     with gzip.GzipFile(fileobj=file, mode='w') as gz:
-                        gz.write(content.encode('utf-8'))
+                        gz.write(content)
             else:
                 if isinstance(file, (str, Path)):
-                    with open(file, 'w') as f:
+                    with open(file, 'wb') as f:
                         f.write(content)
                 else:
-                    file.write(content.encode('utf-8'))
+                    file.write(content)
                     
         except Exception as e:
             logger.error(f"Failed to write data: {str(e)}")
@@ -293,21 +653,21 @@ class GraphQLOAuthClient:
                 if not bucket:
                     raise ValueError("S3 bucket not specified in sink config")
                 
-                # Write to memory buffer first
-                buffer = BytesIO()
-                self._write_data(buffer, data)
-                buffer.seek(0)
-                
-                # Upload to S3
-                self._s3_client.upload_fileobj(
-                    buffer,
+                # Upload parts while the data is still being serialized
+                with S3MultipartWriter(
                     bucket,
                     output_key,
-                    ExtraArgs={
-                        'ContentType': 'application/json',
+                    client=self._s3_client,
+                    part_size=self.sink_config.get("part_size", 8 * 1024 * 1024),
+                    extra_args={
+                        'ContentType': {
+                            'parquet': 'application/vnd.apache.parquet',
+                            'ndjson': 'application/x-ndjson'
+                        }.get(self.sink_config.get("format"), 'application/json'),
                         'ACL': 'bucket-owner-full-control'
                     }
-                )
+                ) as stream:
+                    self._write_data(stream, data)
                 
                 s3_uri = f"s3://{bucket}/{output_key}"
                 logger.info(f"Successfully stored results in {s3_uri}")
@@ -330,3 +690,514 @@ class GraphQLOAuthClient:
         except Exception as e:
             logger.error(f"Failed to save results: {str(e)}")
             raise
+
+
+
+class AsyncGraphQLOAuthClient:
+    """Asynchronous GraphQL client with OAuth2 authentication.
+
+    Requests go through an aiohttp connection pool that is shared by every
+    client talking to the same endpoint on the same event loop, so many
+    queries can be kept in flight over a small set of keep-alive connections.
+
+    Example:
+        client = AsyncGraphQLOAuthClient(graphql_url, token_url, client_id, client_secret)
+        result = await client.execute_query(query, {"id": 78, "page": 1, "per": 100})
+        await AsyncGraphQLOAuthClient.close_pools()
+    """
+
+    # event loop -> endpoint and pool settings -> shared session
+    _pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, aiohttp.ClientSession]]" = (
+        weakref.WeakKeyDictionary()
+    )
+
+    def __init__(
+        self,
+        graphql_url: str,
+        token_url: str,
+        client_id: str,
+        client_secret: str,
+        scope: Optional[str] = None,
+        limit: int = 100,
+        limit_per_host: int = 20,
+        keepalive_timeout: float = 30.0,
+        timeout: float = 60.0,
+        schema_cache: Optional[SchemaCache] = None,
+        token_manager: Optional[OAuthTokenManager] = None,
+        rate_limiter: Optional[TokenBucketRateLimiter] = None,
+        concurrency: Optional[AdaptiveConcurrencyController] = None,
+        retrier: Optional[Retrier] = None,
+        persisted_queries: bool = False,
+        persisted_query_get: bool = False,
+        response_cache: Optional[ResponseCache] = None,
+        single_flight: Optional[SingleFlight] = None,
+        query_planner: Optional[QueryPlanner] = None
+    ):
+        """Initialize async GraphQL client with OAuth2 authentication.
+
+        Args:
+            graphql_url: The GraphQL endpoint URL
+            token_url: OAuth2 token endpoint URL
+            client_id: OAuth2 client ID
+            client_secret: OAuth2 client secret
+            scope: OAuth2 scope (if required)
+            limit: Maximum number of open connections in the shared pool
+            limit_per_host: Maximum number of open connections per host
+            keepalive_timeout: Seconds an idle connection is kept open for reuse
+            timeout: Total timeout in seconds for a single request
+            schema_cache: Cache whose schema, when present, is used to validate
+                queries locally before they are sent
+            token_manager: Token cache refreshing the OAuth2 token before it
+                expires, shared through OAUTH_TOKEN_CACHE_DIR when set
+            rate_limiter: Optional limiter applied to every GraphQL request
+            concurrency: Optional adaptive controller bounding in-flight requests
+            retrier: Retry policy for failed requests, defaults to the standard
+                policies guarded by the endpoint's shared circuit breaker
+            persisted_queries: Send query hashes first and the full text only
+                when the server does not know the hash yet (APQ)
+            persisted_query_get: Send hash-only requests as GET so they can be
+                cached by upstream proxies
+            response_cache: Optional cache answering repeated queries
+            single_flight: Group deduplicating identical concurrent queries,
+                defaults to the one shared by the whole process
+            query_planner: Optional planner splitting queries over its cost budget
+        """
+        self.graphql_url = graphql_url
+        self.token_url = token_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.scope = scope
+        self.token = None
+        self.concurrency = concurrency
+        self.persisted_queries = persisted_queries
+        self.persisted_query_get = persisted_query_get
+        self.response_cache = response_cache
+        self.single_flight = single_flight or SingleFlight.default()
+        self.query_planner = query_planner
+        self.retrier = retrier or Retrier(circuit_breaker=CircuitBreaker.for_endpoint(graphql_url))
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.schema_cache = schema_cache
+        self.token_manager = token_manager or OAuthTokenManager(
+            cache_path=OAuthTokenManager.default_cache_path(token_url, client_id)
+        )
+        self.rate_limiter = rate_limiter
+        self._schema = None
+        self._validated_queries = set()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared session for this endpoint, creating it if needed.
+
+        Clients share a session only when their pool settings match, so a
+        client never runs on another client's connection limits.
+
+        Returns:
+            aiohttp session bound to the running event loop
+        """
+        loop = asyncio.get_running_loop()
+        sessions = self._pools.setdefault(loop, {})
+        key = (self.graphql_url, self.limit, self.limit_per_host, self.keepalive_timeout, self.timeout)
+        session = sessions.get(key)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ssl=False if os.environ.get('TESTING') else None,
+            )
+            session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            sessions[key] = session
+        return session
+
+    @classmethod
+    async def close_pools(cls) -> None:
+        """Close all shared sessions created on the running event loop."""
+        sessions = cls._pools.pop(asyncio.get_running_loop(), {})
+        for session in sessions.values():
+            await session.close()
+
+    async def _fetch_token(self) -> Dict[str, Any]:
+        """Fetch a new OAuth2 token using client credentials flow.
+
+        Returns:
+            OAuth2 token information
+        """
+        form = {
+            'grant_type': 'client_credentials',
+            'client_id': self.client_id,
+            'client_secret': self.client_secret,
+        }
+        if self.scope:
+            form['scope'] = self.scope
+
+        async with self._get_session().post(self.token_url, data=form) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    async def _get_oauth_token(self) -> Dict[str, Any]:
+        """Get a valid OAuth2 token, fetching a new one only when needed.
+
+        Returns:
+            OAuth2 token information
+
+        Raises:
+            Exception: If token retrieval fails
+        """
+        try:
+            self.token = await self.token_manager.get_token_async(self._fetch_token)
+            return self.token
+
+        except Exception as e:
+            logger.error(f"Failed to get OAuth token: {str(e)}")
+            raise
+
+    async def _post(self, payload: Dict[str, Any], method: str = "POST") -> Dict[str, Any]:
+        """Send a GraphQL request, refreshing the token once if it was rejected.
+
+        Args:
+            payload: Request body, sent as query parameters for GET requests
+            method: HTTP method, POST or GET
+
+        Returns:
+            Decoded GraphQL response body
+
+        Raises:
+            GraphQLHTTPError: If the server responds with an HTTP error
+        """
+        if method == "GET":
+            params = {
+                k: v if isinstance(v, str) else json_codec.dumps(v, pretty=False).decode()
+                for k, v in payload.items()
+            }
+            request = {"params": params}
+        else:
+            request = {"json": payload}
+
+        for attempt in range(2):
+            token = await self._get_oauth_token()
+
+            headers = {'Authorization': f'Bearer {token["access_token"]}'}
+            if self.rate_limiter:
+                await self.rate_limiter.acquire_async()
+            async with self._slot() as slot, self._get_session().request(
+                method, self.graphql_url, headers=headers, **request
+            ) as response:
+                if response.status == 401 and attempt == 0:
+                    self.token_manager.invalidate(token)
+                    continue
+                if response.status >= 400:
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    if response.status in OVERLOAD_STATUSES:
+                        slot.mark_overloaded(retry_after)
+                    raise GraphQLHTTPError(response.status, response.reason, retry_after)
+                return await response.json()
+
+    async def _send(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a query, as a persisted query hash when APQ is enabled.
+
+        Args:
+            query: GraphQL query string
+            variables: Query variables
+
+        Returns:
+            Decoded GraphQL response body
+        """
+        text, query_hash = persist_query(query)
+        if not self.persisted_queries:
+            return await self._request({"query": text, "variables": variables})
+
+        payload = {"variables": variables, "extensions": persisted_query_extensions(query_hash)}
+        method = "GET" if self.persisted_query_get else "POST"
+        result = await self._request(payload, method)
+
+        error = persisted_query_error(result.get("errors"))
+        if error is None:
+            return result
+        if error == PERSISTED_QUERY_NOT_SUPPORTED:
+            logger.warning(f"Persisted queries not supported by {self.graphql_url}, sending full queries")
+            self.persisted_queries = False
+            payload = {"query": text, "variables": variables}
+        else:
+            # Register the query; the server stores it under its hash
+            payload = {**payload, "query": text}
+        return await self._request(payload)
+
+    async def _request(self, payload: Dict[str, Any], method: str = "POST") -> Dict[str, Any]:
+        """Send a request through the retrier, retrying transient GraphQL errors too.
+
+        Args:
+            payload: Request body, sent as query parameters for GET requests
+            method: HTTP method, POST or GET
+
+        Returns:
+            Decoded GraphQL response body, including errors that outlasted their retries
+        """
+        try:
+            return await self.retrier.call_async(self._post_checked, payload, method)
+        except TransportQueryError as e:
+            return {"data": e.data, "errors": e.errors}
+
+    async def _post_checked(self, payload: Dict[str, Any], method: str = "POST") -> Dict[str, Any]:
+        """Send a request, raising GraphQL errors the retrier classifies as transient.
+
+        Args:
+            payload: Request body
+            method: HTTP method, POST or GET
+
+        Returns:
+            Decoded GraphQL response body
+
+        Raises:
+            TransportQueryError: If the response carries a transient error such as THROTTLED
+        """
+        result = await self._post(payload, method)
+        errors = result.get("errors")
+        if errors:
+            error = TransportQueryError(str(errors[0]), errors=errors, data=result.get("data"))
+            if self.retrier.classify(error) is not None:
+                raise error
+        return result
+
+    async def _open_stream(
+        self,
+        payload: Dict[str, Any]
+    ) -> Tuple[AsyncExitStack, aiohttp.ClientResponse, ConcurrencySlot]:
+        """Send a request and return the response with its body unread.
+
+        The returned exit stack holds the concurrency slot and the response;
+        closing it releases both.
+
+        Args:
+            payload: JSON request body
+
+        Returns:
+            Tuple of the exit stack, the streaming response and its concurrency slot
+
+        Raises:
+            GraphQLHTTPError: If the server responds with an HTTP error
+        """
+        for attempt in range(2):
+            token = await self._get_oauth_token()
+            if self.rate_limiter:
+                await self.rate_limiter.acquire_async()
+
+            stack = AsyncExitStack()
+            try:
+                slot = await stack.enter_async_context(self._slot())
+                response = await stack.enter_async_context(self._get_session().post(
+                    self.graphql_url,
+                    json=payload,
+                    headers={'Authorization': f'Bearer {token["access_token"]}'}
+                ))
+                if response.status == 401 and attempt == 0:
+                    self.token_manager.invalidate(token)
+                    await stack.aclose()
+                    continue
+                if response.status >= 400:
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    if response.status in OVERLOAD_STATUSES:
+                        slot.mark_overloaded(retry_after)
+                    raise GraphQLHTTPError(response.status, response.reason, retry_after)
+                return stack, response, slot
+            except BaseException as e:
+                await stack.__aexit__(type(e), e, e.__traceback__)
+                raise
+
+    async def stream_items(
+        self,
+        query: str,
+        items_path: str,
+        variables: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Any]:
+        """Execute a query and yield the items of one list as the body arrives.
+
+        Only one item is decoded and held in memory at a time, so records can
+        be consumed while the response is still being received.
+
+        Args:
+            query: GraphQL query string
+            items_path: Dotted path to the list, e.g. data.organisationAthletes.athletes
+            variables: Query variables
+
+        Yields:
+            List items in order
+
+        Raises:
+            GraphQLHTTPError: If the server responds with an HTTP error
+            TransportQueryError: If the response contains GraphQL errors
+        """
+        self._validate(query)
+        payload = {"query": persist_query(query)[0], "variables": variables or {}}
+        stack, response, slot = await self.retrier.call_async(self._open_stream, payload)
+        async with stack:
+            async for item in aiter_items(response.content, items_path):
+                # Time the consumer spends on an item is not upstream latency
+                yielded = time.monotonic()
+                yield item
+                slot.exclude(time.monotonic() - yielded)
+
+    def _slot(self) -> Any:
+        """Get an admission slot from the concurrency controller, if any."""
+        if self.concurrency is None:
+            return nullcontext(ConcurrencySlot(0))
+        return self.concurrency.slot()
+
+    def _validate(self, query: str) -> None:
+        """Validate a query against the cached schema, once per distinct query.
+
+        Args:
+            query: GraphQL query string
+
+        Raises:
+            GraphQLError: If the query is invalid for the cached schema
+        """
+        if self.schema_cache is None or query in self._validated_queries:
+            return
+        if self._schema is None:
+            self._schema = self.schema_cache.load_schema(self.graphql_url)
+            if self._schema is None:
+                return
+
+        errors = validate(self._schema, parse(query))
+        if errors:
+            raise errors[0]
+        self._validated_queries.add(query)
+
+    async def execute_query(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Execute GraphQL query with authentication.
+
+        Args:
+            query: GraphQL query string
+            variables: Query variables
+
+        Returns:
+            Query response
+
+        Raises:
+            GraphQLError: If the query is invalid for the cached schema
+            TransportQueryError: If the response contains GraphQL errors
+            Exception: If query execution fails
+        """
+        try:
+            key = ResponseCache.make_key(self.graphql_url, query, variables)
+            fetch = lambda: self.single_flight.do_async(key, lambda: self._fetch_query(query, variables))
+            if self.response_cache is not None:
+                return await self.response_cache.get_or_fetch_async(self.graphql_url, query, variables, fetch)
+            return await fetch()
+
+        except Exception as e:
+            logger.error(f"Failed to execute query: {str(e)}")
+            raise
+
+    async def _fetch_query(self, query: str, variables: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Execute a query against the endpoint, bypassing the response cache.
+
+        Queries over the planner's cost budget are split into several
+        requests which are sent concurrently and merged.
+
+        Args:
+            query: GraphQL query string
+            variables: Query variables
+
+        Returns:
+            Query response
+        """
+        if self.query_planner is None:
+            return await self._fetch_single(query, variables)
+        self._validate(query)
+        plan = self.query_planner.plan(query, variables, schema=self._schema)
+        results = await asyncio.gather(*[self._fetch_single(q, v) for q, v in plan.parts])
+        return self.query_planner.merge(plan, list(results))
+
+    async def _fetch_single(self, query: str, variables: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Execute a query in a single request.
+
+        Args:
+            query: GraphQL query string
+            variables: Query variables
+
+        Returns:
+            Query response
+
+        Raises:
+            TransportQueryError: If the response contains GraphQL errors
+        """
+        self._validate(query)
+        result = await self._send(query, variables or {})
+
+        if result.get("errors"):
+            raise TransportQueryError(
+                str(result["errors"][0]), errors=result["errors"], data=result.get("data")
+            )
+
+        return {"data": result.get("data")}
+
+    async def execute_batch(
+        self,
+        query: str,
+        variable_sets: List[Dict[str, Any]],
+        max_batch_size: int = 20,
+        max_complexity: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Execute one query for many variable sets in as few requests as possible.
+
+        Copies of the query are merged into aliased documents of up to
+        max_batch_size copies, or fewer if max_complexity would be exceeded.
+        The merged requests are sent concurrently.
+
+        Args:
+            query: GraphQL query string containing a single operation
+            variable_sets: Variables for every execution of the query
+            max_batch_size: Maximum number of variable sets per request
+            max_complexity: Optional maximum number of fields per request
+
+        Returns:
+            One response per variable set, in order. Responses carry an
+            ``errors`` list when the server reported errors for them.
+
+        Raises:
+            ValueError: If the query cannot be batched
+            Exception: If a request fails
+        """
+        batcher = QueryBatcher(query, max_batch_size=max_batch_size, max_complexity=max_complexity)
+
+        async def run(chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            document, variables = batcher.build(chunk)
+            self._validate(document)
+            result = await self._send(document, variables)
+            return batcher.split(result.get("data"), result.get("errors"), len(chunk))
+
+        try:
+            chunks = batcher.chunks(variable_sets)
+            responses = await asyncio.gather(*[run(chunk) for chunk in chunks])
+            logger.info(f"Executed {len(variable_sets)} queries in {len(chunks)} requests")
+            return [result for response in responses for result in response]
+
+        except Exception as e:
+            logger.error(f"Failed to execute batch: {str(e)}")
+            raise
+
+    def iter_connection(
+        self,
+        query: str,
+        connection_path: str,
+        variables: Optional[Dict[str, Any]] = None,
+        cursor_variable: str = "after"
+    ) -> AsyncIterator[Any]:
+        """Stream the nodes of a Relay-style cursor connection.
+
+        The next page is prefetched while the caller processes the current one.
+
+        Args:
+            query: GraphQL query string accepting the cursor variable
+            connection_path: Dotted path to the connection, e.g. data.organisation.athletes
+            variables: Query variables
+            cursor_variable: Name of the query variable holding the cursor
+
+        Returns:
+            Async iterator over connection nodes
+        """
+        paginator = CursorPaginator(self, connection_path, cursor_variable=cursor_variable)
+        return paginator.iter_nodes(query, variables)
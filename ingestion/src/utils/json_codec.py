@@ -0,0 +1,84 @@
+"""JSON encoding shared by the client, sinks and explorer.
+
+Uses orjson when it is installed and the standard library otherwise. Output
+is compact UTF-8 bytes unless pretty printing is requested, either per call
+or for the whole process with ``JSON_PRETTY=1``.
+"""
+
+import os
+import json
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, BinaryIO, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def _default(value: Any) -> Any:
+    """Encode types the JSON libraries do not handle natively."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _pretty(pretty: Optional[bool]) -> bool:
+    """Resolve the pretty printing setting."""
+    if pretty is None:
+        return os.environ.get('JSON_PRETTY', '').lower() in ('1', 'true', 'yes')
+    return pretty
+
+
+def dumps(data: Any, pretty: Optional[bool] = None) -> bytes:
+    """Encode data as JSON.
+
+    Args:
+        data: Data to encode
+        pretty: Indent the output; defaults to the JSON_PRETTY environment variable
+
+    Returns:
+        UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if _pretty(pretty):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_default, option=option)
+
+    if _pretty(pretty):
+        return json.dumps(data, indent=2, ensure_ascii=False, default=_default).encode('utf-8')
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=_default).encode('utf-8')
+
+
+def dump(data: Any, file: BinaryIO, pretty: Optional[bool] = None) -> None:
+    """Encode data as JSON into a binary file.
+
+    Args:
+        data: Data to encode
+        file: File opened in binary mode
+        pretty: Indent the output; defaults to the JSON_PRETTY environment variable
+    """
+    file.write(dumps(data, pretty=pretty))
+
+
+def loads(data: Union[bytes, bytearray, str]) -> Any:
+    """Decode JSON.
+
+    Args:
+        data: JSON document
+
+    Returns:
+        Decoded data
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
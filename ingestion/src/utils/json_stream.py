@@ -0,0 +1,130 @@
+"""Incremental decoding of list items from streamed GraphQL responses."""
+
+import logging
+from typing import Any, AsyncIterator, BinaryIO, Iterator, Optional, Tuple
+
+import ijson
+from gql.transport.exceptions import TransportQueryError
+
+logger = logging.getLogger(__name__)
+
+_START_EVENTS = ("start_map", "start_array")
+_END_EVENTS = ("end_map", "end_array")
+_NOTHING = object()
+
+
+class _ValueBuilder:
+    """Builds one JSON value from parser events."""
+
+    def __init__(self):
+        self._builder = ijson.ObjectBuilder()
+        self._depth = 0
+
+    def feed(self, event: str, value: Any) -> Tuple[bool, Any]:
+        """Feed an event, returning (True, value) once the value is complete."""
+        self._builder.event(event, value)
+        if event in _START_EVENTS:
+            self._depth += 1
+        elif event in _END_EVENTS:
+            self._depth -= 1
+        if self._depth == 0:
+            return True, self._builder.value
+        return False, None
+
+
+class StreamingItemDecoder:
+    """Picks list items and errors out of a stream of ijson parser events.
+
+    Items at ``items_path`` are returned as soon as their closing bracket is
+    parsed, so only one item is held in memory at a time. The ``errors``
+    array is collected and raised as TransportQueryError once complete.
+    """
+
+    def __init__(self, items_path: str):
+        """Initialize the decoder.
+
+        Args:
+            items_path: Dotted path to the list, e.g. data.organisationAthletes.athletes
+        """
+        self.items_path = items_path
+        self._item_prefix = f"{items_path}.item"
+        self._item: Optional[_ValueBuilder] = None
+        self._errors: Optional[_ValueBuilder] = None
+        self.items_seen = 0
+
+    def feed(self, prefix: str, event: str, value: Any) -> Any:
+        """Feed one parser event.
+
+        Args:
+            prefix: ijson prefix of the event
+            event: ijson event name
+            value: ijson event value
+
+        Returns:
+            A completed item, or the module's _NOTHING sentinel
+
+        Raises:
+            TransportQueryError: If the response contains GraphQL errors
+        """
+        if self._errors is None and prefix == "errors" and event == "start_array":
+            self._errors = _ValueBuilder()
+        if self._errors is not None:
+            done, errors = self._errors.feed(event, value)
+            if done:
+                self._errors = None
+                if errors:
+                    raise TransportQueryError(str(errors[0]), errors=errors)
+            return _NOTHING
+
+        if self._item is None:
+            if prefix != self._item_prefix:
+                return _NOTHING
+            self._item = _ValueBuilder()
+        done, item = self._item.feed(event, value)
+        if not done:
+            return _NOTHING
+        self._item = None
+        self.items_seen += 1
+        return item
+
+
+def iter_items(stream: BinaryIO, items_path: str) -> Iterator[Any]:
+    """Yield the items of a list in a JSON response while it is read.
+
+    Args:
+        stream: Binary file-like object with the response body
+        items_path: Dotted path to the list
+
+    Yields:
+        List items in order
+
+    Raises:
+        TransportQueryError: If the response contains GraphQL errors
+    """
+    decoder = StreamingItemDecoder(items_path)
+    for prefix, event, value in ijson.parse(stream, use_float=True):
+        item = decoder.feed(prefix, event, value)
+        if item is not _NOTHING:
+            yield item
+    logger.debug(f"Decoded {decoder.items_seen} items from {items_path}")
+
+
+async def aiter_items(stream: Any, items_path: str) -> AsyncIterator[Any]:
+    """Yield the items of a list in a JSON response while it is received.
+
+    Args:
+        stream: Object with an async ``read(n)`` method, e.g. aiohttp's response.content
+        items_path: Dotted path to the list
+
+    Yields:
+        List items in order
+
+    Raises:
+        TransportQueryError: If the response contains GraphQL errors
+    """
+    decoder = StreamingItemDecoder(items_path)
+    async for prefix, event, value in ijson.parse_async(stream, use_float=True):
+        item = decoder.feed(prefix, event, value)
+        if item is not _NOTHING:
+            yield item
+    logger.debug(f"Decoded {decoder.items_seen} items from {items_path}")
@@ -0,0 +1,326 @@
+"""Pagination engines for GraphQL queries."""
+
+import math
+import asyncio
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+def get_path(data: Any, path: str, default: Any = None) -> Any:
+    """Resolve a dotted path such as ``data.organisationAthletes.totalCount``.
+
+    Args:
+        data: Nested dictionary to traverse
+        path: Dot separated list of keys
+        default: Value returned when any key along the path is missing
+
+    Returns:
+        Value found at the path, or default
+    """
+    current = data
+    for key in path.split('.'):
+        if not isinstance(current, dict) or current.get(key) is None:
+            return default
+        current = current[key]
+    return current
+
+
+def replace_path(data: Dict[str, Any], path: str, value: Any) -> Dict[str, Any]:
+    """Copy a nested dictionary with the value at a dotted path replaced.
+
+    Only the dictionaries along the path are copied, the original is left
+    untouched.
+
+    Args:
+        data: Nested dictionary
+        path: Dot separated list of keys
+        value: New value at the path
+
+    Returns:
+        Copy of data with the value replaced
+    """
+    key, _, rest = path.partition('.')
+    copied = dict(data)
+    if rest:
+        child = copied.get(key)
+        copied[key] = replace_path(child if isinstance(child, dict) else {}, rest, value)
+    else:
+        copied[key] = value
+    return copied
+
+
+def get_all(data: Any, path: str) -> List[Any]:
+    """Resolve a dotted path, flattening every list along the way.
+
+    ``data.accounts.athletes`` yields the athletes of every account.
+
+    Args:
+        data: Nested dictionaries and lists to traverse
+        path: Dot separated list of keys
+
+    Returns:
+        Non-null values found at the path
+    """
+    values = [data]
+    for key in path.split('.'):
+        next_values = []
+        for value in values:
+            for item in value if isinstance(value, list) else [value]:
+                if isinstance(item, dict):
+                    next_values.append(item.get(key))
+        values = next_values
+    flattened = []
+    for value in values:
+        flattened.extend(value if isinstance(value, list) else [value])
+    return [v for v in flattened if v is not None]
+
+
+def connection_nodes(connection: Dict[str, Any]) -> List[Any]:
+    """Extract the nodes of a Relay connection.
+
+    Args:
+        connection: Connection object with either ``nodes`` or ``edges { node }``
+
+    Returns:
+        List of nodes in connection order
+    """
+    if connection.get('nodes') is not None:
+        return connection['nodes']
+    return [edge['node'] for edge in connection.get('edges') or []]
+
+
+def connection_next_cursor(connection: Dict[str, Any]) -> Optional[str]:
+    """Get the cursor of the next page of a Relay connection.
+
+    Args:
+        connection: Connection object with ``pageInfo { hasNextPage endCursor }``
+
+    Returns:
+        End cursor if there is a next page, otherwise None
+    """
+    page_info = connection.get('pageInfo') or {}
+    if page_info.get('hasNextPage'):
+        return page_info.get('endCursor')
+    return None
+
+
+class PagePaginator:
+    """Fetches every page of a ``page``/``per`` paginated query.
+
+    The first page is fetched on its own to learn the total record count.
+    The remaining pages are then fetched concurrently through a sliding
+    window of at most ``max_concurrency`` requests and yielded in page order,
+    so at most ``max_concurrency`` pages are ever buffered.
+
+    Example:
+        paginator = PagePaginator(client, total_count_path="data.organisationAthletes.totalCount")
+        async for page in paginator.iter_pages(query, {"id": 78, "page": 1, "per": 100}):
+            ...
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        total_count_path: str,
+        page_variable: str = "page",
+        per_variable: str = "per",
+        max_concurrency: int = 5
+    ):
+        """Initialize the paginator.
+
+        Args:
+            client: Client exposing ``await execute_query(query, variables)``
+            total_count_path: Dotted path to the total record count in a page response
+            page_variable: Name of the query variable holding the page number
+            per_variable: Name of the query variable holding the page size
+            max_concurrency: Maximum number of pages fetched at the same time
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be positive")
+        self.client = client
+        self.total_count_path = total_count_path
+        self.page_variable = page_variable
+        self.per_variable = per_variable
+        self.max_concurrency = max_concurrency
+
+    def page_count(self, first_page: Dict[str, Any], per: int) -> int:
+        """Compute the number of pages from the first page response.
+
+        Args:
+            first_page: Response of the first page
+            per: Page size
+
+        Returns:
+            Total number of pages (at least 1)
+
+        Raises:
+            ValueError: If the total count cannot be found in the response
+        """
+        total_count = get_path(first_page, self.total_count_path)
+        if total_count is None:
+            raise ValueError(f"Total count not found at path: {self.total_count_path}")
+        return max(1, math.ceil(int(total_count) / per))
+
+    async def _fetch_page(self, query: str, variables: Dict[str, Any], page: int) -> Dict[str, Any]:
+        """Fetch a single page."""
+        return await self.client.execute_query(query, {**variables, self.page_variable: page})
+
+    async def iter_pages(
+        self,
+        query: str,
+        variables: Dict[str, Any],
+        start_page: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Iterate over every page of the query in page order.
+
+        Args:
+            query: GraphQL query string
+            variables: Query variables, must include the page size variable
+            start_page: First page to fetch, defaults to the page variable or 1
+
+        Yields:
+            Page responses in page order
+        """
+        if self.per_variable not in variables:
+            raise ValueError(f"Variables must include page size variable: {self.per_variable}")
+        per = int(variables[self.per_variable])
+        if start_page is None:
+            start_page = int(variables.get(self.page_variable, 1))
+
+        first_page = await self._fetch_page(query, variables, start_page)
+        pages = self.page_count(first_page, per)
+        logger.info(f"Fetching {pages} pages with concurrency {self.max_concurrency}")
+        yield first_page
+
+        remaining = iter(range(start_page + 1, start_page + pages))
+        window: Deque[asyncio.Task] = deque()
+        try:
+            for page in remaining:
+                window.append(asyncio.create_task(self._fetch_page(query, variables, page)))
+                if len(window) >= self.max_concurrency:
+                    break
+            while window:
+                result = await window.popleft()
+                next_page = next(remaining, None)
+                if next_page is not None:
+                    window.append(asyncio.create_task(self._fetch_page(query, variables, next_page)))
+                yield result
+        finally:
+            for task in window:
+                task.cancel()
+
+    async def fetch_pages(
+        self,
+        query: str,
+        variables: Dict[str, Any],
+        pages: Iterable[int],
+        return_exceptions: bool = False
+    ) -> AsyncIterator[Tuple[int, Union[Dict[str, Any], BaseException]]]:
+        """Fetch the given pages concurrently, yielding each as soon as it completes.
+
+        Args:
+            query: GraphQL query string
+            variables: Query variables
+            pages: Page numbers to fetch
+            return_exceptions: Yield a failed page's error instead of raising it,
+                so the remaining pages are still fetched
+
+        Yields:
+            Tuples of page number and response, in completion order
+        """
+        remaining = iter(pages)
+        running: Dict[asyncio.Task, int] = {}
+
+        def start(page: int) -> None:
+            running[asyncio.create_task(self._fetch_page(query, variables, page))] = page
+
+        try:
+            for page in remaining:
+                start(page)
+                if len(running) >= self.max_concurrency:
+                    break
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    page = running.pop(task)
+                    next_page = next(remaining, None)
+                    if next_page is not None:
+                        start(next_page)
+                    if task.exception() is None:
+                        yield page, task.result()
+                    elif return_exceptions:
+                        yield page, task.exception()
+                    else:
+                        raise task.exception()
+        finally:
+            for task in running:
+                task.cancel()
+
+
+class CursorPaginator:
+    """Streams the nodes of a Relay-style cursor connection.
+
+    While the caller is processing the nodes of page N, page N+1 is already
+    being fetched in the background, so network latency overlaps with
+    processing instead of adding to it.
+
+    Example:
+        paginator = CursorPaginator(client, connection_path="data.organisation.athletes")
+        async for node in paginator.iter_nodes(query, {"id": 78, "first": 100}):
+            ...
+    """
+
+    def __init__(self, client: Any, connection_path: str, cursor_variable: str = "after"):
+        """Initialize the paginator.
+
+        Args:
+            client: Client exposing ``await execute_query(query, variables)``
+            connection_path: Dotted path to the connection object in a response
+            cursor_variable: Name of the query variable holding the cursor
+        """
+        self.client = client
+        self.connection_path = connection_path
+        self.cursor_variable = cursor_variable
+
+    def _connection(self, page: Dict[str, Any]) -> Dict[str, Any]:
+        """Get the connection object from a page response."""
+        connection = get_path(page, self.connection_path)
+        if not isinstance(connection, dict):
+            raise ValueError(f"Connection not found at path: {self.connection_path}")
+        return connection
+
+    async def iter_nodes(
+        self,
+        query: str,
+        variables: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Any]:
+        """Iterate over every node of the connection.
+
+        Args:
+            query: GraphQL query string accepting the cursor variable
+            variables: Query variables, the cursor variable may set a starting cursor
+
+        Yields:
+            Connection nodes in order
+        """
+        variables = dict(variables or {})
+        pending = asyncio.create_task(self.client.execute_query(query, variables))
+        try:
+            while pending is not None:
+                connection = self._connection(await pending)
+                pending = None
+
+                cursor = connection_next_cursor(connection)
+                if cursor is not None:
+                    pending = asyncio.create_task(
+                        self.client.execute_query(query, {**variables, self.cursor_variable: cursor})
+                    )
+
+                for node in connection_nodes(connection):
+                    yield node
+        finally:
+            if pending is not None:
+                pending.cancel()
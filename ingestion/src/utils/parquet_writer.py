@@ -0,0 +1,344 @@
+"""Columnar Parquet output for flattened GraphQL records.
+
+Requires pyarrow, installed with the ``parquet`` extra.
+"""
+
+import os
+import logging
+from io import BytesIO
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Tuple, Union
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depends on the environment
+    pa = None
+    pq = None
+
+from ingestion.utils import json_codec
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIONS = ("snappy", "zstd", "gzip", "none")
+
+
+class ParquetSchemaError(ValueError):
+    """Raised when records do not fit the parquet schema of a run."""
+    pass
+
+
+def flatten_record(record: Any, separator: str = ".", prefix: str = "") -> Dict[str, Any]:
+    """Flatten nested objects into one column per leaf.
+
+    ``{"athlete": {"id": 1}}`` becomes ``{"athlete.id": 1}``. Lists are kept
+    in a single column as JSON text, so records with lists of varying shape
+    still share one schema.
+
+    Args:
+        record: Record to flatten; anything other than a dict becomes a ``value`` column
+        separator: Separator between nested keys
+        prefix: Prefix of every column name
+
+    Returns:
+        Flat mapping of column name to value
+    """
+    if not isinstance(record, dict):
+        return {prefix or "value": _scalar(record)}
+    flat = {}
+    for key, value in record.items():
+        name = f"{prefix}{separator}{key}" if prefix else str(key)
+        if isinstance(value, dict) and value:
+            flat.update(flatten_record(value, separator, name))
+        else:
+            flat[name] = _scalar(value)
+    return flat
+
+
+def _scalar(value: Any) -> Any:
+    """Encode lists and empty objects as JSON text."""
+    if isinstance(value, (list, dict)):
+        return json_codec.dumps(value, pretty=False).decode()
+    return value
+
+
+def _value_type(value: Any) -> "pa.DataType":
+    """Arrow type of a single flattened value."""
+    if value is None:
+        return pa.null()
+    if isinstance(value, bool):
+        return pa.bool_()
+    if isinstance(value, int):
+        return pa.int64()
+    if isinstance(value, float):
+        return pa.float64()
+    if isinstance(value, str):
+        return pa.string()
+    return pa.array([value]).type
+
+
+def _widen_type(current: "pa.DataType", incoming: "pa.DataType") -> "pa.DataType":
+    """Narrowest type holding values of both types; int and float give double, other conflicts string."""
+    if current == incoming or pa.types.is_null(incoming):
+        return current
+    if pa.types.is_null(current):
+        return incoming
+    numeric = (pa.types.is_integer, pa.types.is_floating)
+    if any(check(current) for check in numeric) and any(check(incoming) for check in numeric):
+        return pa.int64() if pa.types.is_integer(current) and pa.types.is_integer(incoming) else pa.float64()
+    return pa.string()
+
+
+def infer_schema(records: Iterable[Any]) -> "pa.Schema":
+    """Infer a schema holding every value of the records.
+
+    Integers that meet floats in a column become doubles, other conflicts
+    strings of JSON text, and columns only ever holding nulls strings.
+
+    Args:
+        records: Records, flattened with flatten_record unless already flat
+
+    Returns:
+        Schema of the records
+    """
+    if pa is None:
+        raise ImportError("pyarrow is required for parquet output, install the parquet extra")
+    types: Dict[str, "pa.DataType"] = {}
+    for record in records:
+        row = record if _is_flat(record) else flatten_record(record)
+        for name, value in row.items():
+            types[name] = _widen_type(types.get(name, pa.null()), _value_type(value))
+    return pa.schema([
+        pa.field(name, pa.string() if pa.types.is_null(type_) else type_) for name, type_ in types.items()
+    ])
+
+
+def _is_flat(record: Any) -> bool:
+    """Whether a record is a dict without nested objects or lists."""
+    return isinstance(record, dict) and not any(isinstance(v, (dict, list)) for v in record.values())
+
+
+def _fold(row: Dict[str, Any], schema: Optional["pa.Schema"]) -> Dict[str, Any]:
+    """Keep objects under a string column of the schema whole, as JSON text in that column."""
+    if schema is None:
+        return row
+    for f in schema:
+        if row.get(f.name) is None and pa.types.is_string(f.type):
+            nested = {k[len(f.name) + 1:]: v for k, v in row.items() if k.startswith(f"{f.name}.")}
+            if nested:
+                row = {k: v for k, v in row.items() if not k.startswith(f"{f.name}.")}
+                row[f.name] = json_codec.dumps(nested, pretty=False).decode()
+    return row
+
+
+def _fit(name: str, value: Any, type_: "pa.DataType") -> Any:
+    """Fit a value to the type of its column without losing any of it.
+
+    Raises:
+        ParquetSchemaError: If the column cannot hold the value
+    """
+    if value is None:
+        return None
+    if pa.types.is_string(type_):
+        return value if isinstance(value, str) else json_codec.dumps(value, pretty=False).decode()
+    if pa.types.is_boolean(type_):
+        if isinstance(value, bool):
+            return value
+    elif pa.types.is_integer(type_):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+    elif pa.types.is_floating(type_):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+    else:
+        return value
+    raise ParquetSchemaError(
+        f"Column {name} of the parquet schema is {type_} and cannot hold {value!r}; "
+        f"pass a schema inferred from every record with infer_schema"
+    )
+
+
+class _Output:
+    """File object wrapper that can discard everything written after an abort."""
+
+    def __init__(self, file: BinaryIO):
+        self.file = file
+        self.discarding = False
+
+    @property
+    def closed(self) -> bool:
+        return self.file.closed
+
+    def write(self, data: Any) -> int:
+        if self.discarding:
+            return len(memoryview(data))
+        return self.file.write(data)
+
+    def flush(self) -> None:
+        if not self.discarding:
+            self.file.flush()
+
+    def tell(self) -> int:
+        return self.file.tell()
+
+
+class ParquetRecordWriter:
+    """Writes records to a Parquet file, one row group per ``row_group_size`` records.
+
+    The schema is inferred from the first row group, or given, and every
+    later row group is conformed to it: integers are stored in double
+    columns, values of string columns that are not strings, including
+    objects under a column that was only null when inferred, are stored as
+    JSON text. Values the schema cannot hold without loss, and columns it
+    lacks, raise ParquetSchemaError rather than being truncated or dropped;
+    pass a schema from infer_schema when every record is at hand. Pass the
+    schema to the next writer so every part file of a run shares it.
+
+    Example:
+        with ParquetRecordWriter("athletes.parquet", compression="zstd") as writer:
+            writer.write(records)
+    """
+
+    def __init__(
+        self,
+        where: Union[str, Path, BinaryIO],
+        row_group_size: int = 10000,
+        compression: str = "snappy",
+        schema: Optional["pa.Schema"] = None
+    ):
+        """Initialize the writer.
+
+        Args:
+            where: File path or binary file object
+            row_group_size: Number of records per row group
+            compression: Codec, one of snappy, zstd, gzip or none
+            schema: Schema of the records, inferred from the first row group when None
+
+        Raises:
+            ImportError: If pyarrow is not installed
+            ValueError: If the compression or row group size is invalid
+        """
+        if pa is None:
+            raise ImportError("pyarrow is required for parquet output, install the parquet extra")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unsupported parquet compression: {compression}")
+        if row_group_size < 1:
+            raise ValueError("row_group_size must be positive")
+        self.where = str(where) if isinstance(where, Path) else where
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.schema = schema
+        self.rows_written = 0
+        self._rows: List[Dict[str, Any]] = []
+        self._writer: Optional["pq.ParquetWriter"] = None
+        self._output: Optional[_Output] = None if isinstance(self.where, str) else _Output(self.where)
+
+    def _conform(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Fit a row to the schema.
+
+        Raises:
+            ParquetSchemaError: If the row does not fit the schema
+        """
+        row = _fold(row, self.schema)
+        missing = [name for name, value in row.items() if value is not None and name not in self.schema.names]
+        if missing:
+            raise ParquetSchemaError(
+                f"Columns {', '.join(missing)} are not in the parquet schema; "
+                f"pass a schema inferred from every record with infer_schema"
+            )
+        return {f.name: _fit(f.name, row.get(f.name), f.type) for f in self.schema}
+
+    def _open(self) -> None:
+        """Start the file with the current schema."""
+        self._writer = pq.ParquetWriter(self._output or self.where, self.schema, compression=self.compression)
+
+    def write(self, records: Iterable[Any]) -> None:
+        """Add records, writing a row group whenever one is full.
+
+        Args:
+            records: Records to write, flattened with flatten_record
+        """
+        for record in records:
+            self._rows.append(flatten_record(record))
+            if len(self._rows) >= self.row_group_size:
+                self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered records as a row group."""
+        if not self._rows:
+            return
+        rows, self._rows = self._rows, []
+        if self.schema is None:
+            self.schema = infer_schema(rows)
+        try:
+            batch = pa.RecordBatch.from_pylist([self._conform(row) for row in rows], schema=self.schema)
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            raise ParquetSchemaError(f"Records do not fit the parquet schema: {str(e)}") from e
+        if self._writer is None:
+            self._open()
+        self._writer.write_batch(batch, row_group_size=self.row_group_size)
+        self.rows_written += len(rows)
+
+    def close(self) -> None:
+        """Write the remaining records and the file footer."""
+        self.flush()
+        if self._writer is None:
+            self.schema = self.schema or pa.schema([])
+            self._open()
+        self._writer.close()
+
+    def abort(self) -> None:
+        """Stop writing without a footer, so a failed run never looks like a complete file.
+
+        A file the writer created is removed; nothing more is written to a
+        file object.
+        """
+        self._rows = []
+        if self._writer is None:
+            return
+        if self._output is not None:
+            self._output.discarding = True
+        self._writer.close()
+        self._writer = None
+        if self._output is None:
+            os.remove(self.where)
+
+    def __enter__(self) -> "ParquetRecordWriter":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+def to_parquet_bytes(
+    records: Iterable[Any],
+    row_group_size: int = 10000,
+    compression: str = "snappy",
+    schema: Optional["pa.Schema"] = None
+) -> Tuple[bytes, "pa.Schema"]:
+    """Encode records as an in-memory Parquet file.
+
+    Args:
+        records: Records to encode
+        row_group_size: Number of records per row group
+        compression: Codec, one of snappy, zstd, gzip or none
+        schema: Schema of earlier parts of the run, inferred from the records when None
+
+    Returns:
+        Tuple of the file contents and the schema used
+
+    Raises:
+        ParquetSchemaError: If the records do not fit the schema
+    """
+    records = list(records)
+    buffer = BytesIO()
+    if schema is None:
+        schema = infer_schema(records)
+    with ParquetRecordWriter(buffer, row_group_size=row_group_size, compression=compression, schema=schema) as writer:
+        writer.write(records)
+    return buffer.getvalue(), writer.schema
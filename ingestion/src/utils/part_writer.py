@@ -0,0 +1,181 @@
+"""Batched writing of record streams to a sink as numbered part files."""
+
+import asyncio
+import logging
+from typing import Any, Iterable, List, Optional, Set, Tuple
+
+from ingestion.utils.ndjson_writer import ndjson_suffix, to_ndjson_bytes
+from ingestion.utils.parquet_writer import to_parquet_bytes
+from ingestion.utils.sinks import DataSink
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("json", "ndjson", "parquet")
+
+
+def part_extension(format: str, compression: Optional[str] = None) -> str:
+    """Get the file extension of a part file.
+
+    Args:
+        format: Format of the part, json, ndjson or parquet
+        compression: Codec of the part
+
+    Returns:
+        Extension such as ``.parquet`` or ``.ndjson.gz``
+    """
+    return ndjson_suffix(compression) if format == "ndjson" else f".{format}"
+
+
+def encode_part(
+    records: List[Any],
+    format: str,
+    compression: Optional[str] = None,
+    row_group_size: int = 10000,
+    schema: Optional[Any] = None,
+    compression_level: Optional[int] = None
+) -> Tuple[Any, Optional[Any]]:
+    """Encode a batch of records as the contents of a part file.
+
+    Args:
+        records: Records of the part
+        format: Format of the part, json, ndjson or parquet
+        compression: Codec, gzip or zstd for ndjson and snappy (default) or zstd for parquet
+        row_group_size: Records per Parquet row group
+        schema: Parquet schema of earlier parts, inferred when None
+        compression_level: Level of ndjson compression, the writer's default when None
+
+    Returns:
+        Tuple of the data to hand to the sink and the Parquet schema, if any
+    """
+    if format == "parquet":
+        return to_parquet_bytes(
+            records, row_group_size=row_group_size, compression=compression or "snappy", schema=schema
+        )
+    if format == "ndjson":
+        return to_ndjson_bytes(records, compression=compression, level=compression_level), schema
+    return records, schema
+
+
+class PartWriter:
+    """Buffers records and writes every full batch to a sink as a part file.
+
+    At most ``batch_size`` records are buffered and at most ``max_pending``
+    batches are being written at any time; ``write`` waits for a write to
+    finish before starting another, so memory is bounded by the batch size
+    rather than by the size of the dataset.
+
+    Parts are JSON lists of records, compressed newline-delimited JSON, or
+    Parquet files sharing one schema, given or inferred from the first part;
+    a later part that does not fit it raises ParquetSchemaError. Parts are
+    encoded and compressed on a worker thread, so fetches keep running.
+
+    Example:
+        writer = PartWriter(sink, batch_size=1000)
+        async for page in paginator.iter_pages(query, variables):
+            await writer.write(get_path(page, items_path, []))
+        keys = await writer.close()
+    """
+
+    def __init__(
+        self,
+        sink: DataSink,
+        prefix: str = "",
+        batch_size: int = 1000,
+        max_pending: int = 2,
+        format: str = "json",
+        compression: Optional[str] = None,
+        row_group_size: int = 10000,
+        schema: Optional[Any] = None,
+        compression_level: Optional[int] = None
+    ):
+        """Initialize the writer.
+
+        Args:
+            sink: Sink receiving the part files
+            prefix: Key prefix of the part files
+            batch_size: Number of records per part file
+            max_pending: Maximum number of part files being written concurrently
+            format: Format of the part files, json, ndjson or parquet
+            compression: Codec, gzip or zstd for ndjson and snappy (default) or zstd for parquet
+            row_group_size: Records per Parquet row group
+            schema: Parquet schema of every part, inferred from the first part when None
+            compression_level: Level of ndjson compression, the writer's default when None
+        """
+        if batch_size < 1 or max_pending < 1:
+            raise ValueError("batch_size and max_pending must be positive")
+        if format not in FORMATS:
+            raise ValueError(f"Unsupported format: {format}")
+        self.sink = sink
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.format = format
+        self.compression = compression
+        self.extension = part_extension(format, compression)
+        self.row_group_size = row_group_size
+        self.schema = schema
+        self.compression_level = compression_level
+        self.keys: List[str] = []
+        self.records_written = 0
+        self._buffer: List[Any] = []
+        self._pending: Set[asyncio.Task] = set()
+
+    def part_key(self, index: int) -> str:
+        """Build the key of a part file.
+
+        Args:
+            index: One-based part number
+
+        Returns:
+            Key of the part file
+        """
+        name = f"part-{index:05d}{self.extension}"
+        return f"{self.prefix.rstrip('/')}/{name}" if self.prefix else name
+
+    async def write(self, records: Iterable[Any]) -> None:
+        """Add records, writing a part file whenever a batch is full.
+
+        Args:
+            records: Records to write
+        """
+        for record in records:
+            self._buffer.append(record)
+            if len(self._buffer) >= self.batch_size:
+                await self.flush()
+
+    async def _wait(self, limit: int) -> None:
+        """Wait until at most limit writes are pending, raising the first write error."""
+        while len(self._pending) > limit:
+            done, self._pending = await asyncio.wait(self._pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+
+    async def flush(self) -> None:
+        """Write the buffered records as a part file."""
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        await self._wait(self.max_pending - 1)
+        data, self.schema = await asyncio.to_thread(
+            encode_part, batch, self.format, self.compression, self.row_group_size, self.schema,
+            self.compression_level
+        )
+        key = self.part_key(len(self.keys) + 1)
+        self.keys.append(key)
+        self.records_written += len(batch)
+        self._pending.add(asyncio.create_task(self.sink.write(data, key)))
+
+    async def close(self) -> List[str]:
+        """Write the remaining records and wait for every write to finish.
+
+        Returns:
+            Keys of every part file written
+        """
+        try:
+            await self.flush()
+            await self._wait(0)
+        finally:
+            for task in self._pending:
+                task.cancel()
+        logger.info(f"Wrote {self.records_written} records to {len(self.keys)} part files")
+        return self.keys
@@ -0,0 +1,305 @@
+"""Hive-style partitioned output with size-based rolling of part files."""
+
+import asyncio
+import logging
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import quote
+
+from ingestion.utils import json_codec
+from ingestion.utils.pagination import get_path
+from ingestion.utils.part_writer import FORMATS, encode_part, part_extension
+from ingestion.utils.sinks import DataSink
+
+logger = logging.getLogger(__name__)
+
+# Directory value Hive, Spark and Athena use for null partition values
+DEFAULT_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+
+def partition_value(value: Any) -> str:
+    """Format a value as a partition directory value.
+
+    Args:
+        value: Raw value from a record
+
+    Returns:
+        Escaped value, safe to use as one path segment
+    """
+    if value is None or value == "":
+        return DEFAULT_PARTITION
+    if isinstance(value, bool):
+        value = str(value).lower()
+    return quote(str(value), safe="")
+
+
+def partition_date(value: Any) -> Optional[str]:
+    """Get the YYYY-MM-DD date of a record's date or timestamp value.
+
+    Args:
+        value: Date, datetime, ISO 8601 string or epoch seconds
+
+    Returns:
+        Date string, None when the value is missing or not a date
+    """
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return datetime.fromtimestamp(value, tz=timezone.utc).date().isoformat()
+    if isinstance(value, str):
+        try:
+            return date.fromisoformat(value[:10]).isoformat()
+        except ValueError:
+            return None
+    return None
+
+
+@dataclass
+class PartInfo:
+    """A part file written to a partition."""
+    key: str
+    partition: Dict[str, str]
+    records: int
+    bytes: int
+
+
+@dataclass
+class _Partition:
+    """Records buffered for one partition."""
+    values: Dict[str, str]
+    records: List[Any] = field(default_factory=list)
+    size: int = 0
+    parts: int = 0
+
+
+class PartitionedWriter:
+    """Writes records under ``entity=<entity>/dt=<date>/<column>=<value>/`` keys.
+
+    Each partition buffers its records and rolls to a new part file once it
+    holds ``max_rows`` records or about ``max_bytes`` of encoded output. The
+    size of a record is taken from its JSON encoding and scaled by the ratio
+    of encoded to JSON size of the parts written so far, so compressed and
+    Parquet parts land close to the target. When the buffers of every
+    partition together exceed ``max_buffered_bytes`` the largest is written
+    early, bounding memory however many partitions a run touches.
+
+    Every Parquet part of a run, whatever its partition, shares one schema,
+    given or inferred from the first part written; a part that does not fit
+    it raises ParquetSchemaError. Parts are encoded on a worker thread to
+    keep the event loop free.
+
+    Part files are named ``part-<n>-<run_id>``, so runs writing to the same
+    partition never overwrite each other. Once every part is written, a
+    manifest listing them is written to ``entity=<entity>/_manifests/<run_id>.json``;
+    engines skip underscore-prefixed paths, and a run without a manifest did
+    not finish.
+
+    Example:
+        writer = PartitionedWriter(sink, "athletes", partition_by={"org_id": "organisation.id"})
+        async for page in paginator.iter_pages(query, variables):
+            await writer.write(get_path(page, items_path, []))
+        keys = await writer.close()
+    """
+
+    def __init__(
+        self,
+        sink: DataSink,
+        entity: str,
+        partition_by: Optional[Dict[str, str]] = None,
+        date_field: Optional[str] = None,
+        run_date: Optional[date] = None,
+        format: str = "parquet",
+        compression: Optional[str] = None,
+        row_group_size: int = 10000,
+        max_rows: int = 100000,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_buffered_bytes: Optional[int] = None,
+        max_pending: int = 2,
+        run_id: Optional[str] = None,
+        schema: Optional[Any] = None,
+        compression_level: Optional[int] = None
+    ):
+        """Initialize the writer.
+
+        Args:
+            sink: Sink receiving the part files and the manifest
+            entity: Name of the entity, the first partition level
+            partition_by: Partition column name to dotted path of its value in a record
+            date_field: Dotted path to the date or timestamp of a record used for dt,
+                the run date is used when None or when a record has no date
+            run_date: Date of the run, today in UTC when None
+            format: Format of the part files, json, ndjson or parquet
+            compression: Codec, gzip or zstd for ndjson and snappy (default) or zstd for parquet
+            row_group_size: Records per Parquet row group
+            max_rows: Maximum records per part file
+            max_bytes: Target size of a part file in bytes
+            max_buffered_bytes: Maximum bytes buffered across partitions, twice max_bytes when None
+            max_pending: Maximum number of part files being written concurrently
+            run_id: Identifier of the run in part and manifest names, random when None
+            schema: Parquet schema of every part, inferred from the first part when None
+            compression_level: Level of ndjson compression, the writer's default when None
+
+        Raises:
+            ValueError: If a limit is not positive, the format is unsupported or a column is reserved
+        """
+        if min(max_rows, max_bytes, max_pending) < 1:
+            raise ValueError("max_rows, max_bytes and max_pending must be positive")
+        if format not in FORMATS:
+            raise ValueError(f"Unsupported format: {format}")
+        partition_by = partition_by or {}
+        if {"entity", "dt"} & partition_by.keys():
+            raise ValueError("entity and dt are reserved partition columns")
+        self.sink = sink
+        self.entity = entity
+        self.partition_by = partition_by
+        self.date_field = date_field
+        self.run_date = (run_date or datetime.now(timezone.utc).date()).isoformat()
+        self.format = format
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.max_buffered_bytes = max_buffered_bytes or 2 * max_bytes
+        self.max_pending = max_pending
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.extension = part_extension(format, compression)
+        self.schema = schema
+        self.compression_level = compression_level
+        self.parts: List[PartInfo] = []
+        self.records_written = 0
+        self._partitions: Dict[Tuple[str, ...], _Partition] = {}
+        self._buffered = 0
+        self._json_bytes = 0
+        self._encoded_bytes = 0
+        self._pending: Set[asyncio.Task] = set()
+
+    @property
+    def manifest_key(self) -> str:
+        """Key of the run's manifest."""
+        return f"entity={partition_value(self.entity)}/_manifests/{self.run_id}.json"
+
+    def partition_of(self, record: Any) -> Dict[str, str]:
+        """Get the partition values of a record.
+
+        Args:
+            record: Record to place
+
+        Returns:
+            Ordered mapping of partition column to directory value
+        """
+        dt = partition_date(get_path(record, self.date_field)) if self.date_field else None
+        values = {"entity": partition_value(self.entity), "dt": dt or self.run_date}
+        for column, path in self.partition_by.items():
+            values[column] = partition_value(get_path(record, path))
+        return values
+
+    def part_key(self, values: Dict[str, str], index: int) -> str:
+        """Build the key of a part file.
+
+        Args:
+            values: Partition values
+            index: One-based part number within the partition
+
+        Returns:
+            Key of the part file
+        """
+        directory = "/".join(f"{column}={value}" for column, value in values.items())
+        return f"{directory}/part-{index:05d}-{self.run_id}{self.extension}"
+
+    def _ratio(self) -> float:
+        """Ratio of encoded to JSON size of the parts written so far."""
+        return self._encoded_bytes / self._json_bytes if self._json_bytes else 1.0
+
+    async def write(self, records: Iterable[Any]) -> None:
+        """Add records to their partitions, writing every full part file.
+
+        Args:
+            records: Records to write
+        """
+        for record in records:
+            values = self.partition_of(record)
+            partition = self._partitions.get(tuple(values.values()))
+            if partition is None:
+                partition = self._partitions[tuple(values.values())] = _Partition(values)
+            size = len(json_codec.dumps(record, pretty=False))
+            partition.records.append(record)
+            partition.size += size
+            self._buffered += size
+            if len(partition.records) >= self.max_rows or partition.size * self._ratio() >= self.max_bytes:
+                await self._flush(partition)
+            elif self._buffered * self._ratio() >= self.max_buffered_bytes:
+                await self._flush(max(self._partitions.values(), key=lambda p: p.size))
+
+    async def _wait(self, limit: int) -> None:
+        """Wait until at most limit writes are pending, raising the first write error."""
+        while len(self._pending) > limit:
+            done, self._pending = await asyncio.wait(self._pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+
+    async def _flush(self, partition: _Partition) -> None:
+        """Write the buffered records of a partition as a part file."""
+        if not partition.records:
+            return
+        batch, json_size = partition.records, partition.size
+        partition.records, partition.size = [], 0
+        self._buffered -= json_size
+        await self._wait(self.max_pending - 1)
+        data, self.schema = await asyncio.to_thread(
+            encode_part, batch, self.format, self.compression, self.row_group_size, self.schema,
+            self.compression_level
+        )
+        if not isinstance(data, bytes):
+            data = json_codec.dumps(data)
+        partition.parts += 1
+        key = self.part_key(partition.values, partition.parts)
+        self.parts.append(PartInfo(key, partition.values, len(batch), len(data)))
+        self.records_written += len(batch)
+        self._json_bytes += json_size
+        self._encoded_bytes += len(data)
+        self._pending.add(asyncio.create_task(self.sink.write(data, key)))
+
+    async def flush(self) -> None:
+        """Write the buffered records of every partition."""
+        for partition in list(self._partitions.values()):
+            await self._flush(partition)
+
+    def manifest(self) -> Dict[str, Any]:
+        """Describe the run's part files.
+
+        Returns:
+            JSON serializable manifest
+        """
+        return {
+            "run_id": self.run_id,
+            "entity": self.entity,
+            "format": self.format,
+            "compression": self.compression,
+            "partition_columns": ["entity", "dt", *self.partition_by],
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "records": self.records_written,
+            "parts": [asdict(part) for part in self.parts]
+        }
+
+    async def close(self) -> List[str]:
+        """Write the remaining records, wait for every write and write the manifest.
+
+        Returns:
+            Keys of every part file written
+        """
+        try:
+            await self.flush()
+            await self._wait(0)
+        finally:
+            for task in self._pending:
+                task.cancel()
+        await self.sink.write(self.manifest(), self.manifest_key)
+        logger.info(
+            f"Wrote {self.records_written} records to {len(self.parts)} part files "
+            f"in {len(self._partitions)} partitions, manifest {self.manifest_key}"
+        )
+        return [part.key for part in self.parts]
@@ -0,0 +1,93 @@
+"""Automatic persisted query (APQ) helpers."""
+
+import hashlib
+import logging
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from graphql import DocumentNode, FragmentDefinitionNode, parse, print_ast, strip_ignored_characters
+
+logger = logging.getLogger(__name__)
+
+APQ_VERSION = 1
+
+# Error codes returned by servers implementing APQ
+PERSISTED_QUERY_NOT_FOUND = "PERSISTED_QUERY_NOT_FOUND"
+PERSISTED_QUERY_NOT_SUPPORTED = "PERSISTED_QUERY_NOT_SUPPORTED"
+
+_ERROR_MESSAGES = {
+    "PersistedQueryNotFound": PERSISTED_QUERY_NOT_FOUND,
+    "PersistedQueryNotSupported": PERSISTED_QUERY_NOT_SUPPORTED,
+}
+
+
+def minify_query(query: str) -> str:
+    """Minify a query and drop repeated fragment definitions.
+
+    Args:
+        query: GraphQL query string
+
+    Returns:
+        Query text without insignificant whitespace, comments or duplicate fragments
+
+    Raises:
+        ValueError: If two different fragments share a name
+    """
+    document = parse(query)
+    definitions = []
+    fragments: Dict[str, str] = {}
+    for definition in document.definitions:
+        if isinstance(definition, FragmentDefinitionNode):
+            name = definition.name.value
+            printed = print_ast(definition)
+            if name in fragments:
+                if fragments[name] != printed:
+                    raise ValueError(f"Conflicting definitions for fragment {name}")
+                continue
+            fragments[name] = printed
+        definitions.append(definition)
+    return strip_ignored_characters(print_ast(DocumentNode(definitions=tuple(definitions))))
+
+
+@lru_cache(maxsize=256)
+def persist_query(query: str) -> Tuple[str, str]:
+    """Minify a query and compute its APQ hash.
+
+    Args:
+        query: GraphQL query string
+
+    Returns:
+        Tuple of the minified query and its sha256 hex digest
+    """
+    text = minify_query(query)
+    return text, hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def persisted_query_extensions(query_hash: str) -> Dict[str, Any]:
+    """Build the request extensions referencing a persisted query.
+
+    Args:
+        query_hash: sha256 hex digest of the minified query
+
+    Returns:
+        Extensions object for the request body
+    """
+    return {"persistedQuery": {"version": APQ_VERSION, "sha256Hash": query_hash}}
+
+
+def persisted_query_error(errors: Optional[List[Dict[str, Any]]]) -> Optional[str]:
+    """Find an APQ error in a GraphQL response.
+
+    Args:
+        errors: Response errors
+
+    Returns:
+        PERSISTED_QUERY_NOT_FOUND, PERSISTED_QUERY_NOT_SUPPORTED or None
+    """
+    for error in errors or []:
+        code = (error.get("extensions") or {}).get("code")
+        if code in (PERSISTED_QUERY_NOT_FOUND, PERSISTED_QUERY_NOT_SUPPORTED):
+            return code
+        if error.get("message") in _ERROR_MESSAGES:
+            return _ERROR_MESSAGES[error["message"]]
+    return None
@@ -0,0 +1,214 @@
+"""Alias-based batching of one GraphQL query over many variable sets."""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from graphql import (
+    DocumentNode,
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    InlineFragmentNode,
+    NameNode,
+    OperationDefinitionNode,
+    SelectionSetNode,
+    VariableDefinitionNode,
+    VariableNode,
+    Visitor,
+    parse,
+    print_ast,
+    visit,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class _RenameVariables(Visitor):
+    """Append a suffix to every variable reference."""
+
+    def __init__(self, suffix: str):
+        super().__init__()
+        self.suffix = suffix
+
+    def enter_variable(self, node: VariableNode, *_: Any) -> VariableNode:
+        return VariableNode(name=NameNode(value=f"{node.name.value}{self.suffix}"))
+
+
+def _uses_variables(node: Any) -> bool:
+    """Check whether an AST node references any variable."""
+    found = []
+
+    class _Finder(Visitor):
+        def enter_variable(self, *_: Any) -> None:
+            found.append(True)
+
+    visit(node, _Finder())
+    return bool(found)
+
+
+def estimate_complexity(selection_set: SelectionSetNode, fragments: Dict[str, FragmentDefinitionNode]) -> int:
+    """Estimate query cost as the number of selected fields.
+
+    Args:
+        selection_set: Selection set to measure
+        fragments: Fragment definitions by name
+
+    Returns:
+        Number of fields, with fragment spreads expanded
+    """
+    total = 0
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            total += 1
+            if selection.selection_set:
+                total += estimate_complexity(selection.selection_set, fragments)
+        elif isinstance(selection, InlineFragmentNode):
+            total += estimate_complexity(selection.selection_set, fragments)
+        elif isinstance(selection, FragmentSpreadNode):
+            fragment = fragments.get(selection.name.value)
+            if fragment:
+                total += estimate_complexity(fragment.selection_set, fragments)
+    return total
+
+
+class QueryBatcher:
+    """Merges copies of one query into a single document using aliases.
+
+    Every copy gets its top-level fields aliased to ``b<i>_<field>`` and its
+    variables renamed to ``<name>_<i>``, so the server resolves all copies in
+    one round-trip. Responses are split back into one result per variable
+    set, with errors assigned to the copy their path points at.
+
+    Example:
+        batcher = QueryBatcher(query, max_batch_size=25)
+        for chunk in batcher.chunks(variable_sets):
+            document, variables = batcher.build(chunk)
+            results = batcher.split(post(document, variables), len(chunk))
+    """
+
+    def __init__(self, query: str, max_batch_size: int = 20, max_complexity: Optional[int] = None):
+        """Initialize the batcher.
+
+        Args:
+            query: Query template containing a single operation
+            max_batch_size: Maximum number of variable sets per request
+            max_complexity: Optional maximum estimated cost of a merged request
+
+        Raises:
+            ValueError: If the query cannot be batched
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        document = parse(query)
+        operations = [d for d in document.definitions if isinstance(d, OperationDefinitionNode)]
+        if len(operations) != 1:
+            raise ValueError("Batched queries must contain exactly one operation")
+
+        self.operation = operations[0]
+        self.fragments = {
+            d.name.value: d for d in document.definitions if isinstance(d, FragmentDefinitionNode)
+        }
+        for selection in self.operation.selection_set.selections:
+            if not isinstance(selection, FieldNode):
+                raise ValueError("Batched queries may only select fields at the top level")
+        for fragment in self.fragments.values():
+            if _uses_variables(fragment):
+                raise ValueError(f"Fragment {fragment.name.value} uses variables and cannot be batched")
+
+        self.complexity = max(1, estimate_complexity(self.operation.selection_set, self.fragments))
+        self.batch_size = max_batch_size
+        if max_complexity is not None:
+            self.batch_size = max(1, min(max_batch_size, max_complexity // self.complexity))
+
+    def chunks(self, variable_sets: Sequence[Dict[str, Any]]) -> List[Sequence[Dict[str, Any]]]:
+        """Split variable sets into batches that fit the configured limits.
+
+        Args:
+            variable_sets: Variables for every copy of the query
+
+        Returns:
+            Variable sets grouped per request
+        """
+        return [variable_sets[i:i + self.batch_size] for i in range(0, len(variable_sets), self.batch_size)]
+
+    def build(self, variable_sets: Sequence[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+        """Merge copies of the query into one document.
+
+        Args:
+            variable_sets: Variables for every copy of the query
+
+        Returns:
+            Tuple of the merged query and its variables
+        """
+        selections: List[FieldNode] = []
+        definitions: List[VariableDefinitionNode] = []
+        merged: Dict[str, Any] = {}
+
+        for index, variables in enumerate(variable_sets):
+            renamer = _RenameVariables(f"_{index}")
+            for field in self.operation.selection_set.selections:
+                field = visit(field, renamer)
+                response_key = (field.alias or field.name).value
+                selections.append(FieldNode(
+                    alias=NameNode(value=f"b{index}_{response_key}"),
+                    name=field.name,
+                    arguments=field.arguments,
+                    directives=field.directives,
+                    selection_set=field.selection_set,
+                ))
+            for definition in self.operation.variable_definitions or ():
+                definitions.append(visit(definition, renamer))
+                name = definition.variable.name.value
+                if name in variables:
+                    merged[f"{name}_{index}"] = variables[name]
+
+        operation = OperationDefinitionNode(
+            operation=self.operation.operation,
+            name=self.operation.name,
+            variable_definitions=tuple(definitions),
+            directives=self.operation.directives,
+            selection_set=SelectionSetNode(selections=tuple(selections)),
+        )
+        document = DocumentNode(definitions=(operation, *self.fragments.values()))
+        return print_ast(document), merged
+
+    def split(
+        self,
+        data: Optional[Dict[str, Any]],
+        errors: Optional[List[Dict[str, Any]]],
+        count: int
+    ) -> List[Dict[str, Any]]:
+        """Split a merged response into one result per variable set.
+
+        Args:
+            data: Response data of the merged query
+            errors: Response errors of the merged query
+            count: Number of variable sets in the batch
+
+        Returns:
+            Results in variable set order, each with ``data`` and, if any
+            errors belong to it, ``errors``
+        """
+        data = data or {}
+        results: List[Dict[str, Any]] = []
+        for index in range(count):
+            prefix = f"b{index}_"
+            results.append({"data": {
+                key[len(prefix):]: value for key, value in data.items() if key.startswith(prefix)
+            }})
+
+        for error in errors or []:
+            path = error.get("path") or []
+            alias = path[0] if path and isinstance(path[0], str) else ""
+            head, _, response_key = alias.partition("_")
+            if head.startswith("b") and head[1:].isdigit() and int(head[1:]) < count:
+                targets = [results[int(head[1:])]]
+                error = {**error, "path": [response_key, *path[1:]]}
+            else:
+                # Errors without a path apply to the whole request
+                targets = results
+            for result in targets:
+                result.setdefault("errors", []).append(error)
+
+        return results
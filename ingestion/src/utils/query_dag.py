@@ -0,0 +1,239 @@
+"""Executor for chains of queries whose variables come from earlier results."""
+
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from ingestion.utils import json_codec
+from ingestion.utils.pagination import PagePaginator, get_all, get_path
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryNode:
+    """A query in the DAG and the edge feeding it from its parent.
+
+    Attributes:
+        name: Unique node name, usually the query's name in the catalog
+        query: GraphQL query string
+        variables: Variables shared by every run of the node
+        parent: Node whose records produce this node's variables, None for roots
+        records_path: Dotted path to the records in the parent's response; lists are flattened
+        bindings: Variable name to dotted path within a parent record
+        total_count_path: Dotted path to the total count, fetches every page when set
+        page_variable: Name of the page number variable of a paginated node
+        per_variable: Name of the page size variable of a paginated node
+    """
+    name: str
+    query: str
+    variables: Dict[str, Any] = field(default_factory=dict)
+    parent: Optional[str] = None
+    records_path: Optional[str] = None
+    bindings: Dict[str, str] = field(default_factory=dict)
+    total_count_path: Optional[str] = None
+    page_variable: str = "page"
+    per_variable: str = "per"
+
+
+@dataclass
+class NodeResult:
+    """One response of a node."""
+    node: str
+    variables: Dict[str, Any]
+    response: Dict[str, Any]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the result to a JSON serializable report.
+
+        Returns:
+            Dict with the variables the node ran with and its response
+        """
+        return {"variables": self.variables, **self.response}
+
+
+class _LimitedClient:
+    """Client wrapper bounding the requests in flight across every node."""
+
+    def __init__(self, client: Any, semaphore: asyncio.Semaphore):
+        self.client = client
+        self.semaphore = semaphore
+
+    async def execute_query(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        async with self.semaphore:
+            return await self.client.execute_query(query, variables)
+
+
+class QueryDAG:
+    """Runs dependent queries, starting each child as soon as its parent records arrive.
+
+    Every response of a node is turned into child variables through the
+    child's bindings and the child runs immediately, so pages and branches
+    overlap and a crawl takes roughly the time of its critical path. Roots
+    and independent branches run concurrently, and identical child runs
+    are only made once. At most ``max_concurrency`` requests are in flight
+    across the whole DAG.
+
+    Example:
+        dag = QueryDAG(client, [
+            QueryNode("accounts", accounts_query, records_path=None),
+            QueryNode("athletes", athletes_query, parent="accounts",
+                      records_path="data.accounts", bindings={"federation": "federation"}),
+        ])
+        async for result in dag.run():
+            ...
+    """
+
+    def __init__(self, client: Any, nodes: List[QueryNode], max_concurrency: int = 5):
+        """Initialize the DAG.
+
+        Args:
+            client: Client exposing ``await execute_query(query, variables)``
+            nodes: Nodes of the DAG
+            max_concurrency: Maximum number of requests in flight
+
+        Raises:
+            ValueError: If names are duplicated, a parent is unknown, an edge has no bindings or there is a cycle
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be positive")
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.nodes: Dict[str, QueryNode] = {}
+        self.children: Dict[str, List[QueryNode]] = defaultdict(list)
+        for node in nodes:
+            if node.name in self.nodes:
+                raise ValueError(f"Duplicate DAG node: {node.name}")
+            self.nodes[node.name] = node
+        for node in nodes:
+            if node.parent is None:
+                continue
+            if node.parent not in self.nodes:
+                raise ValueError(f"Unknown parent {node.parent} of DAG node {node.name}")
+            if not node.bindings:
+                raise ValueError(f"DAG node {node.name} must bind at least one variable to its parent")
+            self.children[node.parent].append(node)
+        self._check_acyclic()
+
+    def _check_acyclic(self) -> None:
+        """Raise ValueError if following parents ever revisits a node."""
+        for node in self.nodes.values():
+            seen = {node.name}
+            parent = node.parent
+            while parent is not None:
+                if parent in seen:
+                    raise ValueError(f"DAG contains a cycle through {parent}")
+                seen.add(parent)
+                parent = self.nodes[parent].parent
+
+    @property
+    def roots(self) -> List[QueryNode]:
+        """Nodes without a parent."""
+        return [node for node in self.nodes.values() if node.parent is None]
+
+    def child_variables(self, child: QueryNode, response: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Build the variables of a child's runs from one parent response.
+
+        Records missing a bound field are skipped.
+
+        Args:
+            child: Child node
+            response: Parent response
+
+        Returns:
+            Variables of each child run
+        """
+        records = get_all(response, child.records_path) if child.records_path else [response]
+        runs = []
+        for record in records:
+            bound = {name: get_path(record, path) for name, path in child.bindings.items()}
+            if any(value is None for value in bound.values()):
+                continue
+            runs.append({**child.variables, **bound})
+        return runs
+
+    async def _run_node(
+        self,
+        node: QueryNode,
+        variables: Dict[str, Any],
+        client: _LimitedClient,
+        group: asyncio.TaskGroup,
+        results: "asyncio.Queue[NodeResult]",
+        started: Set[Tuple[str, bytes]]
+    ) -> None:
+        """Run one node and start its children for every response."""
+        if node.total_count_path:
+            paginator = PagePaginator(
+                client,
+                total_count_path=node.total_count_path,
+                page_variable=node.page_variable,
+                per_variable=node.per_variable,
+                max_concurrency=self.max_concurrency
+            )
+            responses = paginator.iter_pages(node.query, variables)
+        else:
+            responses = _single(client.execute_query(node.query, variables))
+
+        async for response in responses:
+            if response.get("errors"):
+                logger.warning(f"DAG node {node.name} returned errors: {response['errors']}")
+            await results.put(NodeResult(node.name, variables, response))
+            for child in self.children[node.name]:
+                for child_variables in self.child_variables(child, response):
+                    key = (child.name, json_codec.dumps(child_variables, pretty=False))
+                    if key in started:
+                        continue
+                    started.add(key)
+                    group.create_task(self._run_node(child, child_variables, client, group, results, started))
+
+    async def _drive(self, results: "asyncio.Queue[Optional[NodeResult]]") -> None:
+        """Run every node, then signal completion."""
+        client = _LimitedClient(self.client, asyncio.Semaphore(self.max_concurrency))
+        started: Set[Tuple[str, bytes]] = set()
+        try:
+            async with asyncio.TaskGroup() as group:
+                for root in self.roots:
+                    group.create_task(self._run_node(root, dict(root.variables), client, group, results, started))
+        finally:
+            await results.put(None)
+
+    async def run(self) -> AsyncIterator[NodeResult]:
+        """Run the DAG.
+
+        Yields:
+            Every response of every node, in completion order
+
+        Raises:
+            Exception: The first error raised by a request, after cancelling the others
+        """
+        results: "asyncio.Queue[Optional[NodeResult]]" = asyncio.Queue()
+        driver = asyncio.create_task(self._drive(results))
+        try:
+            while True:
+                result = await results.get()
+                if result is None:
+                    break
+                yield result
+            await driver
+        except BaseExceptionGroup as group:
+            raise group.exceptions[0]
+        finally:
+            driver.cancel()
+
+    async def collect(self) -> Dict[str, List[NodeResult]]:
+        """Run the DAG and group the results by node.
+
+        Returns:
+            Results of each node, in completion order
+        """
+        collected: Dict[str, List[NodeResult]] = {name: [] for name in self.nodes}
+        async for result in self.run():
+            collected[result.node].append(result)
+        return collected
+
+
+async def _single(response: Any) -> AsyncIterator[Dict[str, Any]]:
+    """Yield the single response of an unpaginated node."""
+    yield await response
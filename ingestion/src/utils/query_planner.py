@@ -0,0 +1,434 @@
+"""Query cost estimation and splitting of over-budget queries."""
+
+import copy
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from graphql import (
+    DocumentNode,
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLList,
+    GraphQLNonNull,
+    GraphQLSchema,
+    InlineFragmentNode,
+    IntValueNode,
+    NameNode,
+    OperationDefinitionNode,
+    SelectionSetNode,
+    VariableNode,
+    Visitor,
+    get_named_type,
+    parse,
+    print_ast,
+    visit,
+)
+
+from ingestion.utils.pagination import get_path
+
+logger = logging.getLogger(__name__)
+
+# Arguments whose value is the number of items a list field returns
+SIZE_ARGUMENTS = ("first", "last", "per", "limit", "pageSize")
+
+# Split strategies
+SINGLE = "single"
+HORIZONTAL = "horizontal"
+VERTICAL = "vertical"
+
+
+def _is_list(type_: Any) -> bool:
+    """Check whether an output type is a list, ignoring non-null wrappers."""
+    while isinstance(type_, GraphQLNonNull):
+        type_ = type_.of_type
+    return isinstance(type_, GraphQLList)
+
+
+class _ReferenceCollector(Visitor):
+    """Collects the fragments spread and variables used by AST nodes."""
+
+    def __init__(self):
+        super().__init__()
+        self.fragments: Set[str] = set()
+        self.variables: Set[str] = set()
+
+    def enter_fragment_spread(self, node: FragmentSpreadNode, *_: Any) -> None:
+        self.fragments.add(node.name.value)
+
+    def enter_variable(self, node: VariableNode, *_: Any) -> None:
+        self.variables.add(node.name.value)
+
+
+def _references(
+    nodes: Iterable[Any],
+    fragments: Dict[str, FragmentDefinitionNode]
+) -> Tuple[List[FragmentDefinitionNode], Set[str]]:
+    """Find the fragments nodes spread, transitively, and the variables they use.
+
+    Args:
+        nodes: AST nodes such as an operation's selection set and directives
+        fragments: Fragment definitions of the document by name
+
+    Returns:
+        Tuple of the used fragment definitions, in document order, and the used variable names
+    """
+    collector = _ReferenceCollector()
+    for node in nodes:
+        visit(node, collector)
+    seen: Set[str] = set()
+    pending = set(collector.fragments)
+    while pending:
+        name = pending.pop()
+        seen.add(name)
+        if name in fragments:
+            visit(fragments[name], collector)
+            pending |= collector.fragments - seen
+    return [fragment for name, fragment in fragments.items() if name in seen], collector.variables
+
+
+def _response_key(node: FieldNode) -> str:
+    """Key a field is returned under."""
+    return (node.alias or node.name).value
+
+
+class CostEstimator:
+    """Estimates query cost as the number of objects the server resolves.
+
+    Every field costs one, multiplied by the size of the lists it is nested
+    in. List sizes come from size arguments such as ``per`` or ``first``,
+    resolved against the variables, or ``default_list_size`` for fields the
+    schema declares as lists without a size argument. A size argument on a
+    field the schema declares as an object, such as a page wrapper, sizes
+    the first list nested inside it.
+    """
+
+    def __init__(self, schema: Optional[GraphQLSchema] = None, default_list_size: int = 10):
+        """Initialize the estimator.
+
+        Args:
+            schema: Optional schema used to recognise list fields
+            default_list_size: Assumed size of lists without a size argument
+        """
+        self.schema = schema
+        self.default_list_size = default_list_size
+
+    def _size_argument(self, node: FieldNode, variables: Dict[str, Any]) -> Optional[int]:
+        """Value of a field's size argument, if it has one."""
+        for argument in node.arguments or ():
+            if argument.name.value not in SIZE_ARGUMENTS:
+                continue
+            value = argument.value
+            if isinstance(value, IntValueNode):
+                return int(value.value)
+            if isinstance(value, VariableNode) and isinstance(variables.get(value.name.value), int):
+                return variables[value.name.value]
+        return None
+
+    def _multiplier(
+        self,
+        node: FieldNode,
+        field_type: Any,
+        variables: Dict[str, Any],
+        inherited_size: Optional[int]
+    ) -> Tuple[int, Optional[int]]:
+        """Number of items a field returns and the size passed on to nested lists."""
+        size = self._size_argument(node, variables)
+        if field_type is None:
+            return (size or 1), None
+        if _is_list(field_type):
+            return (size or inherited_size or self.default_list_size), None
+        return 1, size or inherited_size
+
+    def selection_cost(
+        self,
+        selection_set: Optional[SelectionSetNode],
+        parent_type: Any,
+        fragments: Dict[str, FragmentDefinitionNode],
+        variables: Dict[str, Any],
+        inherited_size: Optional[int] = None
+    ) -> int:
+        """Estimate the cost of a selection set.
+
+        Args:
+            selection_set: Selections to measure
+            parent_type: Schema type the selections apply to, if known
+            fragments: Fragment definitions by name
+            variables: Query variables
+            inherited_size: Size argument of an enclosing page wrapper
+
+        Returns:
+            Estimated cost
+        """
+        if selection_set is None:
+            return 0
+        total = 0
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                field_type = None
+                fields = getattr(parent_type, "fields", None)
+                if fields and selection.name.value in fields:
+                    field_type = fields[selection.name.value].type
+                child_type = get_named_type(field_type) if field_type is not None else None
+                multiplier, passed_size = self._multiplier(selection, field_type, variables, inherited_size)
+                children = self.selection_cost(
+                    selection.selection_set, child_type, fragments, variables, passed_size
+                )
+                total += 1 + multiplier * children
+            elif isinstance(selection, InlineFragmentNode):
+                type_ = parent_type
+                if selection.type_condition and self.schema:
+                    type_ = self.schema.get_type(selection.type_condition.name.value)
+                total += self.selection_cost(selection.selection_set, type_, fragments, variables, inherited_size)
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment = fragments.get(selection.name.value)
+                if fragment:
+                    type_ = self.schema.get_type(fragment.type_condition.name.value) if self.schema else None
+                    total += self.selection_cost(
+                        fragment.selection_set, type_, fragments, variables, inherited_size
+                    )
+        return total
+
+    def estimate(self, query: str, variables: Optional[Dict[str, Any]] = None) -> int:
+        """Estimate the cost of a query.
+
+        Args:
+            query: GraphQL query string
+            variables: Query variables
+
+        Returns:
+            Estimated cost
+        """
+        document = parse(query)
+        fragments = {d.name.value: d for d in document.definitions if isinstance(d, FragmentDefinitionNode)}
+        total = 0
+        for definition in document.definitions:
+            if isinstance(definition, OperationDefinitionNode):
+                root = self.schema.get_root_type(definition.operation) if self.schema else None
+                total += self.selection_cost(definition.selection_set, root, fragments, variables or {})
+        return total
+
+
+@dataclass
+class QueryPlan:
+    """Requests that together answer one query."""
+    strategy: str
+    parts: List[Tuple[str, Dict[str, Any]]]
+    cost: int
+    part_costs: List[int] = field(default_factory=list)
+
+
+class QueryPlanner:
+    """Splits queries whose estimated cost exceeds a budget.
+
+    Paged queries are first split horizontally into several smaller pages
+    covering the same records. If even single records are too expensive, the
+    item selection is split vertically into field groups, each fetched with
+    the item ``id`` and merged back by id.
+
+    Example:
+        planner = QueryPlanner(max_cost=5000, items_path="data.organisationAthletes.athletes")
+        result = planner.execute(client.execute_query, query, {"id": 78, "page": 1, "per": 100})
+    """
+
+    def __init__(
+        self,
+        max_cost: int,
+        items_path: str,
+        page_variable: str = "page",
+        per_variable: str = "per",
+        id_field: str = "id",
+        schema: Optional[GraphQLSchema] = None,
+        default_list_size: int = 10
+    ):
+        """Initialize the planner.
+
+        Args:
+            max_cost: Largest estimated cost sent in a single request
+            items_path: Dotted path to the list of records, e.g. data.organisationAthletes.athletes
+            page_variable: Name of the page number variable
+            per_variable: Name of the page size variable
+            id_field: Field joining vertically split records
+            schema: Optional schema used to recognise list fields
+            default_list_size: Assumed size of lists without a size argument
+        """
+        self.max_cost = max_cost
+        self.items_path = items_path
+        self.page_variable = page_variable
+        self.per_variable = per_variable
+        self.id_field = id_field
+        self.estimator = CostEstimator(schema, default_list_size)
+
+    def plan(
+        self,
+        query: str,
+        variables: Optional[Dict[str, Any]] = None,
+        schema: Optional[GraphQLSchema] = None
+    ) -> QueryPlan:
+        """Plan the requests answering a query within budget.
+
+        Args:
+            query: GraphQL query string
+            variables: Query variables
+            schema: Schema to use instead of the one given at construction
+
+        Returns:
+            Plan with one part, or several parts when the query is over budget
+        """
+        variables = dict(variables or {})
+        if schema is not None:
+            self.estimator.schema = schema
+        cost = self.estimator.estimate(query, variables)
+        if cost <= self.max_cost:
+            return QueryPlan(SINGLE, [(query, variables)], cost, [cost])
+
+        plan = self._plan_horizontal(query, variables, cost) or self._plan_vertical(query, variables, cost)
+        logger.info(
+            f"Query cost {cost} exceeds budget {self.max_cost}, "
+            f"split into {len(plan.parts)} requests ({plan.strategy})"
+        )
+        return plan
+
+    def _plan_horizontal(self, query: str, variables: Dict[str, Any], cost: int) -> Optional[QueryPlan]:
+        """Split a page into smaller pages covering the same records."""
+        per = variables.get(self.per_variable)
+        page = variables.get(self.page_variable)
+        if not isinstance(per, int) or not isinstance(page, int) or per < 2:
+            return None
+
+        for pieces in range(2, per + 1):
+            if per % pieces:
+                continue
+            sub_per = per // pieces
+            sub_cost = self.estimator.estimate(query, {**variables, self.per_variable: sub_per})
+            if sub_cost <= self.max_cost:
+                parts = [
+                    (query, {**variables, self.per_variable: sub_per, self.page_variable: (page - 1) * pieces + i})
+                    for i in range(1, pieces + 1)
+                ]
+                return QueryPlan(HORIZONTAL, parts, cost, [sub_cost] * pieces)
+        return None
+
+    def _plan_vertical(self, query: str, variables: Dict[str, Any], cost: int) -> QueryPlan:
+        """Split the item selection into groups of fields joined on id."""
+        document = parse(query)
+        operation = next(d for d in document.definitions if isinstance(d, OperationDefinitionNode))
+        fragments = {d.name.value: d for d in document.definitions if isinstance(d, FragmentDefinitionNode)}
+        path = self.items_path.split(".")[1:]
+        items_field = self._find_field(operation.selection_set, path)
+        if items_field is None or items_field.selection_set is None:
+            logger.warning(f"Cannot split query: {self.items_path} not selected")
+            return QueryPlan(SINGLE, [(query, variables)], cost, [cost])
+
+        selections = [
+            s for s in items_field.selection_set.selections
+            if not (isinstance(s, FieldNode) and s.name.value == self.id_field and s.alias is None)
+        ]
+
+        def build(group: Sequence[Any], first: bool) -> Tuple[str, Dict[str, Any]]:
+            id_node = FieldNode(name=NameNode(value=self.id_field))
+            leaf = SelectionSetNode(selections=(id_node, *group))
+            selection_set = self._rebuild(operation.selection_set, path, leaf, keep_siblings=first)
+            # Unused fragments and variables make a document invalid, keep only what the part references
+            used_fragments, used_variables = _references((selection_set, *operation.directives), fragments)
+            new_operation = copy.copy(operation)
+            new_operation.selection_set = selection_set
+            new_operation.variable_definitions = tuple(
+                d for d in operation.variable_definitions if d.variable.name.value in used_variables
+            )
+            part_variables = {k: v for k, v in variables.items() if k in used_variables}
+            return print_ast(DocumentNode(definitions=(new_operation, *used_fragments))), part_variables
+
+        groups: List[List[Any]] = []
+        for selection in selections:
+            candidate = groups[-1] + [selection] if groups else None
+            if candidate and self.estimator.estimate(*build(candidate, len(groups) == 1)) <= self.max_cost:
+                groups[-1].append(selection)
+            else:
+                groups.append([selection])
+
+        parts = [build(group, i == 0) for i, group in enumerate(groups)]
+        part_costs = [self.estimator.estimate(q, v) for q, v in parts]
+        if max(part_costs) > self.max_cost:
+            logger.warning(f"Query still exceeds budget after splitting: {max(part_costs)} > {self.max_cost}")
+        return QueryPlan(VERTICAL, parts, cost, part_costs)
+
+    def _find_field(self, selection_set: SelectionSetNode, path: List[str]) -> Optional[FieldNode]:
+        """Find the field at a response path."""
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode) and _response_key(selection) == path[0]:
+                if len(path) == 1:
+                    return selection
+                if selection.selection_set:
+                    return self._find_field(selection.selection_set, path[1:])
+        return None
+
+    def _rebuild(
+        self,
+        selection_set: SelectionSetNode,
+        path: List[str],
+        leaf: SelectionSetNode,
+        keep_siblings: bool
+    ) -> SelectionSetNode:
+        """Copy a selection set, replacing the selections at the end of a path."""
+        selections = []
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode) and _response_key(selection) == path[0]:
+                node = copy.copy(selection)
+                node.selection_set = leaf if len(path) == 1 else self._rebuild(
+                    selection.selection_set, path[1:], leaf, keep_siblings
+                )
+                selections.append(node)
+            elif keep_siblings:
+                selections.append(selection)
+        return SelectionSetNode(selections=tuple(selections))
+
+    def merge(self, plan: QueryPlan, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Merge the responses of a plan's parts.
+
+        Args:
+            plan: Executed plan
+            results: Responses in part order
+
+        Returns:
+            Response equivalent to running the original query
+
+        Raises:
+            ValueError: If a response is missing the items list
+        """
+        merged = results[0]
+        if plan.strategy == SINGLE:
+            return merged
+
+        items = get_path(merged, self.items_path)
+        if not isinstance(items, list):
+            raise ValueError(f"No list found at items_path: {self.items_path}")
+        for result in results[1:]:
+            part_items = get_path(result, self.items_path) or []
+            if plan.strategy == HORIZONTAL:
+                items.extend(part_items)
+                continue
+            by_id = {item.get(self.id_field): item for item in part_items if isinstance(item, dict)}
+            for item in items:
+                item.update(by_id.get(item.get(self.id_field), {}))
+        return merged
+
+    def execute(
+        self,
+        execute_query: Callable[[str, Dict[str, Any]], Dict[str, Any]],
+        query: str,
+        variables: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Plan a query, run its parts one after another and merge them.
+
+        Args:
+            execute_query: Function running one request
+            query: GraphQL query string
+            variables: Query variables
+
+        Returns:
+            Merged response
+        """
+        plan = self.plan(query, variables)
+        return self.merge(plan, [execute_query(q, v) for q, v in plan.parts])
@@ -0,0 +1,102 @@
+"""Token-bucket rate limiting for outbound API calls."""
+
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucketRateLimiter:
+    """Token-bucket rate limiter usable from sync and async code.
+
+    The bucket holds up to ``burst`` tokens and refills at
+    ``requests_per_second``. Each call reserves one token; when the bucket is
+    empty the caller is told how long to wait for its reservation, so waiting
+    callers are served in arrival order and the long-run rate never exceeds
+    the configured limit, whether they are threads or coroutines.
+
+    Example:
+        limiter = TokenBucketRateLimiter(requests_per_second=2, burst=3)
+        limiter.acquire()              # blocking
+        await limiter.acquire_async()  # non-blocking
+    """
+
+    def __init__(self, requests_per_second: float, burst: int = 1):
+        """Initialize the rate limiter.
+
+        Args:
+            requests_per_second: Sustained number of requests allowed per second
+            burst: Number of requests allowed back to back when the bucket is full
+
+        Raises:
+            ValueError: If the rate or burst is not positive
+        """
+        if requests_per_second <= 0:
+            raise ValueError("requests_per_second must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+
+        self.rate = float(requests_per_second)
+        self.capacity = float(burst)
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.total_requests = 0
+        self.delayed_requests = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _reserve(self) -> float:
+        """Reserve a token and return how long the caller must wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+
+            wait = max(0.0, -self._tokens / self.rate)
+            self.total_requests += 1
+            if wait > 0:
+                self.delayed_requests += 1
+                self.total_wait_seconds += wait
+                self.max_wait_seconds = max(self.max_wait_seconds, wait)
+            return wait
+
+    def acquire(self) -> float:
+        """Block until a request is allowed.
+
+        Returns:
+            Seconds spent waiting
+        """
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        """Wait without blocking the event loop until a request is allowed.
+
+        Returns:
+            Seconds spent waiting
+        """
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def stats(self) -> Dict[str, Any]:
+        """Get waiting statistics.
+
+        Returns:
+            Dictionary of request counts and wait times
+        """
+        return {
+            "requests": self.total_requests,
+            "delayed_requests": self.delayed_requests,
+            "total_wait_seconds": round(self.total_wait_seconds, 3),
+            "max_wait_seconds": round(self.max_wait_seconds, 3),
+        }
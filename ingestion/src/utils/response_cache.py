@@ -0,0 +1,398 @@
+"""Two-tier TTL cache for GraphQL responses with stale-while-revalidate."""
+
+import os
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple, Union
+
+from graphql import OperationDefinitionNode, parse
+
+from ingestion.utils import json_codec
+from ingestion.utils.persisted_queries import persist_query
+
+logger = logging.getLogger(__name__)
+
+# Lookup outcomes
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+
+class ResponseCache:
+    """LRU cache of GraphQL responses held in memory and optionally on disk.
+
+    Entries are keyed by endpoint, the hash of the minified query and the
+    variables. An entry is fresh for ``ttl`` seconds and may then be served
+    stale for another ``stale_ttl`` seconds while a single background
+    refresh replaces it. Responses are held encoded and decoded on every
+    hit, so callers may modify what they get back without corrupting the
+    cache. Await ``drain`` before the event loop ends so background
+    refreshes finish.
+
+    Example:
+        cache = ResponseCache(cache_dir="/tmp/graphql_response_cache", ttl=300)
+        response = cache.get_or_fetch(url, query, variables, lambda: client.execute(query))
+    """
+
+    _shared: Dict[Tuple[Optional[str], int], "ResponseCache"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        cache_dir: Optional[Union[str, Path]] = None,
+        ttl: float = 300.0,
+        stale_ttl: float = 600.0,
+        max_entries: int = 256,
+        max_disk_entries: int = 4096,
+        query_ttls: Optional[Dict[str, float]] = None
+    ):
+        """Initialize the cache.
+
+        Args:
+            cache_dir: Directory of the disk tier; memory only when None
+            ttl: Default seconds an entry is fresh
+            stale_ttl: Seconds after expiry an entry may still be served while it is refreshed
+            max_entries: Maximum number of entries held in memory
+            max_disk_entries: Maximum number of entries kept on disk
+            query_ttls: Fresh TTLs by operation name, overriding ttl
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.query_ttls = query_ttls or {}
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing: Set[str] = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._disk_keys: Optional["OrderedDict[str, None]"] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def shared(cls, cache_dir: Optional[Union[str, Path]] = None, **kwargs: Any) -> "ResponseCache":
+        """Get a cache that outlives a single handler, e.g. across warm Lambda invocations.
+
+        Args:
+            cache_dir: Directory of the disk tier; memory only when None
+            **kwargs: Settings used if the cache does not exist yet; settings
+                differing from an existing cache's are logged and ignored
+
+        Returns:
+            Shared cache for the directory
+        """
+        key = (str(cache_dir) if cache_dir else None, os.getpid())
+        with cls._shared_lock:
+            cache = cls._shared.get(key)
+            if cache is None:
+                cache = cls._shared[key] = cls(cache_dir=cache_dir, **kwargs)
+                return cache
+        ignored = {
+            name: value for name, value in kwargs.items()
+            if value is not None and getattr(cache, name) != value
+        }
+        if ignored:
+            logger.warning(
+                f"Response cache for {cache_dir or 'memory'} already exists, ignoring {ignored}"
+            )
+        return cache
+
+    @staticmethod
+    def make_key(endpoint: str, query: str, variables: Optional[Dict[str, Any]] = None) -> str:
+        """Build the cache key of a request.
+
+        Args:
+            endpoint: GraphQL endpoint URL
+            query: GraphQL query string
+            variables: Query variables
+
+        Returns:
+            Hex digest identifying the request
+        """
+        _, query_hash = persist_query(query)
+        canonical = json_codec.dumps({"e": endpoint, "q": query_hash, "v": _sorted(variables or {})}, pretty=False)
+        return hashlib.sha256(canonical).hexdigest()
+
+    def ttl_for(self, query: str) -> float:
+        """Get the fresh TTL of a query.
+
+        Args:
+            query: GraphQL query string
+
+        Returns:
+            Seconds the query's responses stay fresh
+        """
+        return self.query_ttls.get(_operation_name(query), self.ttl)
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        """Path of an entry on disk."""
+        return self.cache_dir / f"{key}.json" if self.cache_dir else None
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        """Put an entry in the memory tier, evicting the least recently used."""
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _touch_disk(self, key: str) -> None:
+        """Record a use of an entry on disk, evicting the oldest beyond max_disk_entries.
+
+        The directory is listed once; later files are tracked as they are
+        written, so stores do not scan the directory.
+        """
+        with self._lock:
+            if self._disk_keys is None:
+                files = sorted(self.cache_dir.glob("*.json"), key=lambda p: p.stat().st_mtime)
+                self._disk_keys = OrderedDict((path.stem, None) for path in files)
+            self._disk_keys[key] = None
+            self._disk_keys.move_to_end(key)
+            evicted = []
+            while len(self._disk_keys) > self.max_disk_entries:
+                evicted.append(self._disk_keys.popitem(last=False)[0])
+        for name in evicted:
+            self._disk_path(name).unlink(missing_ok=True)
+
+    def lookup(self, key: str) -> Tuple[str, Any]:
+        """Look an entry up in memory, then on disk.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of FRESH, STALE or MISS and a copy of the cached response, if any
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+
+        path = self._disk_path(key)
+        if entry is None and path is not None:
+            try:
+                stored = json_codec.loads(path.read_bytes())
+                os.utime(path)
+                self._touch_disk(key)
+                entry = {
+                    "stored_at": stored["stored_at"],
+                    "ttl": stored["ttl"],
+                    "body": json_codec.dumps(stored["response"], pretty=False)
+                }
+                self._remember(key, entry)
+            except (OSError, ValueError, KeyError):
+                entry = None
+
+        if entry is None:
+            return MISS, None
+        age = time.time() - entry["stored_at"]
+        if age <= entry["ttl"]:
+            return FRESH, json_codec.loads(entry["body"])
+        if age <= entry["ttl"] + self.stale_ttl:
+            return STALE, json_codec.loads(entry["body"])
+        return MISS, None
+
+    def store(self, key: str, response: Any, ttl: Optional[float] = None) -> None:
+        """Store a response in both tiers.
+
+        Args:
+            key: Cache key
+            response: Response to cache
+            ttl: Seconds the response is fresh, defaults to the cache's ttl
+        """
+        stored_at, ttl = time.time(), self.ttl if ttl is None else ttl
+        # The encoded body is a snapshot the caller's later changes cannot reach
+        body = json_codec.dumps(response, pretty=False)
+        self._remember(key, {"stored_at": stored_at, "ttl": ttl, "body": body})
+        path = self._disk_path(key)
+        if path is not None:
+            try:
+                tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp_path.write_bytes(json_codec.dumps({"stored_at": stored_at, "ttl": ttl, "response": response}))
+                tmp_path.replace(path)
+                self._touch_disk(key)
+            except OSError as e:
+                logger.warning(f"Failed to write response cache entry: {str(e)}")
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop one entry, or every entry when no key is given.
+
+        Args:
+            key: Cache key to drop
+        """
+        with self._lock:
+            if key is None:
+                self._memory.clear()
+                self._disk_keys = None
+            else:
+                self._memory.pop(key, None)
+                if self._disk_keys is not None:
+                    self._disk_keys.pop(key, None)
+        if self.cache_dir:
+            paths = [self._disk_path(key)] if key else list(self.cache_dir.glob("*.json"))
+            for path in paths:
+                path.unlink(missing_ok=True)
+
+    def _count(self, state: str) -> None:
+        """Count a lookup outcome."""
+        if state == FRESH:
+            self.hits += 1
+        elif state == STALE:
+            self.stale_hits += 1
+        else:
+            self.misses += 1
+
+    def _claim_refresh(self, key: str) -> bool:
+        """Mark a key as being refreshed, returning False if it already is."""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def _refresh(self, key: str, fetch: Callable[[], Any], ttl: float) -> None:
+        """Fetch and store a response in the background."""
+        try:
+            self.store(key, fetch(), ttl)
+        except Exception as e:
+            logger.warning(f"Background refresh of cached response failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get_or_fetch(
+        self,
+        endpoint: str,
+        query: str,
+        variables: Optional[Dict[str, Any]],
+        fetch: Callable[[], Any]
+    ) -> Any:
+        """Return a cached response, fetching or refreshing it as needed.
+
+        Stale responses are returned immediately while fetch runs on a
+        background thread.
+
+        Args:
+            endpoint: GraphQL endpoint URL
+            query: GraphQL query string
+            variables: Query variables
+            fetch: Function executing the request
+
+        Returns:
+            Query response
+        """
+        key = self.make_key(endpoint, query, variables)
+        ttl = self.ttl_for(query)
+        state, response = self.lookup(key)
+        self._count(state)
+        if state == FRESH:
+            return response
+        if state == STALE:
+            if self._claim_refresh(key):
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="response-cache")
+                self._executor.submit(self._refresh, key, fetch, ttl)
+            return response
+
+        response = fetch()
+        self.store(key, response, ttl)
+        return response
+
+    async def _refresh_async(self, key: str, fetch: Callable[[], Awaitable[Any]], ttl: float) -> None:
+        """Fetch and store a response in a background task."""
+        try:
+            self.store(key, await fetch(), ttl)
+        except Exception as e:
+            logger.warning(f"Background refresh of cached response failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    async def get_or_fetch_async(
+        self,
+        endpoint: str,
+        query: str,
+        variables: Optional[Dict[str, Any]],
+        fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Return a cached response, fetching or refreshing it as needed.
+
+        Stale responses are returned immediately while fetch runs in a
+        background task; await drain before the event loop ends.
+
+        Args:
+            endpoint: GraphQL endpoint URL
+            query: GraphQL query string
+            variables: Query variables
+            fetch: Coroutine function executing the request
+
+        Returns:
+            Query response
+        """
+        key = self.make_key(endpoint, query, variables)
+        ttl = self.ttl_for(query)
+        state, response = self.lookup(key)
+        self._count(state)
+        if state == FRESH:
+            return response
+        if state == STALE:
+            if self._claim_refresh(key):
+                task = asyncio.create_task(self._refresh_async(key, fetch, ttl))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            return response
+
+        response = await fetch()
+        self.store(key, response, ttl)
+        return response
+
+    async def drain(self) -> None:
+        """Wait for the background refreshes started on the running event loop.
+
+        A refresh still pending when its loop ends, e.g. at the end of an
+        ``asyncio.run``, is cancelled and its stale entry never replaced.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            tasks = [task for task in self._tasks if task.get_loop() is loop and not task.done()]
+            if not tasks:
+                return
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        """Get lookup counters.
+
+        Returns:
+            Number of fresh hits, stale hits and misses
+        """
+        return {"hits": self.hits, "stale_hits": self.stale_hits, "misses": self.misses}
+
+
+@lru_cache(maxsize=256)
+def _operation_name(query: str) -> Optional[str]:
+    """Name of the first operation in a query, if it has one."""
+    for definition in parse(query).definitions:
+        if isinstance(definition, OperationDefinitionNode):
+            return definition.name.value if definition.name else None
+    return None
+
+
+def _sorted(value: Any) -> Any:
+    """Sort dictionary keys recursively so equal variables encode identically."""
+    if isinstance(value, dict):
+        return {k: _sorted(value[k]) for k in sorted(value)}
+    if isinstance(value, list):
+        return [_sorted(v) for v in value]
+    return value
@@ -0,0 +1,337 @@
+"""Retry policies with decorrelated jitter and per-endpoint circuit breakers."""
+
+import time
+import random
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import aiohttp
+import requests
+from gql.transport.exceptions import TransportQueryError, TransportServerError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Error classes produced by classify_error
+TIMEOUT = "timeout"
+CONNECTION = "connection"
+RATE_LIMITED = "rate_limited"
+SERVER_ERROR = "server_error"
+GRAPHQL_TRANSIENT = "graphql_transient"
+
+# GraphQL error extension codes that indicate a transient upstream problem
+TRANSIENT_GRAPHQL_CODES = frozenset({
+    "INTERNAL_SERVER_ERROR",
+    "SERVICE_UNAVAILABLE",
+    "TIMEOUT",
+    "THROTTLED",
+    "RATE_LIMITED",
+})
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open."""
+    pass
+
+
+@dataclass
+class RetryPolicy:
+    """Retry settings for one class of errors.
+
+    Delays follow decorrelated jitter: each delay is drawn uniformly between
+    ``base_delay`` and three times the previous delay, capped at ``max_delay``.
+    """
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+
+    def next_delay(self, previous: float) -> float:
+        """Compute the delay before the next attempt.
+
+        Args:
+            previous: Previous delay, or base_delay before the first retry
+
+        Returns:
+            Seconds to wait
+        """
+        return min(self.max_delay, random.uniform(self.base_delay, max(self.base_delay, previous * 3)))
+
+
+DEFAULT_POLICIES: Dict[str, RetryPolicy] = {
+    TIMEOUT: RetryPolicy(max_attempts=3),
+    CONNECTION: RetryPolicy(max_attempts=4),
+    RATE_LIMITED: RetryPolicy(max_attempts=5, base_delay=1.0, max_delay=60.0),
+    SERVER_ERROR: RetryPolicy(max_attempts=4),
+    GRAPHQL_TRANSIENT: RetryPolicy(max_attempts=3),
+}
+
+
+def classify_error(error: Exception) -> Optional[str]:
+    """Map an exception to a retryable error class.
+
+    Args:
+        error: Exception raised by a request
+
+    Returns:
+        Error class name, or None if the error should not be retried
+    """
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, requests.Timeout)):
+        return TIMEOUT
+    if isinstance(error, (aiohttp.ClientConnectionError, requests.ConnectionError, ConnectionError)):
+        return CONNECTION
+    if isinstance(error, TransportServerError):
+        if error.code == 429:
+            return RATE_LIMITED
+        if error.code is not None and error.code >= 500:
+            return SERVER_ERROR
+        return None
+    if isinstance(error, TransportQueryError):
+        for graphql_error in error.errors or []:
+            code = (graphql_error.get("extensions") or {}).get("code")
+            if code in TRANSIENT_GRAPHQL_CODES:
+                return GRAPHQL_TRANSIENT
+    return None
+
+
+class CircuitBreaker:
+    """Fails calls fast while an endpoint keeps failing.
+
+    After ``failure_threshold`` consecutive upstream failures the circuit
+    opens and calls raise CircuitOpenError without touching the network.
+    After ``reset_timeout`` seconds a single trial call is let through; its
+    success closes the circuit and its failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    _registry: Dict[str, "CircuitBreaker"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """Initialize the circuit breaker.
+
+        Args:
+            name: Name used in log messages, usually the endpoint URL
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a trial call
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_endpoint(cls, url: str, **kwargs: Any) -> "CircuitBreaker":
+        """Get the circuit breaker shared by every client of an endpoint.
+
+        Args:
+            url: Endpoint URL
+            **kwargs: Settings used if the breaker does not exist yet; settings
+                differing from an existing breaker's are logged and ignored
+
+        Returns:
+            Shared circuit breaker
+        """
+        with cls._registry_lock:
+            breaker = cls._registry.get(url)
+            if breaker is None:
+                breaker = cls._registry[url] = cls(url, **kwargs)
+                return breaker
+        ignored = {name: value for name, value in kwargs.items() if getattr(breaker, name) != value}
+        if ignored:
+            logger.warning(
+                f"Circuit breaker for {url} already exists with failure_threshold={breaker.failure_threshold} "
+                f"and reset_timeout={breaker.reset_timeout}, ignoring {ignored}"
+            )
+        return breaker
+
+    def before_call(self) -> None:
+        """Check whether a call may proceed.
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    raise CircuitOpenError(
+                        f"Circuit for {self.name} is open, retry in {remaining:.1f}s"
+                    )
+                self.state = self.HALF_OPEN
+            if self._trial_in_flight:
+                raise CircuitOpenError(f"Circuit for {self.name} is half-open, trial call in flight")
+            self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        """Record a call that reached a healthy upstream."""
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit for {self.name} closed")
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Let another trial call through after one was abandoned."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record an upstream failure."""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit for {self.name} opened after {self._failures} failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class Retrier:
+    """Retries calls according to per-error-class policies.
+
+    Example:
+        retrier = Retrier(circuit_breaker=CircuitBreaker.for_endpoint(url))
+        result = retrier.call(client.execute, document)
+        result = await retrier.call_async(session_post, payload)
+    """
+
+    def __init__(
+        self,
+        policies: Optional[Dict[str, RetryPolicy]] = None,
+        classify: Callable[[Exception], Optional[str]] = classify_error,
+        circuit_breaker: Optional[CircuitBreaker] = None
+    ):
+        """Initialize the retrier.
+
+        Args:
+            policies: Policies by error class, merged over DEFAULT_POLICIES
+            classify: Function mapping exceptions to error classes
+            circuit_breaker: Optional breaker guarding the endpoint
+        """
+        self.policies = {**DEFAULT_POLICIES, **(policies or {})}
+        self.classify = classify
+        self.circuit_breaker = circuit_breaker
+
+    def _before_call(self) -> None:
+        """Fail fast when the circuit is open."""
+        if self.circuit_breaker:
+            self.circuit_breaker.before_call()
+
+    def _on_success(self) -> None:
+        """Record a successful call."""
+        if self.circuit_breaker:
+            self.circuit_breaker.record_success()
+
+    def _on_error(self, error: Exception, attempt: int, previous_delay: float) -> Optional[float]:
+        """Record a failed call and decide whether to retry it.
+
+        Args:
+            error: Raised exception
+            attempt: Number of attempts made so far
+            previous_delay: Delay used before the previous attempt
+
+        Returns:
+            Seconds to wait before retrying, or None to give up
+        """
+        error_class = self.classify(error)
+        if error_class is None:
+            # The upstream answered, the request itself was wrong
+            self._on_success()
+            return None
+
+        if self.circuit_breaker:
+            self.circuit_breaker.record_failure()
+
+        policy = self.policies.get(error_class)
+        if policy is None or attempt >= policy.max_attempts:
+            return None
+
+        delay = policy.next_delay(previous_delay or policy.base_delay)
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after:
+            delay = max(delay, retry_after)
+
+        logger.warning(
+            f"Attempt {attempt}/{policy.max_attempts} failed with {error_class} "
+            f"({str(error)}), retrying in {delay:.2f}s"
+        )
+        return delay
+
+    def call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Call a function, retrying transient failures.
+
+        Args:
+            fn: Function to call
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            Result of fn
+
+        Raises:
+            CircuitOpenError: If the endpoint's circuit is open
+            Exception: The last error once retries are exhausted
+        """
+        attempt, delay = 0, 0.0
+        while True:
+            self._before_call()
+            attempt += 1
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._on_error(e, attempt, delay)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self._on_success()
+            return result
+
+    async def call_async(self, fn: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        """Await a coroutine function, retrying transient failures.
+
+        Args:
+            fn: Coroutine function to call
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            Result of fn
+
+        Raises:
+            CircuitOpenError: If the endpoint's circuit is open
+            Exception: The last error once retries are exhausted
+        """
+        attempt, delay = 0, 0.0
+        while True:
+            self._before_call()
+            attempt += 1
+            try:
+                result = await fn(*args, **kwargs)
+            except asyncio.CancelledError:
+                if self.circuit_breaker:
+                    self.circuit_breaker.release_trial()
+                raise
+            except Exception as e:
+                delay = self._on_error(e, attempt, delay)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self._on_success()
+            return result
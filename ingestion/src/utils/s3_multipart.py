@@ -0,0 +1,195 @@
+"""Streaming S3 uploads through concurrent multipart part uploads."""
+
+import io
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+
+import boto3
+
+logger = logging.getLogger(__name__)
+
+# S3 rejects parts other than the last below 5 MiB
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+class S3MultipartWriter(io.RawIOBase):
+    """Writable file object uploading to S3 while it is being written.
+
+    Written bytes fill parts of ``part_size``; every full part is uploaded
+    on a thread while serialization continues, with at most
+    ``max_concurrency`` parts in flight, so memory is bounded by
+    ``part_size * (max_concurrency + 1)`` whatever the object size. Objects
+    smaller than one part are sent with a single put_object. If writing or
+    uploading fails the multipart upload is aborted, leaving no partial
+    object or orphaned parts behind.
+
+    Example:
+        with S3MultipartWriter("bucket", "graphql/athletes.ndjson.gz") as stream:
+            with NDJSONWriter(stream, compression="gzip") as writer:
+                writer.write(records)
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        key: str,
+        client: Optional[Any] = None,
+        part_size: int = 8 * 1024 * 1024,
+        max_concurrency: int = 4,
+        extra_args: Optional[Dict[str, Any]] = None
+    ):
+        """Initialize the writer.
+
+        Args:
+            bucket: Destination bucket
+            key: Destination key
+            client: boto3 S3 client, a new one is created when None
+            part_size: Size of each part in bytes, at least 5 MiB
+            max_concurrency: Maximum number of parts uploading at the same time
+            extra_args: Extra arguments of the upload, e.g. ContentType and ACL
+
+        Raises:
+            ValueError: If part_size is below the S3 minimum or max_concurrency is not positive
+        """
+        super().__init__()
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"part_size must be at least {MIN_PART_SIZE} bytes")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be positive")
+        self.bucket = bucket
+        self.key = key
+        self.client = client or boto3.client("s3")
+        self.part_size = part_size
+        self.max_concurrency = max_concurrency
+        self.extra_args = extra_args or {}
+        self.upload_id: Optional[str] = None
+        self._buffer = bytearray()
+        self._position = 0
+        self._part_number = 0
+        self._pending: List[Future] = []
+        self._parts: List[Dict[str, Any]] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def uri(self) -> str:
+        """S3 URI of the object."""
+        return f"s3://{self.bucket}/{self.key}"
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def write(self, data: Any) -> int:
+        """Buffer bytes, uploading every full part.
+
+        Args:
+            data: Bytes-like object
+
+        Returns:
+            Number of bytes written
+
+        Raises:
+            Exception: The error of a part upload that failed
+        """
+        if self.closed:
+            raise ValueError("I/O operation on closed S3MultipartWriter")
+        self._buffer.extend(data)
+        size = len(memoryview(data))
+        self._position += size
+        while len(self._buffer) >= self.part_size:
+            part = bytes(self._buffer[:self.part_size])
+            del self._buffer[:self.part_size]
+            self._submit(part)
+        return size
+
+    def _collect(self, futures: Any) -> None:
+        """Record finished part uploads, raising the first error."""
+        for future in futures:
+            self._pending.remove(future)
+            self._parts.append(future.result())
+
+    def _submit(self, body: bytes) -> None:
+        """Upload a part on a worker thread once a slot is free."""
+        if self.upload_id is None:
+            response = self.client.create_multipart_upload(Bucket=self.bucket, Key=self.key, **self.extra_args)
+            self.upload_id = response["UploadId"]
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="s3-multipart")
+            logger.info(f"Started multipart upload to {self.uri}")
+        while len(self._pending) >= self.max_concurrency:
+            done, _ = wait(self._pending, return_when=FIRST_COMPLETED)
+            self._collect(done)
+        self._part_number += 1
+        self._pending.append(self._executor.submit(self._upload_part, self._part_number, body))
+
+    def _upload_part(self, part_number: int, body: bytes) -> Dict[str, Any]:
+        """Upload one part."""
+        response = self.client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=part_number,
+            Body=body
+        )
+        return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+    def close(self) -> None:
+        """Upload the remaining bytes and complete the upload.
+
+        Raises:
+            Exception: The error of a failed upload, after aborting it
+        """
+        if self.closed:
+            return
+        try:
+            if self.upload_id is None:
+                self.client.put_object(Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer), **self.extra_args)
+            else:
+                if self._buffer:
+                    self._submit(bytes(self._buffer))
+                self._collect(list(self._pending))
+                self.client.complete_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    UploadId=self.upload_id,
+                    MultipartUpload={"Parts": sorted(self._parts, key=lambda p: p["PartNumber"])}
+                )
+            logger.info(f"Uploaded {self._position} bytes to {self.uri}")
+        except BaseException:
+            self.abort()
+            raise
+        finally:
+            self._buffer = bytearray()
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+            super().close()
+
+    def abort(self) -> None:
+        """Abort the multipart upload, discarding every uploaded part."""
+        for future in self._pending:
+            future.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        if self.upload_id is not None:
+            try:
+                self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+                logger.warning(f"Aborted multipart upload to {self.uri}")
+            except Exception as e:
+                logger.error(f"Failed to abort multipart upload to {self.uri}: {str(e)}")
+            self.upload_id = None
+        self._pending = []
+        self._buffer = bytearray()
+        super().close()
+
+    def __del__(self) -> None:
+        # Never complete an upload that was abandoned without close()
+        if not self.closed and getattr(self, "upload_id", None) is not None:
+            self.abort()
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
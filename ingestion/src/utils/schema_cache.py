@@ -0,0 +1,188 @@
+"""On-disk cache of GraphQL schemas.
+
+Introspection responses are stored as JSON files keyed by endpoint URL so
+clients can validate queries locally without introspecting the endpoint on
+every start-up.
+
+Refresh the cached schema explicitly with:
+    python -m ingestion.utils.schema_cache --refresh
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from gql import Client
+from graphql import GraphQLSchema, build_client_schema
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "/tmp/graphql_schema_cache"
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+
+
+class SchemaCache:
+    """Caches GraphQL introspection results on disk with a TTL.
+
+    Example:
+        cache = SchemaCache(ttl_seconds=3600)
+        schema = cache.load_schema(graphql_url)
+        if schema is None:
+            schema = cache.refresh(graphql_url, transport)
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Union[str, Path]] = None,
+        ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS
+    ):
+        """Initialize the schema cache.
+
+        Args:
+            cache_dir: Directory holding cached schemas, defaults to
+                GRAPHQL_SCHEMA_CACHE_DIR or /tmp/graphql_schema_cache
+            ttl_seconds: Age after which a cached schema is ignored, None to never expire
+        """
+        self.cache_dir = Path(
+            cache_dir or os.environ.get("GRAPHQL_SCHEMA_CACHE_DIR", DEFAULT_CACHE_DIR)
+        )
+        self.ttl_seconds = ttl_seconds
+
+    def _path(self, url: str) -> Path:
+        """Get the cache file path for an endpoint."""
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+        return self.cache_dir / f"{digest}.json"
+
+    def load_introspection(self, url: str) -> Optional[Dict[str, Any]]:
+        """Load a cached introspection result.
+
+        Args:
+            url: GraphQL endpoint URL
+
+        Returns:
+            Introspection result, or None if missing, expired or unreadable
+        """
+        path = self._path(url)
+        try:
+            entry = json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable schema cache {path}: {str(e)}")
+            return None
+
+        age = time.time() - entry.get("fetched_at", 0)
+        if self.ttl_seconds is not None and age > self.ttl_seconds:
+            logger.info(f"Cached schema for {url} expired {age - self.ttl_seconds:.0f}s ago")
+            return None
+        return entry.get("introspection")
+
+    def load_schema(self, url: str) -> Optional[GraphQLSchema]:
+        """Load a cached schema.
+
+        Args:
+            url: GraphQL endpoint URL
+
+        Returns:
+            Schema built from the cached introspection, or None if not cached
+        """
+        introspection = self.load_introspection(url)
+        if introspection is None:
+            return None
+        try:
+            return build_client_schema(introspection)
+        except Exception as e:
+            logger.warning(f"Ignoring invalid cached schema for {url}: {str(e)}")
+            return None
+
+    def save(self, url: str, introspection: Dict[str, Any]) -> Path:
+        """Store an introspection result.
+
+        The file is written to a temporary path and renamed so concurrent
+        readers never see a partially written schema.
+
+        Args:
+            url: GraphQL endpoint URL
+            introspection: Introspection query result
+
+        Returns:
+            Path of the cache file
+        """
+        path = self._path(url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {"url": url, "fetched_at": time.time(), "introspection": introspection}
+
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(entry))
+        tmp_path.replace(path)
+        return path
+
+    def refresh(self, url: str, transport: Any) -> GraphQLSchema:
+        """Introspect the endpoint and store the result.
+
+        Args:
+            url: GraphQL endpoint URL
+            transport: Synchronous gql transport connected to the endpoint
+
+        Returns:
+            Freshly introspected schema
+        """
+        client = Client(transport=transport, fetch_schema_from_transport=True)
+        with client:
+            pass
+
+        path = self.save(url, client.introspection)
+        logger.info(f"Cached schema for {url} in {path}")
+        return client.schema
+
+    def invalidate(self, url: str) -> None:
+        """Remove the cached schema for an endpoint.
+
+        Args:
+            url: GraphQL endpoint URL
+        """
+        self._path(url).unlink(missing_ok=True)
+
+
+def main() -> None:
+    """Refresh the cached schema of the endpoint configured in the environment."""
+    from ingestion.utils.graphql_client import GraphQLOAuthClient
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--refresh", action="store_true", help="Re-introspect and store the schema")
+    parser.add_argument("--invalidate", action="store_true", help="Remove the cached schema")
+    parser.add_argument("--cache-dir", help="Schema cache directory")
+    args = parser.parse_args()
+
+    cache = SchemaCache(cache_dir=args.cache_dir)
+    url = os.environ["GRAPHQL_URL"]
+
+    if args.invalidate:
+        cache.invalidate(url)
+        logger.info(f"Removed cached schema for {url}")
+
+    if args.refresh:
+        client = GraphQLOAuthClient(
+            graphql_url=url,
+            token_url=os.environ["AUTH_URL"],
+            client_id=os.environ["CLIENT_ID"],
+            client_secret=os.environ["CLIENT_SECRET"],
+            scope=os.environ.get("SCOPE"),
+            schema_cache=cache
+        )
+        client.refresh_schema()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        main()
+    except Exception as e:
+        logger.error(f"Failed to refresh schema cache: {str(e)}")
+        sys.exit(1)
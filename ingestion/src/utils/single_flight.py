@@ -0,0 +1,131 @@
+"""Deduplication of identical requests that are in flight at the same time."""
+
+import copy
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class _Call:
+    """A request in flight on a thread, awaited by duplicate callers."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Runs a function once per key among concurrent callers.
+
+    The first caller for a key runs the request; callers arriving while it
+    is in flight wait for its outcome instead of sending their own. Waiting
+    callers get a deep copy of the result, so no caller can mutate another
+    caller's data. Once the request completes the key is forgotten, so later
+    calls run again.
+
+    Example:
+        flights = SingleFlight.default()
+        result = flights.do(key, lambda: client.execute(query))
+        result = await flights.do_async(key, lambda: client.post(payload))
+    """
+
+    _default: Optional["SingleFlight"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._tasks: Dict[Tuple[asyncio.AbstractEventLoop, str], asyncio.Task] = {}
+        self.deduplicated = 0
+
+    @classmethod
+    def default(cls) -> "SingleFlight":
+        """Get the group shared by every client in the process.
+
+        Returns:
+            Process-wide SingleFlight
+        """
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """Run fn, or wait for the identical call already in flight.
+
+        Args:
+            key: Identity of the request
+            fn: Function running the request
+
+        Returns:
+            Result of fn
+
+        Raises:
+            Exception: The error raised by fn
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.deduplicated += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await fn, or wait for the identical call already in flight.
+
+        The request runs in its own task, so cancelling one caller does not
+        cancel it for the others.
+
+        Args:
+            key: Identity of the request
+            fn: Coroutine function running the request
+
+        Returns:
+            Result of fn
+
+        Raises:
+            Exception: The error raised by fn
+        """
+        task_key = (asyncio.get_running_loop(), key)
+        task = self._tasks.get(task_key)
+        leader = task is None
+        if leader:
+            task = asyncio.ensure_future(fn())
+            self._tasks[task_key] = task
+            task.add_done_callback(lambda t: self._forget(task_key, t))
+        else:
+            self.deduplicated += 1
+
+        result = await asyncio.shield(task)
+        return result if leader else copy.deepcopy(result)
+
+    def _forget(self, task_key: Tuple[asyncio.AbstractEventLoop, str], task: asyncio.Task) -> None:
+        """Drop a finished task, retrieving its error so it is never reported as unhandled."""
+        if self._tasks.get(task_key) is task:
+            del self._tasks[task_key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Deduplicated request failed: {str(task.exception())}")
@@ -1,18 +1,30 @@
 """Data sink implementations."""
 
 import os
-import json
+import asyncio
 import logging
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 from typing import Any, Dict, Optional
 from pathlib import Path
 
+import aioboto3
+from aiobotocore.config import AioConfig
+
+from ingestion.utils import json_codec
+from ingestion.utils.s3_multipart import MIN_PART_SIZE
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class DataSink(ABC):
-    """Abstract base class for data sinks."""
+    """Abstract base class for data sinks.
+    
+    Sinks hold long-lived resources such as connection pools; use them as
+    async context managers, or call close, once every write is done.
+    """
     
     @abstractmethod
     async def write(self, data: Any, key: str):
@@ -23,6 +35,16 @@ class DataSink(ABC):
             key: Key/path to write the data to
         """
         pass
+    
+    async def close(self) -> None:
+        """Release the sink's resources."""
+        pass
+    
+    async def __aenter__(self) -> 'DataSink':
+        return self
+    
+    async def __aexit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        await self.close()
         
     @classmethod
     def create(cls, config: Dict[str, Any]) -> 'DataSink':
@@ -43,17 +65,49 @@ class DataSink(ABC):
         else:
             raise ValueError(f"Unsupported sink type: {sink_type}")
 
+def _encode(data: Any) -> bytes:
+    """Encode data for writing, as JSON unless it already is text or bytes."""
+    if isinstance(data, bytes):
+        return data
+    if isinstance(data, str):
+        return data.encode()
+    return json_codec.dumps(data)
+
 class S3Sink(DataSink):
-    """S3 data sink implementation."""
+    """S3 data sink on aioboto3.
     
-    def __init__(self, config: Dict[str, Any]):
+    One client, and with it one connection pool, is opened on the first
+    write and reused by every later write until the sink is closed, so
+    concurrent writes overlap on the network without blocking the event
+    loop. Bodies larger than a multipart part are uploaded in concurrent
+    parts.
+    """
+    
+    def __init__(self, config: Dict[str, Any], session: Optional[aioboto3.Session] = None):
         """Initialize S3 sink.
         
         Args:
-            config: Sink configuration with bucket_url and optional key_prefix
+            config: Sink configuration with bucket_url, optional key_prefix and
+                max_pool_connections
+            session: aioboto3 session, a new one is created when None
         """
         self.bucket = config["bucket_url"]
         self.key_prefix = config.get("key_prefix", "")
+        self.max_pool_connections = config.get("max_pool_connections", 10)
+        self._session = session or aioboto3.Session()
+        self._client = None
+        self._client_context = None
+        self._client_lock = asyncio.Lock()
+    
+    async def _get_client(self) -> Any:
+        """Open the shared client on first use."""
+        async with self._client_lock:
+            if self._client is None:
+                self._client_context = self._session.client(
+                    "s3", config=AioConfig(max_pool_connections=self.max_pool_connections)
+                )
+                self._client = await self._client_context.__aenter__()
+            return self._client
         
     async def write(self, data: Any, key: str):
         """Write data to S3.
@@ -62,25 +116,36 @@ class S3Sink(DataSink):
             data: Data to write
             key: S3 key suffix
         """
-        import boto3
-        s3 = boto3.client("s3")
+        client = await self._get_client()
         
         # Construct full key
-        full_key = f"{self.key_prefix}/{key}" if self.key_prefix else key
+        full_key = (f"{self.key_prefix}/{key}" if self.key_prefix else key).lstrip("/")
         
         # Convert data to JSON if needed
-        if not isinstance(data, (str, bytes)):
-            data = json.dumps(data, indent=2)
+        body = data if isinstance(data, bytes) else await asyncio.to_thread(_encode, data)
             
         logger.info(f"Writing to S3: {self.bucket}/{full_key}")
-        s3.put_object(
-            Bucket=self.bucket,
-            Key=full_key.lstrip("/"),
-            Body=data
-        )
+        if len(body) > MIN_PART_SIZE:
+            await client.upload_fileobj(BytesIO(body), self.bucket, full_key)
+        else:
+            await client.put_object(Bucket=self.bucket, Key=full_key, Body=body)
+    
+    async def close(self) -> None:
+        """Close the shared client and its connection pool."""
+        async with self._client_lock:
+            if self._client_context is not None:
+                await self._client_context.__aexit__(None, None, None)
+            self._client = None
+            self._client_context = None
 
 class LocalSink(DataSink):
-    """Local filesystem data sink for testing."""
+    """Local filesystem data sink for testing.
+    
+    Encoding and file writes run on a bounded thread pool shared by every
+    local sink, so they do not block the event loop.
+    """
+    
+    _executor: Optional[ThreadPoolExecutor] = None
     
     def __init__(self, config: Dict[str, Any]):
         """Initialize local sink.
@@ -93,6 +158,20 @@ class LocalSink(DataSink):
         
         # Create base directory if it doesn't exist
         self.base_path.mkdir(parents=True, exist_ok=True)
+    
+    @classmethod
+    def executor(cls) -> ThreadPoolExecutor:
+        """Get the thread pool shared by local sinks.
+        
+        Returns:
+            Thread pool sized by LOCAL_SINK_WORKERS, 4 by default
+        """
+        if cls._executor is None:
+            cls._executor = ThreadPoolExecutor(
+                max_workers=int(os.environ.get("LOCAL_SINK_WORKERS", "4")),
+                thread_name_prefix="local-sink"
+            )
+        return cls._executor
         
     async def write(self, data: Any, key: str):
         """Write data to local filesystem.
@@ -107,12 +186,11 @@ class LocalSink(DataSink):
             full_path = full_path / self.key_prefix
         full_path = full_path / key.lstrip("/")
         
-        # Create parent directories
-        full_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        # Convert data to JSON if needed
-        if not isinstance(data, (str, bytes)):
-            data = json.dumps(data, indent=2)
-            
         logger.info(f"Writing to local file: {full_path}")
-        full_path.write_text(data)
+        await asyncio.get_running_loop().run_in_executor(self.executor(), self._write_file, full_path, data)
+    
+    @staticmethod
+    def _write_file(full_path: Path, data: Any) -> None:
+        """Encode and write a file on a worker thread."""
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_bytes(_encode(data))
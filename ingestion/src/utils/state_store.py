@@ -0,0 +1,177 @@
+"""Persistent key/value state shared between ingestion runs."""
+
+import os
+import json
+import fcntl
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_PATH = "/tmp/ingestion_state"
+
+
+class StateStore(ABC):
+    """Abstract base class for run state stores.
+
+    Values must be JSON serializable.
+    """
+
+    @abstractmethod
+    def get(self, key: str, default: Any = None) -> Any:
+        """Read a value.
+
+        Args:
+            key: State key
+            default: Value returned when the key is not set
+
+        Returns:
+            Stored value or default
+        """
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        """Write a value.
+
+        Args:
+            key: State key
+            value: JSON serializable value
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove a value if it exists.
+
+        Args:
+            key: State key
+        """
+        pass
+
+    @classmethod
+    def create(cls, config: Dict[str, Any]) -> 'StateStore':
+        """Create a state store based on configuration.
+
+        Args:
+            config: Store configuration with type ('json' or 'sqlite') and optional path
+
+        Returns:
+            StateStore instance
+
+        Raises:
+            ValueError: If the store type is not supported
+        """
+        store_type = config.get("type", "sqlite")
+        path = config.get("path") or os.environ.get("INGESTION_STATE_PATH", DEFAULT_STATE_PATH)
+
+        if store_type == "json":
+            return JSONStateStore(path if str(path).endswith(".json") else f"{path}.json")
+        elif store_type == "sqlite":
+            return SQLiteStateStore(path if str(path).endswith(".db") else f"{path}.db")
+        else:
+            raise ValueError(f"Unsupported state store type: {store_type}")
+
+
+class JSONStateStore(StateStore):
+    """State kept in a single JSON file, locked for concurrent writers."""
+
+    def __init__(self, path: Union[str, Path]):
+        """Initialize the store.
+
+        Args:
+            path: JSON file holding every key
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the in-process lock and an exclusive lock on the state file."""
+        with self._lock, open(self.path.with_suffix(".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self) -> Dict[str, Any]:
+        """Read every key."""
+        try:
+            return json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return {}
+
+    def _write(self, state: Dict[str, Any]) -> None:
+        """Replace the file atomically."""
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(state, indent=2, sort_keys=True))
+        tmp_path.replace(self.path)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._locked():
+            return self._read().get(key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        with self._locked():
+            state = self._read()
+            state[key] = value
+            self._write(state)
+
+    def delete(self, key: str) -> None:
+        with self._locked():
+            state = self._read()
+            if state.pop(key, None) is not None:
+                self._write(state)
+
+
+class SQLiteStateStore(StateStore):
+    """State kept in a SQLite database, safe for concurrent processes."""
+
+    def __init__(self, path: Union[str, Path]):
+        """Initialize the store.
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS state ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection committing on success."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, key: str, value: Any) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO state (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = CURRENT_TIMESTAMP",
+                (key, json.dumps(value))
+            )
+
+    def delete(self, key: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM state WHERE key = ?", (key,))
@@ -0,0 +1,239 @@
+"""OAuth2 token caching with proactive refresh."""
+
+import os
+import json
+import time
+import fcntl
+import asyncio
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Set, Union
+
+logger = logging.getLogger(__name__)
+
+Token = Dict[str, Any]
+
+
+class OAuthTokenManager:
+    """Caches an OAuth2 token and refreshes it before it expires.
+
+    Concurrent callers share a single refresh: threads wait on a lock and
+    coroutines await the same refresh task. When a cache file is configured,
+    the token is also shared between processes on the same host; the file is
+    guarded by an exclusive lock so only one process fetches a new token.
+
+    Async callers get the current token immediately while it is still valid
+    and a background refresh is started once it enters the refresh window,
+    which keeps token fetches off the critical path of most requests.
+
+    Example:
+        manager = OAuthTokenManager(cache_path=OAuthTokenManager.default_cache_path(url, client_id))
+        token = manager.get_token(fetch_token)
+        token = await manager.get_token_async(fetch_token_async)
+    """
+
+    def __init__(
+        self,
+        refresh_margin: float = 300.0,
+        min_validity: float = 30.0,
+        cache_path: Optional[Union[str, Path]] = None
+    ):
+        """Initialize the token manager.
+
+        Args:
+            refresh_margin: Seconds before expiry at which a token is refreshed
+            min_validity: Seconds of validity below which async callers wait for
+                the refresh instead of using the current token
+            cache_path: Optional JSON file used to share the token between processes
+        """
+        self.refresh_margin = refresh_margin
+        self.min_validity = min(min_validity, refresh_margin)
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.token: Optional[Token] = None
+        self._lock = threading.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._rejected: Set[str] = set()
+
+    @staticmethod
+    def default_cache_path(token_url: str, client_id: str) -> Optional[Path]:
+        """Get the shared cache file for a token endpoint and client.
+
+        Args:
+            token_url: OAuth2 token endpoint URL
+            client_id: OAuth2 client ID
+
+        Returns:
+            Path inside OAUTH_TOKEN_CACHE_DIR, or None if the variable is not set
+        """
+        cache_dir = os.environ.get("OAUTH_TOKEN_CACHE_DIR")
+        if not cache_dir:
+            return None
+        digest = hashlib.sha256(f"{token_url}|{client_id}".encode("utf-8")).hexdigest()[:32]
+        return Path(cache_dir) / f"token_{digest}.json"
+
+    def _remaining(self, token: Optional[Token]) -> float:
+        """Seconds until a token expires, infinite if it has no expiry."""
+        if not token or token.get("access_token") in self._rejected:
+            return float("-inf")
+        expires_at = token.get("expires_at")
+        if expires_at is None:
+            return float("inf")
+        return float(expires_at) - time.time()
+
+    def _is_fresh(self, token: Optional[Token]) -> bool:
+        """Check whether a token is outside the refresh window."""
+        return self._remaining(token) > self.refresh_margin
+
+    @staticmethod
+    def _normalize(token: Token) -> Token:
+        """Add an absolute expiry to a token response that only has expires_in."""
+        token = dict(token)
+        if token.get("expires_at") is None and token.get("expires_in") is not None:
+            token["expires_at"] = time.time() + float(token["expires_in"])
+        return token
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Hold an exclusive lock on the cache file."""
+        if self.cache_path is None:
+            yield
+            return
+        lock_file = self._acquire_file_lock()
+        try:
+            yield
+        finally:
+            self._release_file_lock(lock_file)
+
+    def _read_cache(self) -> Optional[Token]:
+        """Read the token shared by other processes, if any."""
+        if self.cache_path is None:
+            return None
+        try:
+            return json.loads(self.cache_path.read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable token cache {self.cache_path}: {str(e)}")
+            return None
+
+    def _write_cache(self, token: Token) -> None:
+        """Share a token with other processes."""
+        if self.cache_path is None:
+            return
+        tmp_path = self.cache_path.with_suffix(f".{os.getpid()}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(token, f)
+        tmp_path.replace(self.cache_path)
+
+    def _load_shared(self) -> Optional[Token]:
+        """Adopt a fresh token from the cache file, if one exists."""
+        cached = self._read_cache()
+        if self._is_fresh(cached):
+            self.token = cached
+            return cached
+        return None
+
+    def _store(self, token: Token) -> Token:
+        """Normalize, remember and share a newly fetched token."""
+        self.token = self._normalize(token)
+        self._write_cache(self.token)
+        logger.info("Fetched new OAuth token")
+        return self.token
+
+    def get_token(self, fetch_token: Callable[[], Token]) -> Token:
+        """Get a valid token, refreshing it if it is close to expiry.
+
+        Args:
+            fetch_token: Function fetching a new token from the token endpoint
+
+        Returns:
+            OAuth2 token information
+        """
+        if self._is_fresh(self.token):
+            return self.token
+
+        with self._lock:
+            if self._is_fresh(self.token) or self._load_shared():
+                return self.token
+            with self._file_lock():
+                if self._load_shared():
+                    return self.token
+                return self._store(fetch_token())
+
+    async def _refresh_async(self, fetch_token: Callable[[], Awaitable[Token]]) -> Token:
+        """Refresh the token, holding the cache file lock while fetching."""
+        if self.cache_path is None:
+            return self._store(await fetch_token())
+
+        lock_file = await asyncio.to_thread(self._acquire_file_lock)
+        try:
+            if await asyncio.to_thread(self._load_shared):
+                return self.token
+            token = await fetch_token()
+            await asyncio.to_thread(self._store, token)
+            return self.token
+        finally:
+            await asyncio.to_thread(self._release_file_lock, lock_file)
+
+    def _acquire_file_lock(self) -> Any:
+        """Open and exclusively lock the cache lock file."""
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.cache_path.with_suffix(".lock"), "w")
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    @staticmethod
+    def _release_file_lock(lock_file: Any) -> None:
+        """Unlock and close the cache lock file."""
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+    @staticmethod
+    def _log_refresh_failure(task: asyncio.Task) -> None:
+        """Log a failed refresh so background failures are not lost."""
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Failed to refresh OAuth token: {str(task.exception())}")
+
+    async def get_token_async(self, fetch_token: Callable[[], Awaitable[Token]]) -> Token:
+        """Get a valid token without blocking the event loop.
+
+        Args:
+            fetch_token: Coroutine function fetching a new token
+
+        Returns:
+            OAuth2 token information
+        """
+        if self._is_fresh(self.token):
+            return self.token
+        if self.token is None and self.cache_path is not None:
+            if await asyncio.to_thread(self._load_shared):
+                return self.token
+
+        loop = asyncio.get_running_loop()
+        task = self._refresh_task
+        if task is None or task.done() or task.get_loop() is not loop:
+            task = self._refresh_task = loop.create_task(self._refresh_async(fetch_token))
+            task.add_done_callback(self._log_refresh_failure)
+
+        if self._remaining(self.token) > self.min_validity:
+            return self.token
+        return await task
+
+    def invalidate(self, token: Optional[Token] = None) -> None:
+        """Forget a token the server rejected.
+
+        Args:
+            token: Rejected token, defaults to the current token. A token that
+                was already replaced by a newer one is left alone.
+        """
+        token = token or self.token
+        if token and token.get("access_token"):
+            self._rejected.add(token["access_token"])
+        if self.token is token or (
+            self.token and token and self.token.get("access_token") == token.get("access_token")
+        ):
+            self.token = None
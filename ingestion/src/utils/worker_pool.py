@@ -0,0 +1,162 @@
+"""Bounded pool of async workers fanning one operation out over many items."""
+
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from gql.transport.exceptions import TransportServerError
+
+from ingestion.utils.retry import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+# Item outcomes
+PENDING = "pending"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+def is_fatal_error(error: BaseException) -> bool:
+    """Check whether an error means no other item can succeed either.
+
+    Args:
+        error: Exception raised for an item
+
+    Returns:
+        True for rejected credentials and open circuits
+    """
+    if isinstance(error, CircuitOpenError):
+        return True
+    return isinstance(error, TransportServerError) and error.code in (401, 403)
+
+
+@dataclass
+class ItemResult:
+    """Outcome of one item of a fan-out."""
+    index: int
+    item: Any
+    status: str = PENDING
+    result: Any = None
+    error: Optional[BaseException] = None
+    duration: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the outcome to a JSON serializable report.
+
+        Returns:
+            Dict with the item, its status and either its result or its error
+        """
+        report = {"index": self.index, "item": self.item, "status": self.status, "duration": round(self.duration, 3)}
+        if self.status == SUCCEEDED:
+            report["result"] = self.result
+        elif self.error is not None:
+            report["error"] = f"{type(self.error).__name__}: {str(self.error)}"
+        return report
+
+
+class _Abort(Exception):
+    """Stops every worker after a fatal error."""
+
+    def __init__(self, error: BaseException):
+        super().__init__(str(error))
+        self.error = error
+
+
+class WorkerPool:
+    """Runs an async function over many items with at most ``max_workers`` in flight.
+
+    Workers pull items from a shared queue inside a TaskGroup. An item that
+    fails is reported and the others carry on, unless the error is fatal
+    (or ``fail_fast`` is set), in which case every running item is cancelled
+    and the items not started yet are reported as cancelled.
+
+    Example:
+        pool = WorkerPool(max_workers=8)
+        results = await pool.run(organisation_ids, lambda id: client.execute_query(query, {"id": id}))
+        if pool.fatal_error:
+            raise pool.fatal_error
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 5,
+        fail_fast: bool = False,
+        is_fatal: Callable[[BaseException], bool] = is_fatal_error
+    ):
+        """Initialize the pool.
+
+        Args:
+            max_workers: Maximum number of items processed at the same time
+            fail_fast: Cancel the remaining items after any failure
+            is_fatal: Decide whether an error cancels the remaining items
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be positive")
+        self.max_workers = max_workers
+        self.fail_fast = fail_fast
+        self.is_fatal = is_fatal
+        self.fatal_error: Optional[BaseException] = None
+
+    async def _worker(self, queue: "asyncio.Queue[ItemResult]", fn: Callable[[Any], Awaitable[Any]]) -> None:
+        """Process items until the queue is empty."""
+        while not queue.empty():
+            outcome = queue.get_nowait()
+            start = time.monotonic()
+            try:
+                outcome.result = await fn(outcome.item)
+                outcome.status = SUCCEEDED
+            except asyncio.CancelledError:
+                outcome.status = CANCELLED
+                raise
+            except Exception as e:
+                outcome.status = FAILED
+                outcome.error = e
+                logger.warning(f"Item {outcome.index} failed: {str(e)}")
+                if self.fail_fast or self.is_fatal(e):
+                    raise _Abort(e)
+            finally:
+                outcome.duration = time.monotonic() - start
+
+    async def run(self, items: Iterable[Any], fn: Callable[[Any], Awaitable[Any]]) -> List[ItemResult]:
+        """Run fn over every item.
+
+        Args:
+            items: Items to process
+            fn: Coroutine function processing one item
+
+        Returns:
+            Outcome of each item, in item order
+        """
+        self.fatal_error = None
+        outcomes = [ItemResult(index, item) for index, item in enumerate(items)]
+        queue: "asyncio.Queue[ItemResult]" = asyncio.Queue()
+        for outcome in outcomes:
+            queue.put_nowait(outcome)
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                for _ in range(min(self.max_workers, len(outcomes))):
+                    group.create_task(self._worker(queue, fn))
+        except* _Abort as aborted:
+            self.fatal_error = aborted.exceptions[0].error
+            for outcome in outcomes:
+                if outcome.status == PENDING:
+                    outcome.status = CANCELLED
+            logger.error(f"Fan-out cancelled after fatal error: {str(self.fatal_error)}")
+
+        return outcomes
+
+
+def summarize(outcomes: List[ItemResult]) -> Dict[str, int]:
+    """Count the outcomes of a fan-out by status.
+
+    Args:
+        outcomes: Item outcomes
+
+    Returns:
+        Number of succeeded, failed and cancelled items
+    """
+    return {status: sum(1 for o in outcomes if o.status == status) for status in (SUCCEEDED, FAILED, CANCELLED)}
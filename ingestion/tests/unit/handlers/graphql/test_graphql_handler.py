@@ -15,8 +15,12 @@ import yaml
 # Set up logger
 logger = logging.getLogger(__name__)
 
-from ingestion.handlers.graphql.graphql_handler import GraphQLHandler, GraphQLConfig, GraphQLError, NetworkError, ValidationError
+from ingestion.handlers.graphql.graphql_handler import GraphQLHandler, GraphQLConfig, GraphQLError, NetworkError, ValidationError, RetryConfig
 from ingestion.utils.graphql_client import GraphQLOAuthClient
+from ingestion.utils.incremental import IncrementalSync
+from ingestion.utils.response_cache import FRESH, ResponseCache
+from ingestion.utils.retry import DEFAULT_POLICIES, RATE_LIMITED, TIMEOUT, RetryPolicy
+from ingestion.utils.state_store import StateStore
 from observability.tracking.job_metrics import JobMetricsTracker
 
 SUCCESSFUL_QUERY = '''
@@ -484,3 +488,125 @@ def test_graphql_config_validation(mock_boto3, mock_client_class, mock_metrics_c
         with patch.dict(os.environ, mock_env):
             GraphQLHandler(invalid_rate_config)
     assert any("requests_per_second" in str(error['msg']) for error in exc_info.value.errors())
+
+
+class CachedPagesClient:
+    """Fake async client answering pages through a response cache, slowly on refresh."""
+
+    def __init__(self, cache, total_count=4):
+        self.cache = cache
+        self.total_count = total_count
+        self.fetches = 0
+
+    async def execute_query(self, query, variables):
+        async def fetch():
+            self.fetches += 1
+            fetch_number = self.fetches
+            # Background refreshes are slow enough to outlive an unguarded event loop
+            await asyncio.sleep(0.05 if fetch_number > 1 else 0)
+            start = (variables['page'] - 1) * variables['per']
+            end = min(start + variables['per'], self.total_count)
+            athletes = [{'id': i, 'fetch': fetch_number} for i in range(start, end)]
+            return {'data': {'organisationAthletes': {'totalCount': self.total_count, 'athletes': athletes}}}
+
+        return await self.cache.get_or_fetch_async('https://api.example.com/graphql', query, variables, fetch)
+
+
+def paged_handler(graphql_config_success, client, response_cache=None, tmp_path=None):
+    """Create a handler over a fake async client without touching AWS."""
+    handler = object.__new__(GraphQLHandler)
+    handler.temp_config_file = None
+    handler.data_dir = Path(tmp_path or '/nonexistent') / 'data'
+    handler.config = GraphQLConfig(**{**graphql_config_success, 'pagination': {
+        'total_count_path': 'data.organisationAthletes.totalCount',
+        'items_path': 'data.organisationAthletes.athletes'
+    }})
+    handler.async_client = client
+    handler.response_cache = response_cache
+    return handler
+
+
+def test_merged_pages_leave_cached_pages_untouched(graphql_config_success):
+    """Test merging pages never grows the cached first page across runs."""
+    cache = ResponseCache(ttl=60)
+    handler = paged_handler(graphql_config_success, CachedPagesClient(cache), cache)
+
+    first = asyncio.run(handler._fetch_all_pages(SUCCESSFUL_QUERY, {'id': 78, 'page': 1, 'per': 2}))
+    second = asyncio.run(handler._fetch_all_pages(SUCCESSFUL_QUERY, {'id': 78, 'page': 1, 'per': 2}))
+
+    assert [a['id'] for a in first['data']['organisationAthletes']['athletes']] == [0, 1, 2, 3]
+    assert second == first
+
+
+def test_stale_refresh_completes_within_handler_run(graphql_config_success):
+    """Test a stale-while-revalidate refresh finishes before the run's event loop closes."""
+    cache = ResponseCache(ttl=0.01, stale_ttl=60)
+    client = CachedPagesClient(cache, total_count=2)
+    handler = paged_handler(graphql_config_success, client, cache)
+    variables = {'id': 78, 'page': 1, 'per': 2}
+
+    asyncio.run(handler._fetch_all_pages(SUCCESSFUL_QUERY, variables))
+    time.sleep(0.02)
+    stale = asyncio.run(handler._fetch_all_pages(SUCCESSFUL_QUERY, variables))
+
+    assert stale['data']['organisationAthletes']['athletes'][0]['fetch'] == 1
+    state, refreshed = cache.lookup(cache.make_key('https://api.example.com/graphql', SUCCESSFUL_QUERY, variables))
+    assert state == FRESH
+    assert refreshed['data']['organisationAthletes']['athletes'][0]['fetch'] == 2
+
+
+class FanOutClient:
+    """Fake async client failing the fan-out item of one organisation."""
+
+    async def execute_query(self, query, variables):
+        if variables['id'] == 2:
+            return {'errors': [{'message': 'organisation unavailable'}]}
+        athletes = [{'id': variables['id'], 'updatedAt': f"2024-01-0{variables['id']}"}]
+        return {'data': {'organisationAthletes': {'athletes': athletes}}}
+
+
+def test_partial_fan_out_does_not_advance_watermark(graphql_config_success, tmp_path):
+    """Test a fan-out with a failed entity keeps the watermark so its records are fetched again."""
+    store = StateStore.create({'type': 'json', 'path': str(tmp_path / 'state')})
+    handler = object.__new__(GraphQLHandler)
+    handler.temp_config_file = None
+    handler.data_dir = tmp_path / 'data'
+    handler.config = GraphQLConfig(**{
+        **graphql_config_success,
+        'fan_out': {'variable_sets': [{'id': 1}, {'id': 2}, {'id': 3}], 'fail_fast': False},
+        'incremental': {
+            'cursor_field': 'updatedAt',
+            'filter_variable': 'updatedSince',
+            'items_path': 'data.organisationAthletes.athletes'
+        }
+    })
+    handler.async_client = FanOutClient()
+    handler.response_cache = None
+    handler.checkpoint = None
+    handler.checkpoint_store = None
+    handler.job_metrics = MagicMock()
+    handler.rate_limiter = MagicMock()
+    handler.concurrency = MagicMock()
+    handler.incremental = IncrementalSync(
+        store, 'athletes', cursor_field='updatedAt', filter_variable='updatedSince', initial_value='2023-12-31'
+    )
+    handler.incremental_items_path = 'data.organisationAthletes.athletes'
+
+    result = handler.execute()
+
+    assert result['summary'] == {'succeeded': 2, 'failed': 1, 'cancelled': 0}
+    assert store.get('athletes') is None
+    assert handler.job_metrics.end.call_args.kwargs['status'] == 'partial'
+
+
+def test_retry_config_overrides_only_given_settings():
+    """Test retry settings override the per-error-class defaults field by field."""
+    assert RetryConfig().policies() is None
+
+    policies = RetryConfig(max_attempts=2).policies()
+    assert policies[RATE_LIMITED] == RetryPolicy(max_attempts=2, base_delay=1.0, max_delay=60.0)
+    assert policies[TIMEOUT] == RetryPolicy(max_attempts=2)
+
+    policies = RetryConfig(max_delay=10.0).policies()
+    assert policies[RATE_LIMITED] == RetryPolicy(max_attempts=5, base_delay=1.0, max_delay=10.0)
+    assert DEFAULT_POLICIES[RATE_LIMITED].max_delay == 60.0
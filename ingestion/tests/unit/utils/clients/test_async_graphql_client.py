@@ -0,0 +1,241 @@
+"""Tests for the asynchronous GraphQL client."""
+
+import asyncio
+import json
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from gql.transport.exceptions import TransportQueryError
+
+from ingestion.utils.concurrency import AdaptiveConcurrencyController
+from ingestion.utils.graphql_client import AsyncGraphQLOAuthClient, GraphQLHTTPError
+from ingestion.utils.retry import GRAPHQL_TRANSIENT, RATE_LIMITED, Retrier, RetryPolicy
+from ingestion.utils.single_flight import SingleFlight
+
+
+def make_app(calls):
+    """Create a fake OAuth + GraphQL server recording every request."""
+    async def token(request):
+        calls.append('token')
+        return web.json_response({'access_token': 'abc', 'expires_in': 3600})
+
+    async def graphql(request):
+        calls.append('graphql')
+        assert request.headers['Authorization'] == 'Bearer abc'
+        body = await request.json()
+        if 'throttled' in body['query']:
+            return web.json_response({}, status=429, headers={'Retry-After': '0.05'})
+        if 'flaky' in body['query'] and calls.count('graphql') == 1:
+            error = {'message': 'slow down', 'extensions': {'code': 'THROTTLED'}}
+            return web.json_response({'data': None, 'errors': [error]})
+        if 'broken' in body['query']:
+            return web.json_response({'data': None, 'errors': [{'message': 'boom'}]})
+        if 'athletes' in body['query']:
+            response = web.StreamResponse()
+            await response.prepare(request)
+            await response.write(b'{"data": {"athletes": [')
+            for i in range(3):
+                await response.write((b',' if i else b'') + json.dumps({'id': i}).encode())
+            await response.write(b']}}')
+            return response
+        if 'item' in body['query']:
+            variables = body['variables']
+            data = {f'b{i}_item': {'id': variables[f'id_{i}']} for i in range(len(variables))}
+            return web.json_response({'data': data})
+        return web.json_response({'data': {'echo': body['variables']}})
+
+    app = web.Application()
+    app.router.add_post('/oauth/token', token)
+    app.router.add_post('/graphql', graphql)
+    return app
+
+
+def make_client(server, **kwargs):
+    """Create a client pointed at the fake server."""
+    return AsyncGraphQLOAuthClient(
+        graphql_url=str(server.make_url('/graphql')),
+        token_url=str(server.make_url('/oauth/token')),
+        client_id='id',
+        client_secret='secret',
+        **kwargs
+    )
+
+
+@pytest.mark.asyncio
+async def test_execute_query_returns_data():
+    """Test a query round-trip fetches a token once and wraps the result."""
+    calls = []
+    async with TestServer(make_app(calls)) as server:
+        client = make_client(server)
+        first = await client.execute_query('query { echo }', {'page': 1})
+        second = await client.execute_query('query { echo }', {'page': 2})
+        await AsyncGraphQLOAuthClient.close_pools()
+
+    assert first == {'data': {'echo': {'page': 1}}}
+    assert second == {'data': {'echo': {'page': 2}}}
+    assert calls == ['token', 'graphql', 'graphql']
+
+
+@pytest.mark.asyncio
+async def test_clients_share_connection_pool():
+    """Test clients for the same endpoint and pool settings reuse one session."""
+    async with TestServer(make_app([])) as server:
+        first = make_client(server, limit_per_host=5)
+        second = make_client(server, limit_per_host=5)
+        other = make_client(server)
+        assert first._get_session() is second._get_session()
+        assert first._get_session().connector.limit_per_host == 5
+        assert other._get_session() is not first._get_session()
+        assert other._get_session().connector.limit_per_host == 20
+        await AsyncGraphQLOAuthClient.close_pools()
+
+
+@pytest.mark.asyncio
+async def test_graphql_errors_raise():
+    """Test GraphQL errors in the response body are raised."""
+    async with TestServer(make_app([])) as server:
+        client = make_client(server)
+        with pytest.raises(TransportQueryError, match="boom"):
+            await client.execute_query('query { broken }')
+        await AsyncGraphQLOAuthClient.close_pools()
+
+
+@pytest.mark.asyncio
+async def test_throttled_response_shrinks_concurrency():
+    """Test a 429 surfaces Retry-After and halves the concurrency window."""
+    controller = AdaptiveConcurrencyController(initial_limit=4)
+    async with TestServer(make_app([])) as server:
+        retrier = Retrier(policies={RATE_LIMITED: RetryPolicy(max_attempts=1)})
+        client = make_client(server, concurrency=controller, retrier=retrier)
+        with pytest.raises(GraphQLHTTPError) as exc_info:
+            await client.execute_query('query { throttled }')
+        await AsyncGraphQLOAuthClient.close_pools()
+
+    assert exc_info.value.code == 429
+    assert exc_info.value.retry_after == 0.05
+    assert controller.limit == 2
+
+
+@pytest.mark.asyncio
+async def test_transient_graphql_errors_are_retried():
+    """Test a THROTTLED GraphQL error is retried like the sync client does."""
+    calls = []
+    async with TestServer(make_app(calls)) as server:
+        retrier = Retrier(policies={GRAPHQL_TRANSIENT: RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.01)})
+        client = make_client(server, retrier=retrier)
+        result = await client.execute_query('query { flaky }', {'id': 1})
+        await AsyncGraphQLOAuthClient.close_pools()
+
+    assert result == {'data': {'echo': {'id': 1}}}
+    assert calls.count('graphql') == 2
+
+
+@pytest.mark.asyncio
+async def test_persistent_transient_errors_raise_after_retries():
+    """Test a GraphQL error still raises once its retries are exhausted."""
+    calls = []
+    async with TestServer(make_app(calls)) as server:
+        retrier = Retrier(policies={GRAPHQL_TRANSIENT: RetryPolicy(max_attempts=1)})
+        client = make_client(server, retrier=retrier)
+        with pytest.raises(TransportQueryError, match='slow down'):
+            await client.execute_query('query { flaky }')
+        await AsyncGraphQLOAuthClient.close_pools()
+
+    assert calls.count('graphql') == 1
+
+
+@pytest.mark.asyncio
+async def test_execute_batch_merges_requests():
+    """Test variable sets are merged into aliased requests and split back."""
+    calls = []
+    async with TestServer(make_app(calls)) as server:
+        client = make_client(server)
+        results = await client.execute_batch(
+            'query($id: ID!) { item(id: $id) { id } }',
+            [{'id': str(i)} for i in range(5)],
+            max_batch_size=2
+        )
+        await AsyncGraphQLOAuthClient.close_pools()
+
+    assert results == [{'data': {'item': {'id': str(i)}}} for i in range(5)]
+    assert calls.count('graphql') == 3
+
+
+def make_apq_app(requests):
+    """Create a fake server implementing automatic persisted queries."""
+    store = {}
+
+    async def token(request):
+        return web.json_response({'access_token': 'abc', 'expires_in': 3600})
+
+    async def graphql(request):
+        if request.method == 'GET':
+            body = {k: json.loads(v) for k, v in request.query.items()}
+        else:
+            body = await request.json()
+        requests.append((request.method, 'query' in body))
+        query_hash = body['extensions']['persistedQuery']['sha256Hash']
+        if 'query' in body:
+            store[query_hash] = body['query']
+        if query_hash not in store:
+            return web.json_response({'errors': [{'message': 'PersistedQueryNotFound'}]})
+        return web.json_response({'data': {'echo': body['variables']}})
+
+    app = web.Application()
+    app.router.add_post('/oauth/token', token)
+    app.router.add_route('*', '/graphql', graphql)
+    return app
+
+
+@pytest.mark.asyncio
+async def test_persisted_queries_register_once():
+    """Test the full query is only sent when the hash is unknown."""
+    requests = []
+    async with TestServer(make_apq_app(requests)) as server:
+        client = make_client(server, persisted_queries=True, persisted_query_get=True)
+        first = await client.execute_query('query { echo }', {'page': 1})
+        second = await client.execute_query('query  {  echo  }', {'page': 2})
+        await AsyncGraphQLOAuthClient.close_pools()
+
+    assert first == {'data': {'echo': {'page': 1}}}
+    assert second == {'data': {'echo': {'page': 2}}}
+    assert requests == [('GET', False), ('POST', True), ('GET', False)]
+
+
+@pytest.mark.asyncio
+async def test_stream_items_yields_items():
+    """Test list items are yielded from a streamed response."""
+    async with TestServer(make_app([])) as server:
+        client = make_client(server)
+        items = [item async for item in client.stream_items('query { athletes }', 'data.athletes')]
+        await AsyncGraphQLOAuthClient.close_pools()
+
+    assert items == [{'id': 0}, {'id': 1}, {'id': 2}]
+
+
+@pytest.mark.asyncio
+async def test_stream_consumer_time_is_not_request_latency():
+    """Test a slow stream consumer does not inflate the latency the window adapts to."""
+    controller = AdaptiveConcurrencyController()
+    async with TestServer(make_app([])) as server:
+        client = make_client(server, concurrency=controller)
+        async for _ in client.stream_items('query { athletes }', 'data.athletes'):
+            await asyncio.sleep(0.1)
+        await AsyncGraphQLOAuthClient.close_pools()
+
+    assert controller.in_flight == 0
+    assert controller._latencies[-1] < 0.1
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_queries_are_deduplicated():
+    """Test concurrent identical queries send one request."""
+    calls = []
+    async with TestServer(make_app(calls)) as server:
+        client = make_client(server, single_flight=SingleFlight())
+        results = await asyncio.gather(*[client.execute_query('query { echo }', {'id': 1}) for _ in range(3)])
+        await AsyncGraphQLOAuthClient.close_pools()
+
+    assert results == [{'data': {'echo': {'id': 1}}}] * 3
+    assert calls.count('graphql') == 1
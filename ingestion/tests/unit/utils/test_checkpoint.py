@@ -0,0 +1,53 @@
+"""Tests for extraction checkpoints."""
+
+from ingestion.utils.checkpoint import Checkpoint, task_identity
+from ingestion.utils.state_store import SQLiteStateStore
+
+
+def test_task_identity_is_stable():
+    """Test identical runs share an identity and different runs do not."""
+    identity = task_identity('athletes', {'id': 78, 'per': 100}, 'graphql/athletes')
+
+    assert task_identity('athletes', {'id': 78, 'per': 100}, 'graphql/athletes') == identity
+    assert task_identity('athletes', {'id': 79, 'per': 100}, 'graphql/athletes') != identity
+
+
+def test_progress_survives_restart(tmp_path):
+    """Test a new checkpoint with the same identity resumes recorded progress."""
+    store = SQLiteStateStore(tmp_path / 'state.db')
+    checkpoint = Checkpoint(store, 'task')
+    assert not checkpoint.resumed
+
+    checkpoint.set_total(5)
+    checkpoint.record(1, 'parts/page-1.json')
+    checkpoint.record(3, 'parts/page-3.json', cursor='abc')
+
+    resumed = Checkpoint(store, 'task')
+    assert resumed.resumed
+    assert resumed.total_units == 5
+    assert resumed.cursor == 'abc'
+    assert resumed.is_complete(3)
+    assert resumed.pending(range(1, 6)) == [2, 4, 5]
+    assert resumed.output_keys([1, 3]) == ['parts/page-1.json', 'parts/page-3.json']
+    assert Checkpoint(store, 'other').pending(range(1, 3)) == [1, 2]
+
+
+def test_pending_refetches_missing_outputs(tmp_path):
+    """Test units whose output no longer exists are fetched again."""
+    checkpoint = Checkpoint(SQLiteStateStore(tmp_path / 'state.db'), 'task')
+    checkpoint.record(1, 'kept')
+    checkpoint.record(2, 'lost')
+
+    assert checkpoint.pending([1, 2, 3], exists=lambda key: key == 'kept') == [2, 3]
+
+
+def test_clear_forgets_progress(tmp_path):
+    """Test a cleared checkpoint starts from scratch."""
+    store = SQLiteStateStore(tmp_path / 'state.db')
+    checkpoint = Checkpoint(store, 'task')
+    checkpoint.set_total(2)
+    checkpoint.record(1, 'parts/page-1.json')
+
+    checkpoint.clear()
+
+    assert not Checkpoint(store, 'task').resumed
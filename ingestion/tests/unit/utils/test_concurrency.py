@@ -0,0 +1,115 @@
+"""Tests for the adaptive concurrency controller."""
+
+import asyncio
+import time
+
+import pytest
+
+from ingestion.utils.concurrency import AdaptiveConcurrencyController, parse_retry_after
+from ingestion.utils.metrics import MetricsCollector
+
+
+class OverloadedError(Exception):
+    """Stands in for a 429 response."""
+
+
+async def run_request(controller, delay=0.0, overloaded=False, retry_after=None):
+    """Run one fake request through the controller."""
+    async with controller.slot() as slot:
+        await asyncio.sleep(delay)
+        if overloaded:
+            slot.mark_overloaded(retry_after)
+            raise OverloadedError()
+
+
+def test_parse_retry_after():
+    """Test delay-seconds and HTTP-date Retry-After values."""
+    assert parse_retry_after('2.5') == 2.5
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('not a date') is None
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+
+
+@pytest.mark.asyncio
+async def test_window_grows_on_success():
+    """Test the window grows additively while requests succeed."""
+    metrics = MetricsCollector()
+    controller = AdaptiveConcurrencyController(initial_limit=2, max_limit=8, metrics=metrics)
+
+    for _ in range(20):
+        await run_request(controller)
+
+    assert controller.limit > 2
+    values = [v['value'] for v in metrics.get_metrics()['graphql_concurrency_limit']['values']]
+    assert values[0] == 2 and values[-1] == controller.limit
+
+
+@pytest.mark.asyncio
+async def test_overload_halves_window_once_per_generation():
+    """Test concurrent 429s from the same generation halve the window once."""
+    controller = AdaptiveConcurrencyController(initial_limit=8, max_limit=8)
+
+    results = await asyncio.gather(
+        *[run_request(controller, delay=0.01, overloaded=True) for _ in range(8)],
+        return_exceptions=True
+    )
+
+    assert all(isinstance(r, OverloadedError) for r in results)
+    assert controller.limit == 4
+
+
+@pytest.mark.asyncio
+async def test_in_flight_requests_are_bounded():
+    """Test no more than the window of requests run at once."""
+    controller = AdaptiveConcurrencyController(initial_limit=3, max_limit=3)
+    peak = 0
+
+    async def request():
+        nonlocal peak
+        async with controller.slot():
+            peak = max(peak, controller.in_flight)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*[request() for _ in range(10)])
+
+    assert peak == 3
+    assert controller.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_new_requests():
+    """Test Retry-After delays requests admitted after an overload."""
+    controller = AdaptiveConcurrencyController(initial_limit=2)
+
+    with pytest.raises(OverloadedError):
+        await run_request(controller, overloaded=True, retry_after=0.1)
+
+    start = time.monotonic()
+    await run_request(controller)
+    assert time.monotonic() - start >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_latency_spike_shrinks_window():
+    """Test a p95 latency spike halves the window."""
+    controller = AdaptiveConcurrencyController(
+        initial_limit=8, max_limit=8, latency_window=10, latency_spike_factor=2.0
+    )
+    for _ in range(10):
+        await run_request(controller, delay=0.001)
+
+    for _ in range(10):
+        await run_request(controller, delay=0.03)
+
+    assert controller.limit < 8
+
+
+@pytest.mark.asyncio
+async def test_excluded_time_is_left_out_of_latency():
+    """Test time the caller spends away from the request is not sampled as latency."""
+    controller = AdaptiveConcurrencyController()
+    async with controller.slot() as slot:
+        await asyncio.sleep(0.05)
+        slot.exclude(0.05)
+
+    assert controller._latencies[-1] < 0.02
@@ -0,0 +1,73 @@
+"""Tests for watermark-based incremental sync."""
+
+from ingestion.utils.incremental import IncrementalSync, cursor_values
+from ingestion.utils.state_store import JSONStateStore
+
+
+def make_sync(tmp_path, **kwargs):
+    """Create a sync backed by a JSON store."""
+    store = JSONStateStore(tmp_path / 'state.json')
+    return store, IncrementalSync(
+        store, 'athletes', cursor_field='updatedAt', filter_variable='updatedSince', **kwargs
+    )
+
+
+def test_cursor_values_flattens_lists():
+    """Test cursor values are collected through nested lists."""
+    record = {'memberships': [{'createdAt': '2024-02'}, {'createdAt': '2024-03'}, {'createdAt': None}]}
+
+    assert cursor_values(record, 'memberships.createdAt') == ['2024-02', '2024-03']
+    assert cursor_values({'updatedAt': '2024-01'}, 'updatedAt') == ['2024-01']
+    assert cursor_values({}, 'updatedAt') == []
+
+
+def test_first_run_is_full_sync(tmp_path):
+    """Test variables are unchanged without a watermark."""
+    _, sync = make_sync(tmp_path)
+
+    assert sync.apply({'per': 50}) == {'per': 50}
+
+
+def test_initial_value_filters_first_run(tmp_path):
+    """Test the initial value filters the first run."""
+    _, sync = make_sync(tmp_path, initial_value='2024-01-01')
+
+    assert sync.apply({'per': 50}) == {'per': 50, 'updatedSince': '2024-01-01'}
+
+
+def test_observe_and_commit_advance_watermark(tmp_path):
+    """Test the watermark only advances on commit."""
+    store, sync = make_sync(tmp_path)
+    records = [{'id': 1, 'updatedAt': '2024-03-01'}, {'id': 2, 'updatedAt': '2024-05-01'}, {'id': 3}]
+
+    assert sync.observe(records) == records
+    assert store.get('athletes') is None
+
+    sync.commit()
+
+    assert store.get('athletes') == '2024-05-01'
+    _, next_sync = make_sync(tmp_path)
+    assert next_sync.apply({}) == {'updatedSince': '2024-05-01'}
+
+
+def test_observe_drops_records_before_watermark(tmp_path):
+    """Test records older than the watermark are dropped."""
+    store, sync = make_sync(tmp_path)
+    store.set('athletes', '2024-04-01')
+    sync = IncrementalSync(store, 'athletes', cursor_field='updatedAt', filter_variable='updatedSince')
+
+    kept = sync.observe([{'id': 1, 'updatedAt': '2024-03-01'}, {'id': 2, 'updatedAt': '2024-04-01'}])
+
+    assert [r['id'] for r in kept] == [2]
+
+
+def test_commit_never_moves_watermark_back(tmp_path):
+    """Test an older cursor does not lower the watermark."""
+    store, _ = make_sync(tmp_path)
+    store.set('athletes', '2024-04-01')
+    sync = IncrementalSync(store, 'athletes', cursor_field='updatedAt', filter_variable='updatedSince')
+
+    sync.observe([{'updatedAt': '2024-03-01'}])
+    sync.commit()
+
+    assert store.get('athletes') == '2024-04-01'
@@ -0,0 +1,56 @@
+"""Tests for the shared JSON codec."""
+
+import json
+from datetime import datetime
+from decimal import Decimal
+from io import BytesIO
+
+import pytest
+
+from ingestion.utils import json_codec
+
+DATA = {'name': 'Ünïcode', 'score': Decimal('9.5'), 'at': datetime(2024, 1, 2, 3, 4, 5), 'ids': {1}}
+EXPECTED = {'name': 'Ünïcode', 'score': 9.5, 'at': '2024-01-02T03:04:05', 'ids': [1]}
+
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def codec(request, monkeypatch):
+    """Run each test with orjson, when installed, and with the stdlib fallback."""
+    if request.param == 'stdlib':
+        monkeypatch.setattr(json_codec, 'orjson', None)
+    elif json_codec.orjson is None:
+        pytest.skip('orjson not installed')
+    return json_codec
+
+
+def test_dumps_is_compact_bytes(codec, monkeypatch):
+    """Test output is compact UTF-8 by default."""
+    monkeypatch.delenv('JSON_PRETTY', raising=False)
+    encoded = codec.dumps(DATA)
+
+    assert isinstance(encoded, bytes)
+    assert b'\n' not in encoded and b': ' not in encoded
+    assert json.loads(encoded) == EXPECTED
+
+
+def test_pretty_output(codec, monkeypatch):
+    """Test pretty printing per call and through JSON_PRETTY."""
+    assert b'\n  "name"' in codec.dumps(DATA, pretty=True)
+
+    monkeypatch.setenv('JSON_PRETTY', '1')
+    assert b'\n  "name"' in codec.dumps(DATA)
+    assert b'\n' not in codec.dumps(DATA, pretty=False)
+
+
+def test_dump_and_loads_round_trip(codec):
+    """Test dump writes bytes that loads decodes."""
+    buffer = BytesIO()
+    codec.dump({'a': [1, 2.5, None]}, buffer)
+    assert codec.loads(buffer.getvalue()) == {'a': [1, 2.5, None]}
+    assert codec.loads('{"a": 1}') == {'a': 1}
+
+
+def test_unsupported_type_raises(codec):
+    """Test unknown types fail instead of being silently dropped."""
+    with pytest.raises(TypeError):
+        codec.dumps({'a': object()})
@@ -0,0 +1,65 @@
+"""Tests for streaming JSON item decoding."""
+
+import json
+from io import BytesIO
+
+import pytest
+from gql.transport.exceptions import TransportQueryError
+
+from ingestion.utils.json_stream import aiter_items, iter_items
+
+PATH = 'data.organisationAthletes.athletes'
+
+
+def make_body(athletes, errors=None):
+    """Encode a GraphQL response with the given athletes."""
+    body = {'data': {'organisationAthletes': {'athletes': athletes, 'totalCount': len(athletes)}}}
+    if errors is not None:
+        body['errors'] = errors
+    return json.dumps(body).encode()
+
+
+class ChunkedStream:
+    """Async stream returning the body in small chunks."""
+
+    def __init__(self, body, chunk_size=7):
+        self.body = BytesIO(body)
+        self.chunk_size = chunk_size
+
+    async def read(self, n=-1):
+        return self.body.read(min(n, self.chunk_size) if n >= 0 else self.chunk_size)
+
+
+def test_iter_items_yields_nested_items():
+    """Test items at the path are decoded whole and in order."""
+    athletes = [
+        {'id': 1, 'score': 9.5, 'memberships': [{'organisation': {'name': 'A'}}]},
+        {'id': 2, 'score': 7.25, 'memberships': []},
+        'scalar',
+    ]
+    assert list(iter_items(BytesIO(make_body(athletes)), PATH)) == athletes
+
+
+def test_iter_items_ignores_other_lists():
+    """Test lists outside the path are skipped."""
+    body = json.dumps({'data': {'other': [1, 2], 'organisationAthletes': {'athletes': [{'id': 1}]}}})
+    assert list(iter_items(BytesIO(body.encode()), PATH)) == [{'id': 1}]
+
+
+def test_iter_items_raises_graphql_errors():
+    """Test an errors array in the body is raised."""
+    with pytest.raises(TransportQueryError, match='boom'):
+        list(iter_items(BytesIO(make_body([], errors=[{'message': 'boom'}])), PATH))
+
+
+def test_iter_items_allows_empty_errors():
+    """Test an empty errors array is not treated as a failure."""
+    assert list(iter_items(BytesIO(make_body([{'id': 1}], errors=[])), PATH)) == [{'id': 1}]
+
+
+@pytest.mark.asyncio
+async def test_aiter_items_decodes_chunked_body():
+    """Test items are decoded from a body arriving in chunks."""
+    athletes = [{'id': i, 'name': f'athlete {i}'} for i in range(20)]
+    items = [item async for item in aiter_items(ChunkedStream(make_body(athletes)), PATH)]
+    assert items == athletes
@@ -0,0 +1,76 @@
+"""Tests for the ndjson writer."""
+
+import gzip
+import io
+import json
+from unittest.mock import patch
+
+import pytest
+import zstandard
+
+from ingestion.utils import ndjson_writer
+from ingestion.utils.ndjson_writer import NDJSONWriter, ndjson_suffix, to_ndjson_bytes
+
+RECORDS = [{'id': 1, 'name': 'Kai'}, {'id': 2, 'name': 'Mia'}]
+
+
+def read_lines(data):
+    """Decode ndjson bytes into records."""
+    return [json.loads(line) for line in data.splitlines()]
+
+
+def test_uncompressed_lines():
+    """Test every record is written on its own line."""
+    data = to_ndjson_bytes(RECORDS)
+
+    assert data == b'{"id":1,"name":"Kai"}\n{"id":2,"name":"Mia"}\n'
+
+
+def test_gzip_appends_across_pages(tmp_path):
+    """Test appending pages to a gzip file yields one readable stream."""
+    path = tmp_path / 'athletes.ndjson.gz'
+
+    for page in ([RECORDS[0]], [RECORDS[1]]):
+        with NDJSONWriter(path, compression='gzip', append=True) as writer:
+            writer.write(page)
+
+    assert read_lines(gzip.decompress(path.read_bytes())) == RECORDS
+
+
+def test_zstd_to_stream():
+    """Test zstd output written to a caller's stream leaves it open."""
+    stream = io.BytesIO()
+
+    with NDJSONWriter(stream, compression='zstd') as writer:
+        writer.write(iter(RECORDS))
+
+    assert not stream.closed
+    assert writer.records_written == 2
+    decompressed = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(stream.getvalue())).read()
+    assert read_lines(decompressed) == RECORDS
+
+
+def test_zstd_falls_back_to_gzip():
+    """Test gzip is used when zstandard is not installed."""
+    with patch.object(ndjson_writer, 'zstandard', None):
+        assert ndjson_suffix('zstd') == '.ndjson.gz'
+        assert read_lines(gzip.decompress(to_ndjson_bytes(RECORDS, compression='zstd'))) == RECORDS
+
+
+def test_suffixes_and_unknown_codec():
+    """Test suffixes follow the codec and unknown codecs are rejected."""
+    assert ndjson_suffix(None) == '.ndjson'
+    assert ndjson_suffix('none') == '.ndjson'
+    assert ndjson_suffix('zstd') == '.ndjson.zst'
+    with pytest.raises(ValueError, match='Unsupported ndjson compression'):
+        ndjson_suffix('brotli')
+
+
+def test_compression_levels():
+    """Test gzip defaults to level 6 and the level can be set."""
+    with patch('ingestion.utils.ndjson_writer.gzip.GzipFile', wraps=gzip.GzipFile) as gzip_file:
+        default = to_ndjson_bytes(RECORDS, compression='gzip')
+        fastest = to_ndjson_bytes(RECORDS, compression='gzip', level=1)
+
+    assert [call.kwargs['compresslevel'] for call in gzip_file.call_args_list] == [6, 1]
+    assert read_lines(gzip.decompress(default)) == read_lines(gzip.decompress(fastest)) == RECORDS
@@ -0,0 +1,200 @@
+"""Tests for the pagination engines."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from gql.transport.exceptions import TransportAlreadyConnected
+
+from ingestion.utils.graphql_client import GraphQLOAuthClient
+from ingestion.utils.pagination import CursorPaginator, PagePaginator, get_path
+
+
+class FakePagedClient:
+    """Fake async client serving a page/per paginated athlete list."""
+
+    def __init__(self, total_count):
+        self.total_count = total_count
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requested_pages = []
+
+    async def execute_query(self, query, variables):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self.requested_pages.append(variables['page'])
+        # Later pages answer faster to prove results are re-ordered
+        await asyncio.sleep(0.01 / variables['page'])
+        self.in_flight -= 1
+        start = (variables['page'] - 1) * variables['per']
+        end = min(start + variables['per'], self.total_count)
+        return {
+            'data': {
+                'organisationAthletes': {
+                    'totalCount': self.total_count,
+                    'athletes': [{'id': i} for i in range(start, end)]
+                }
+            }
+        }
+
+
+def relay_page(variables, pages=3, per=2):
+    """Build a Relay connection page for the given cursor variables."""
+    index = int(variables.get('after') or 0)
+    return {
+        'data': {
+            'organisation': {
+                'athletes': {
+                    'edges': [{'node': {'id': index * per + i}} for i in range(per)],
+                    'pageInfo': {'hasNextPage': index + 1 < pages, 'endCursor': str(index + 1)}
+                }
+            }
+        }
+    }
+
+
+class FakeCursorClient:
+    """Fake async client serving a Relay connection."""
+
+    def __init__(self):
+        self.cursors = []
+
+    async def execute_query(self, query, variables):
+        self.cursors.append(variables.get('after'))
+        return relay_page(variables)
+
+
+def test_get_path():
+    """Test dotted path resolution."""
+    data = {'data': {'a': {'b': 0}}}
+    assert get_path(data, 'data.a.b') == 0
+    assert get_path(data, 'data.missing.b', 'default') == 'default'
+
+
+@pytest.mark.asyncio
+async def test_iter_pages_yields_all_pages_in_order():
+    """Test every page is fetched and yielded in page order."""
+    client = FakePagedClient(total_count=95)
+    paginator = PagePaginator(
+        client,
+        total_count_path='data.organisationAthletes.totalCount',
+        max_concurrency=3
+    )
+
+    pages = [
+        page async for page in paginator.iter_pages('query', {'id': 78, 'page': 1, 'per': 10})
+    ]
+
+    ids = [a['id'] for page in pages for a in page['data']['organisationAthletes']['athletes']]
+    assert len(pages) == 10
+    assert ids == list(range(95))
+    assert sorted(client.requested_pages) == list(range(1, 11))
+    assert client.max_in_flight == 3
+
+
+@pytest.mark.asyncio
+async def test_iter_pages_requires_total_count():
+    """Test a missing total count raises a clear error."""
+    paginator = PagePaginator(FakePagedClient(10), total_count_path='data.missing')
+
+    with pytest.raises(ValueError, match="Total count not found"):
+        async for _ in paginator.iter_pages('query', {'page': 1, 'per': 10}):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_fetch_pages_returns_failures_without_stopping():
+    """Test only the requested pages are fetched and failed pages are yielded as errors."""
+    client = FakePagedClient(total_count=95)
+    fetch = client.execute_query
+
+    async def flaky_execute_query(query, variables):
+        if variables['page'] == 4:
+            raise ConnectionError('page 4 failed')
+        return await fetch(query, variables)
+
+    client.execute_query = flaky_execute_query
+    paginator = PagePaginator(client, total_count_path='data.organisationAthletes.totalCount', max_concurrency=2)
+
+    results = {
+        page: response
+        async for page, response in paginator.fetch_pages(
+            'query', {'page': 1, 'per': 10}, [3, 4, 5, 9], return_exceptions=True
+        )
+    }
+
+    assert sorted(results) == [3, 4, 5, 9]
+    assert isinstance(results[4], ConnectionError)
+    assert results[9]['data']['organisationAthletes']['athletes'][0]['id'] == 80
+    assert sorted(client.requested_pages) == [3, 5, 9]
+    assert client.max_in_flight <= 2
+
+
+@pytest.mark.asyncio
+async def test_cursor_paginator_streams_nodes():
+    """Test nodes are streamed across pages and the next page is prefetched."""
+    client = FakeCursorClient()
+    paginator = CursorPaginator(client, 'data.organisation.athletes')
+
+    nodes = []
+    async for node in paginator.iter_nodes('query', {'first': 2}):
+        if not nodes:
+            # Let the prefetch task run before page 1 is consumed
+            await asyncio.sleep(0)
+            assert client.cursors == [None, '1']
+        nodes.append(node['id'])
+
+    assert nodes == list(range(6))
+    assert client.cursors == [None, '1', '2']
+
+
+def test_sync_iter_connection():
+    """Test the blocking client streams every node of a connection."""
+    client = GraphQLOAuthClient('http://graphql', 'http://token', 'id', 'secret')
+
+    with patch.object(client, 'execute_query', side_effect=lambda q, v: relay_page(v)) as execute:
+        nodes = [n['id'] for n in client.iter_connection('query', 'data.organisation.athletes')]
+
+    assert nodes == list(range(6))
+    assert execute.call_count == 3
+
+
+class SerialRelayClient:
+    """Fake gql client serving a Relay connection that fails when requests overlap."""
+
+    def __init__(self):
+        self.transport = SimpleNamespace(headers={})
+        self.busy = False
+        self.detail_requests = 0
+
+    def execute(self, document, variable_values=None):
+        if self.busy:
+            raise TransportAlreadyConnected('Transport is already connected')
+        self.busy = True
+        try:
+            time.sleep(0.01)
+            if 'id' in variable_values:
+                self.detail_requests += 1
+                return {'athlete': {'id': variable_values['id']}}
+            return relay_page(variable_values)['data']
+        finally:
+            self.busy = False
+
+
+def test_sync_iter_connection_while_the_caller_queries():
+    """Test the prefetch and the caller's own queries on the same client take turns."""
+    client = GraphQLOAuthClient('http://graphql', 'http://token', 'id', 'secret')
+    client.client = SerialRelayClient()
+    connection_query = 'query Athletes($after: String) { organisation { athletes { edges { node { id } } } } }'
+    detail_query = 'query Athlete($id: ID!) { athlete(id: $id) { id } }'
+
+    with patch.object(client, '_get_oauth_token', return_value={'access_token': 'token'}):
+        details = [
+            client.execute_query(detail_query, {'id': node['id']})['data']['athlete']['id']
+            for node in client.iter_connection(connection_query, 'data.organisation.athletes')
+        ]
+
+    assert details == list(range(6))
+    assert client.client.detail_requests == 6
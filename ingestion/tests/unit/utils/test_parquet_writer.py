@@ -0,0 +1,138 @@
+"""Tests for the Parquet record writer."""
+
+import io
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from ingestion.utils.parquet_writer import (
+    ParquetRecordWriter,
+    ParquetSchemaError,
+    flatten_record,
+    infer_schema,
+    to_parquet_bytes,
+)
+
+ATHLETES = [
+    {'id': 1, 'name': 'Kai', 'dob': None, 'club': {'id': 7, 'name': 'Bondi'}, 'tags': ['junior']},
+    {'id': 2, 'name': 'Mia', 'dob': '2001-02-03', 'club': {'id': 8, 'name': None}, 'tags': []},
+    {'id': 3, 'name': 'Tom', 'dob': None, 'club': None, 'tags': None}
+]
+
+
+def test_flatten_record():
+    """Test nested objects become dotted columns and lists become JSON text."""
+    assert flatten_record(ATHLETES[0]) == {
+        'id': 1, 'name': 'Kai', 'dob': None, 'club.id': 7, 'club.name': 'Bondi', 'tags': '["junior"]'
+    }
+    assert flatten_record(5) == {'value': 5}
+
+
+def test_row_groups_and_compression(tmp_path):
+    """Test records are written in row groups of the configured size with the codec."""
+    path = tmp_path / 'athletes.parquet'
+
+    with ParquetRecordWriter(path, row_group_size=2, compression='zstd') as writer:
+        writer.write(ATHLETES)
+
+    parquet_file = pq.ParquetFile(path)
+    assert parquet_file.num_row_groups == 2
+    assert parquet_file.metadata.row_group(0).column(0).compression == 'ZSTD'
+    assert parquet_file.read().column('club.id').to_pylist() == [7, 8, None]
+    assert writer.rows_written == 3
+
+
+def test_schema_is_inferred_once_and_reused():
+    """Test later batches are conformed to the schema of the first one."""
+    data, schema = to_parquet_bytes([{'id': 1, 'score': 1.5, 'dob': None}])
+
+    assert schema.field('dob').type == pa.string()
+
+    data, reused = to_parquet_bytes([{'id': 2, 'score': 3, 'dob': 20010203}], schema=schema)
+
+    assert reused is schema
+    assert pq.read_table(io.BytesIO(data)).to_pylist() == [{'id': 2, 'score': 3.0, 'dob': '20010203'}]
+
+
+@pytest.mark.parametrize('record', [
+    {'id': 1.5}, {'id': 'a'}, {'id': True}, {'id': 1, 'extra': 'x'}
+])
+def test_records_that_do_not_fit_the_schema_raise(tmp_path, record):
+    """Test values the schema cannot hold and new columns raise instead of being truncated or dropped."""
+    path = tmp_path / 'scores.parquet'
+
+    with pytest.raises(ParquetSchemaError):
+        with ParquetRecordWriter(path, row_group_size=1) as writer:
+            writer.write([{'id': 1}, record])
+
+    assert not path.exists()
+
+
+def test_inferred_schema_holds_every_value():
+    """Test a schema inferred from every record widens conflicting columns."""
+    records = [{'id': 1, 'score': 1}, {'id': 'a', 'score': 2.5, 'rank': 3}]
+
+    schema = infer_schema(records)
+    data, _ = to_parquet_bytes(records, row_group_size=1, schema=schema)
+
+    assert schema == pa.schema([('id', pa.string()), ('score', pa.float64()), ('rank', pa.int64())])
+    assert pq.read_table(io.BytesIO(data)).to_pylist() == [
+        {'id': '1', 'score': 1.0, 'rank': None}, {'id': 'a', 'score': 2.5, 'rank': 3}
+    ]
+
+
+class UploadStream(io.RawIOBase):
+    """Write-only stream like a multipart upload."""
+
+    def __init__(self):
+        self.data = b''
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.data += bytes(data)
+        return len(data)
+
+
+def test_inferred_schema_fits_every_record():
+    """Test a schema inferred from every record lets a write-only stream take them all."""
+    records = [{'id': 1}, {'id': 'a', 'club': {'id': 7}}]
+    stream = UploadStream()
+
+    with ParquetRecordWriter(stream, row_group_size=1, schema=infer_schema(records)) as writer:
+        writer.write(records)
+
+    assert pq.read_table(io.BytesIO(stream.data)).to_pylist() == [
+        {'id': '1', 'club.id': None}, {'id': 'a', 'club.id': 7}
+    ]
+
+
+def test_failed_writes_leave_no_file(tmp_path):
+    """Test an error inside the with block aborts without a footer or a file."""
+    path = tmp_path / 'athletes.parquet'
+    stream = UploadStream()
+
+    with pytest.raises(RuntimeError):
+        with ParquetRecordWriter(path, row_group_size=1) as writer, ParquetRecordWriter(stream) as streamed:
+            writer.write(ATHLETES)
+            streamed.write(ATHLETES)
+            streamed.flush()
+            raise RuntimeError('upstream failed')
+
+    assert not path.exists()
+    assert not stream.data.endswith(b'PAR1')
+
+
+def test_empty_output_is_valid_parquet():
+    """Test a writer without records still produces a readable file."""
+    data, _ = to_parquet_bytes([])
+
+    assert pq.read_table(io.BytesIO(data)).num_rows == 0
+
+
+def test_rejects_unknown_compression(tmp_path):
+    """Test unsupported codecs are rejected."""
+    with pytest.raises(ValueError, match='Unsupported parquet compression'):
+        ParquetRecordWriter(tmp_path / 'out.parquet', compression='lz77')
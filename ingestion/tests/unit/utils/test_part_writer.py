@@ -0,0 +1,138 @@
+"""Tests for the part file writer."""
+
+import asyncio
+import json
+import threading
+from unittest.mock import patch
+
+import pyarrow.parquet as pq
+import pytest
+
+from ingestion.utils.parquet_writer import ParquetSchemaError, infer_schema
+from ingestion.utils.part_writer import PartWriter, encode_part
+from ingestion.utils.sinks import DataSink, LocalSink
+
+
+class SlowSink(DataSink):
+    """Fake sink recording writes and how many overlap."""
+
+    def __init__(self, fail_on=None):
+        self.writes = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_on = fail_on
+
+    async def write(self, data, key):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if key == self.fail_on:
+                raise OSError('disk full')
+            self.writes[key] = list(data)
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.mark.asyncio
+async def test_records_are_split_into_numbered_parts():
+    """Test every record lands in a part file of at most batch_size records."""
+    sink = SlowSink()
+    writer = PartWriter(sink, prefix='athletes', batch_size=4, max_pending=2)
+
+    for start in range(0, 10, 3):
+        await writer.write(range(start, min(start + 3, 10)))
+        assert len(writer._buffer) < 4
+    keys = await writer.close()
+
+    assert keys == ['athletes/part-00001.json', 'athletes/part-00002.json', 'athletes/part-00003.json']
+    assert [sink.writes[key] for key in keys] == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    assert writer.records_written == 10
+    assert sink.max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_write_errors_are_raised():
+    """Test a failed part write surfaces from the writer."""
+    writer = PartWriter(SlowSink(fail_on='part-00001.json'), batch_size=1, max_pending=1)
+
+    with pytest.raises(OSError, match='disk full'):
+        await writer.write(range(3))
+        await writer.close()
+
+
+@pytest.mark.asyncio
+async def test_parts_written_to_local_sink(tmp_path):
+    """Test part files are readable JSON lists on the local sink."""
+    writer = PartWriter(LocalSink({'base_path': str(tmp_path), 'key_prefix': 'athletes'}), batch_size=2)
+
+    await writer.write([{'id': 1}, {'id': 2}, {'id': 3}])
+    await writer.close()
+
+    assert json.loads((tmp_path / 'athletes' / 'part-00002.json').read_text()) == [{'id': 3}]
+
+
+@pytest.mark.asyncio
+async def test_parquet_parts_share_schema(tmp_path):
+    """Test parquet parts reuse the schema inferred from the first part."""
+    writer = PartWriter(
+        LocalSink({'base_path': str(tmp_path)}), batch_size=2, format='parquet', compression='zstd'
+    )
+
+    await writer.write([{'id': 1, 'club': None}, {'id': 2, 'club': None}, {'id': 3, 'club': {'id': 7}}])
+    keys = await writer.close()
+
+    assert keys == ['part-00001.parquet', 'part-00002.parquet']
+    first, second = (pq.read_table(tmp_path / key) for key in keys)
+    assert first.schema == second.schema
+    assert second.to_pylist() == [{'id': 3, 'club': '{"id":7}'}]
+
+
+@pytest.mark.asyncio
+async def test_parquet_parts_that_do_not_fit_the_schema_raise(tmp_path):
+    """Test a later part whose types differ from the first part's raises instead of drifting."""
+    writer = PartWriter(LocalSink({'base_path': str(tmp_path)}), batch_size=1, format='parquet')
+
+    await writer.write([{'score': 1}])
+    with pytest.raises(ParquetSchemaError):
+        await writer.write([{'score': 1.5}])
+
+
+@pytest.mark.asyncio
+async def test_parquet_parts_use_the_given_schema(tmp_path):
+    """Test a schema given up front is shared by every part."""
+    records = [{'score': 1}, {'score': 1.5}, {'score': 'n/a'}]
+    writer = PartWriter(
+        LocalSink({'base_path': str(tmp_path)}), batch_size=1, format='parquet', schema=infer_schema(records)
+    )
+
+    await writer.write(records)
+    await writer.close()
+
+    assert pq.read_table(tmp_path).column('score').to_pylist() == ['1', '1.5', 'n/a']
+
+
+@pytest.mark.asyncio
+async def test_parts_are_encoded_off_the_event_loop(tmp_path):
+    """Test encoding and compression run on a worker thread."""
+    threads = []
+
+    def encode(*args):
+        threads.append(threading.get_ident())
+        return encode_part(*args)
+
+    writer = PartWriter(LocalSink({'base_path': str(tmp_path)}), batch_size=2, format='ndjson', compression='gzip')
+    with patch('ingestion.utils.part_writer.encode_part', side_effect=encode):
+        await writer.write([{'id': i} for i in range(4)])
+        await writer.close()
+
+    assert len(threads) == 2
+    assert threading.get_ident() not in threads
+
+
+def test_encode_part_passes_the_compression_level():
+    """Test ndjson parts are compressed at the configured level."""
+    with patch('ingestion.utils.part_writer.to_ndjson_bytes', return_value=b'') as encode:
+        encode_part([{'id': 1}], 'ndjson', 'gzip', compression_level=1)
+
+    encode.assert_called_once_with([{'id': 1}], compression='gzip', level=1)
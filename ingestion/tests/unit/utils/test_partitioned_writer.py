@@ -0,0 +1,192 @@
+"""Tests for the Hive-style partitioned writer."""
+
+import io
+import json
+from datetime import date
+
+import pyarrow.parquet as pq
+import pytest
+
+from ingestion.utils.parquet_writer import ParquetSchemaError, infer_schema
+from ingestion.utils.partitioned_writer import (
+    DEFAULT_PARTITION,
+    PartitionedWriter,
+    partition_date,
+    partition_value,
+)
+from ingestion.utils.sinks import DataSink, LocalSink
+
+
+class MemorySink(DataSink):
+    """Fake sink keeping every write in memory."""
+
+    def __init__(self):
+        self.writes = {}
+
+    async def write(self, data, key):
+        self.writes[key] = data
+
+
+def athlete(index, org_id='org-1', updated_at='2024-03-05T10:00:00Z'):
+    return {'id': index, 'name': f'athlete {index}', 'organisation': {'id': org_id}, 'updatedAt': updated_at}
+
+
+def test_partition_values_are_escaped():
+    """Test values are safe path segments and nulls use the Hive default partition."""
+    assert partition_value('a/b=c') == 'a%2Fb%3Dc'
+    assert partition_value(None) == DEFAULT_PARTITION
+    assert partition_value(True) == 'true'
+    assert partition_value(42) == '42'
+
+
+def test_partition_date_parses_dates():
+    """Test ISO strings, dates and epoch seconds give a YYYY-MM-DD date."""
+    assert partition_date('2024-03-05T10:00:00Z') == '2024-03-05'
+    assert partition_date(date(2024, 3, 5)) == '2024-03-05'
+    assert partition_date(0) == '1970-01-01'
+    assert partition_date('not a date') is None
+    assert partition_date(None) is None
+
+
+@pytest.mark.asyncio
+async def test_records_are_written_under_partition_keys():
+    """Test records are routed to entity, dt and column partitions."""
+    sink = MemorySink()
+    writer = PartitionedWriter(
+        sink, 'athletes', partition_by={'org_id': 'organisation.id'}, date_field='updatedAt',
+        format='json', run_id='run1'
+    )
+
+    await writer.write([athlete(1), athlete(2, org_id='org-2'), athlete(3, updated_at=None)])
+    keys = await writer.close()
+
+    assert sorted(keys) == [
+        'entity=athletes/dt=2024-03-05/org_id=org-1/part-00001-run1.json',
+        'entity=athletes/dt=2024-03-05/org_id=org-2/part-00001-run1.json',
+        f'entity=athletes/dt={writer.run_date}/org_id=org-1/part-00001-run1.json',
+    ]
+    records = json.loads(sink.writes['entity=athletes/dt=2024-03-05/org_id=org-1/part-00001-run1.json'])
+    assert [record['id'] for record in records] == [1]
+
+
+@pytest.mark.asyncio
+async def test_parts_roll_at_row_count():
+    """Test a partition rolls to a new part file every max_rows records."""
+    sink = MemorySink()
+    writer = PartitionedWriter(sink, 'athletes', format='ndjson', max_rows=4, run_id='run1', run_date=date(2024, 1, 1))
+
+    await writer.write(athlete(i) for i in range(10))
+    keys = await writer.close()
+
+    assert keys == [f'entity=athletes/dt=2024-01-01/part-0000{n}-run1.ndjson' for n in (1, 2, 3)]
+    assert [part.records for part in writer.parts] == [4, 4, 2]
+    assert sink.writes[keys[2]].count(b'\n') == 2
+
+
+@pytest.mark.asyncio
+async def test_parts_roll_at_target_size():
+    """Test a partition rolls once its encoded size reaches max_bytes."""
+    sink = MemorySink()
+    record_size = len(json.dumps(athlete(0), separators=(',', ':')))
+    writer = PartitionedWriter(sink, 'athletes', format='ndjson', max_bytes=record_size * 3, run_id='run1')
+
+    await writer.write(athlete(i) for i in range(9))
+    await writer.close()
+
+    assert len(writer.parts) >= 3
+    assert all(part.bytes <= record_size * 4 for part in writer.parts)
+    assert sum(part.records for part in writer.parts) == 9
+
+
+@pytest.mark.asyncio
+async def test_buffer_limit_flushes_largest_partition():
+    """Test buffering across partitions is bounded by max_buffered_bytes."""
+    sink = MemorySink()
+    record_size = len(json.dumps(athlete(0), separators=(',', ':')))
+    writer = PartitionedWriter(
+        sink, 'athletes', partition_by={'org_id': 'organisation.id'}, format='json',
+        max_bytes=record_size * 100, max_buffered_bytes=record_size * 5
+    )
+
+    await writer.write(athlete(i, org_id=f'org-{i % 3}') for i in range(30))
+
+    assert writer._buffered < record_size * 6
+    await writer.close()
+    assert writer.records_written == 30
+
+
+@pytest.mark.asyncio
+async def test_manifest_lists_every_part():
+    """Test the manifest is written last and describes each part."""
+    sink = MemorySink()
+    writer = PartitionedWriter(
+        sink, 'athletes', partition_by={'org_id': 'organisation.id'}, format='parquet', max_rows=2, run_id='run1'
+    )
+
+    await writer.write([athlete(1), athlete(2), athlete(3, org_id='org-2')])
+    keys = await writer.close()
+
+    assert list(sink.writes)[-1] == 'entity=athletes/_manifests/run1.json'
+    manifest = sink.writes['entity=athletes/_manifests/run1.json']
+    assert manifest['records'] == 3
+    assert manifest['partition_columns'] == ['entity', 'dt', 'org_id']
+    assert [part['key'] for part in manifest['parts']] == keys
+    assert manifest['parts'][1]['partition']['org_id'] == 'org-2'
+    for part in manifest['parts']:
+        assert part['bytes'] == len(sink.writes[part['key']])
+        assert pq.read_table(io.BytesIO(sink.writes[part['key']])).num_rows == part['records']
+
+
+@pytest.mark.asyncio
+async def test_writes_partitioned_files_to_local_sink(tmp_path):
+    """Test partitions become directories of a local sink."""
+    sink = LocalSink({'base_path': str(tmp_path), 'key_prefix': 'graphql'})
+    writer = PartitionedWriter(sink, 'athletes', format='json', run_id='run1', run_date=date(2024, 1, 1))
+
+    await writer.write([athlete(1)])
+    await writer.close()
+
+    part = tmp_path / 'graphql' / 'entity=athletes' / 'dt=2024-01-01' / 'part-00001-run1.json'
+    assert json.loads(part.read_text())[0]['id'] == 1
+    assert (tmp_path / 'graphql' / 'entity=athletes' / '_manifests' / 'run1.json').exists()
+
+
+@pytest.mark.asyncio
+async def test_partitions_share_one_schema():
+    """Test every partition's parts use the run's schema and parts that do not fit it raise."""
+    sink = MemorySink()
+    writer = PartitionedWriter(
+        sink, 'points', partition_by={'org': 'org'}, format='parquet', max_rows=1, run_id='run1',
+        run_date=date(2024, 1, 1)
+    )
+
+    await writer.write([{'org': 1, 'x': 1}, {'org': 2, 'x': 2.0}])
+    with pytest.raises(ParquetSchemaError):
+        await writer.write([{'org': 2, 'x': 3, 'y': 'b'}])
+
+    for data in sink.writes.values():
+        assert pq.read_table(io.BytesIO(data)).schema == writer.schema
+
+
+@pytest.mark.asyncio
+async def test_given_schema_keeps_fields_of_every_partition():
+    """Test a schema given up front keeps fields found in one partition only."""
+    records = [{'org': 1, 'x': 1}, {'org': 2, 'x': 2.5, 'y': 'b'}]
+    sink = MemorySink()
+    writer = PartitionedWriter(
+        sink, 'points', partition_by={'org': 'org'}, format='parquet', run_id='run1',
+        run_date=date(2024, 1, 1), schema=infer_schema(records)
+    )
+
+    await writer.write(records)
+    keys = await writer.close()
+
+    assert [pq.read_table(io.BytesIO(sink.writes[key])).to_pylist() for key in keys] == [
+        [{'org': 1, 'x': 1.0, 'y': None}], [{'org': 2, 'x': 2.5, 'y': 'b'}]
+    ]
+
+
+def test_reserved_partition_columns_are_rejected():
+    """Test entity and dt cannot be used as partition columns."""
+    with pytest.raises(ValueError):
+        PartitionedWriter(MemorySink(), 'athletes', partition_by={'dt': 'updatedAt'})
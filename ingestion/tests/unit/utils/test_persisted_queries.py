@@ -0,0 +1,53 @@
+"""Tests for automatic persisted query helpers."""
+
+import hashlib
+from pathlib import Path
+
+import pytest
+
+from ingestion.utils.persisted_queries import (
+    PERSISTED_QUERY_NOT_FOUND,
+    PERSISTED_QUERY_NOT_SUPPORTED,
+    minify_query,
+    persist_query,
+    persisted_query_error,
+)
+
+QUERIES_DIR = Path(__file__).parents[2] / 'queries'
+
+
+def test_minify_strips_whitespace_and_duplicate_fragments():
+    """Test whitespace, comments and repeated fragments are removed."""
+    query = """
+    # athletes
+    query { a { ...F } b { ...F } }
+    fragment F on T { id   name }
+    fragment F on T { id name }
+    """
+    assert minify_query(query) == '{a{...F}b{...F}}fragment F on T{id name}'
+
+
+def test_minify_rejects_conflicting_fragments():
+    """Test two different fragments with the same name are rejected."""
+    with pytest.raises(ValueError):
+        minify_query('query { a { ...F } } fragment F on T { id } fragment F on T { name }')
+
+
+def test_persist_query_hashes_minified_text():
+    """Test the hash is computed over the minified query."""
+    query = (QUERIES_DIR / 'liveheats_orgs.graphql').read_text()
+    text, query_hash = persist_query(query)
+
+    assert len(text) < len(query)
+    assert query_hash == hashlib.sha256(text.encode('utf-8')).hexdigest()
+    assert persist_query(' '.join(query.split())) == (text, query_hash)
+
+
+def test_persisted_query_error():
+    """Test APQ errors are recognised by code or message."""
+    assert persisted_query_error([{'message': 'PersistedQueryNotFound'}]) == PERSISTED_QUERY_NOT_FOUND
+    assert persisted_query_error(
+        [{'message': 'x', 'extensions': {'code': 'PERSISTED_QUERY_NOT_SUPPORTED'}}]
+    ) == PERSISTED_QUERY_NOT_SUPPORTED
+    assert persisted_query_error([{'message': 'boom'}]) is None
+    assert persisted_query_error(None) is None
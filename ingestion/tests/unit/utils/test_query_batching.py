@@ -0,0 +1,64 @@
+"""Tests for alias-based query batching."""
+
+import pytest
+from graphql import parse
+
+from ingestion.utils.query_batching import QueryBatcher
+
+QUERY = """
+query Series($id: ID!, $first: Int = 10) {
+    series(id: $id) { name ...Dates }
+    total: seriesCount
+}
+fragment Dates on Series { startDate endDate }
+"""
+
+
+def test_build_aliases_fields_and_renames_variables():
+    """Test copies get aliased fields, suffixed variables and one fragment."""
+    document, variables = QueryBatcher(QUERY).build([{'id': 'a'}, {'id': 'b', 'first': 5}])
+
+    assert variables == {'id_0': 'a', 'id_1': 'b', 'first_1': 5}
+    assert 'b0_series: series(id: $id_0)' in document
+    assert 'b1_total: seriesCount' in document
+    assert '$first_1: Int = 10' in document
+    assert document.count('fragment Dates') == 1
+    parse(document)
+
+
+def test_split_assigns_data_and_errors():
+    """Test merged responses are split per variable set."""
+    batcher = QueryBatcher(QUERY)
+    data = {'b0_series': {'name': 'A'}, 'b0_total': 2, 'b1_series': None, 'b1_total': 2}
+    errors = [
+        {'message': 'not found', 'path': ['b1_series']},
+        {'message': 'deprecated'},
+    ]
+
+    first, second = batcher.split(data, errors, 2)
+
+    assert first == {'data': {'series': {'name': 'A'}, 'total': 2}, 'errors': [{'message': 'deprecated'}]}
+    assert second['data'] == {'series': None, 'total': 2}
+    assert second['errors'] == [{'message': 'not found', 'path': ['series']}, {'message': 'deprecated'}]
+
+
+def test_chunks_respect_batch_size_and_complexity():
+    """Test batches shrink to fit the complexity budget."""
+    variable_sets = [{'id': str(i)} for i in range(10)]
+
+    assert [len(c) for c in QueryBatcher(QUERY, max_batch_size=4).chunks(variable_sets)] == [4, 4, 2]
+
+    batcher = QueryBatcher(QUERY, max_batch_size=4, max_complexity=10)
+    assert batcher.complexity == 5
+    assert [len(c) for c in batcher.chunks(variable_sets)] == [2] * 5
+
+
+@pytest.mark.parametrize('query', [
+    'query A { a } query B { b }',
+    'query { ...Top } fragment Top on Query { a }',
+    'query($id: ID) { a { ...F } } fragment F on A { b(id: $id) }',
+])
+def test_rejects_unbatchable_queries(query):
+    """Test queries that cannot be merged safely are rejected."""
+    with pytest.raises(ValueError):
+        QueryBatcher(query)
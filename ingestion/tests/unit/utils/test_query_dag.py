@@ -0,0 +1,126 @@
+"""Tests for the dependent-query DAG executor."""
+
+import asyncio
+import time
+
+import pytest
+
+from ingestion.utils.pagination import get_all
+from ingestion.utils.query_dag import QueryDAG, QueryNode
+
+ACCOUNTS = 'query accounts { accounts { id federation } }'
+ATHLETES = 'query athletesByFederation($federation: ID!) { athletes(id: $federation) { id } }'
+MEMBERSHIPS = 'query memberships($athlete: ID!) { memberships(athlete: $athlete) { createdAt } }'
+SERIES = 'query series { series { id } }'
+
+
+class FakeCrawlClient:
+    """Fake async client serving accounts, athletes per federation and memberships per athlete."""
+
+    def __init__(self, delay=0.05, fail_on=None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def execute_query(self, query, variables):
+        self.calls.append((query, dict(variables)))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if query == ACCOUNTS:
+                return {'data': {'accounts': [
+                    {'id': 1, 'federation': 'nsw'},
+                    {'id': 2, 'federation': 'qld'},
+                    {'id': 3, 'federation': 'nsw'},
+                    {'id': 4, 'federation': None}
+                ]}}
+            if query == ATHLETES:
+                if variables['federation'] == self.fail_on:
+                    raise ConnectionError('federation unavailable')
+                prefix = variables['federation']
+                return {'data': {'athletes': [{'id': f'{prefix}-1'}, {'id': f'{prefix}-2'}]}}
+            if query == MEMBERSHIPS:
+                return {'data': {'memberships': [{'createdAt': variables['athlete']}]}}
+            return {'data': {'series': [{'id': 1939}]}}
+        finally:
+            self.in_flight -= 1
+
+
+def crawl_nodes():
+    """Build the accounts, athletes and memberships chain plus an independent root."""
+    return [
+        QueryNode('accounts', ACCOUNTS),
+        QueryNode(
+            'athletes', ATHLETES, parent='accounts',
+            records_path='data.accounts', bindings={'federation': 'federation'}
+        ),
+        QueryNode(
+            'memberships', MEMBERSHIPS, parent='athletes',
+            records_path='data.athletes', bindings={'athlete': 'id'}
+        ),
+        QueryNode('series', SERIES)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_crawl_runs_children_for_parent_records():
+    """Test children run once per distinct binding and take the critical path's time."""
+    client = FakeCrawlClient()
+    dag = QueryDAG(client, crawl_nodes(), max_concurrency=10)
+
+    start = time.monotonic()
+    results = await dag.collect()
+    elapsed = time.monotonic() - start
+
+    assert len(results['accounts']) == 1
+    assert len(results['series']) == 1
+    assert sorted(r.variables['federation'] for r in results['athletes']) == ['nsw', 'qld']
+    memberships = [r.variables['athlete'] for r in results['memberships']]
+    assert sorted(memberships) == ['nsw-1', 'nsw-2', 'qld-1', 'qld-2']
+    # accounts, athletes and memberships run back to back; series overlaps with them
+    assert elapsed < 4 * client.delay
+    assert results['memberships'][0].to_dict()['variables']['athlete'] in memberships
+
+
+@pytest.mark.asyncio
+async def test_max_concurrency_bounds_requests():
+    """Test requests in flight across nodes never exceed max_concurrency."""
+    client = FakeCrawlClient(delay=0.01)
+
+    await QueryDAG(client, crawl_nodes(), max_concurrency=2).collect()
+
+    assert client.max_in_flight == 2
+    assert len(client.calls) == 8
+
+
+@pytest.mark.asyncio
+async def test_failure_cancels_crawl():
+    """Test a failing request stops the crawl with its error."""
+    client = FakeCrawlClient(delay=0.01, fail_on='qld')
+
+    with pytest.raises(ConnectionError, match='federation unavailable'):
+        async for _ in QueryDAG(client, crawl_nodes()).run():
+            pass
+
+
+def test_invalid_dags_are_rejected():
+    """Test unknown parents, missing bindings and cycles are rejected."""
+    with pytest.raises(ValueError, match='Unknown parent'):
+        QueryDAG(None, [QueryNode('athletes', ATHLETES, parent='accounts', bindings={'federation': 'federation'})])
+    with pytest.raises(ValueError, match='must bind'):
+        QueryDAG(None, [QueryNode('accounts', ACCOUNTS), QueryNode('athletes', ATHLETES, parent='accounts')])
+    with pytest.raises(ValueError, match='cycle'):
+        QueryDAG(None, [
+            QueryNode('a', ACCOUNTS, parent='b', bindings={'id': 'id'}),
+            QueryNode('b', ACCOUNTS, parent='a', bindings={'id': 'id'})
+        ])
+
+
+def test_get_all_flattens_nested_lists():
+    """Test nested lists along a path are flattened."""
+    data = {'accounts': [{'athletes': [{'id': 1}, {'id': 2}]}, {'athletes': [{'id': 3}]}, {'athletes': None}]}
+
+    assert get_all(data, 'accounts.athletes.id') == [1, 2, 3]
@@ -0,0 +1,139 @@
+"""Tests for query cost estimation and splitting."""
+
+from graphql import build_schema, parse, validate
+
+from ingestion.utils.query_planner import (
+    HORIZONTAL,
+    SINGLE,
+    VERTICAL,
+    CostEstimator,
+    QueryPlanner,
+)
+
+SCHEMA = build_schema("""
+    type Query { organisationAthletes(id: ID!, page: Int, per: Int): AthletePage }
+    type AthletePage { athletes: [Athlete!]! totalCount: Int }
+    type Athlete { id: ID! name: String memberships(active: Boolean): [Membership!]! users: [User!]! }
+    type Membership { id: ID! organisation: Organisation }
+    type Organisation { id: ID! name: String }
+    type User { phone: String }
+""")
+
+QUERY = """
+query Athletes($id: ID!, $page: Int!, $per: Int!) {
+    organisationAthletes(id: $id, page: $page, per: $per) {
+        athletes {
+            id
+            name
+            memberships { id organisation { id name } }
+            users { phone }
+        }
+        totalCount
+    }
+}
+"""
+PATH = 'data.organisationAthletes.athletes'
+
+
+def test_estimate_uses_page_size_and_schema_lists():
+    """Test the page size sizes the nested list and schema lists use the default size."""
+    variables = {'id': 1, 'page': 1, 'per': 10}
+    with_schema = CostEstimator(SCHEMA, default_list_size=5).estimate(QUERY, variables)
+    # athlete: id, name, memberships (1 + 5 * 4), users (1 + 5 * 1) = 29
+    assert with_schema == 1 + (1 + 10 * 29) + 1
+
+    without_schema = CostEstimator().estimate(QUERY, variables)
+    assert without_schema < with_schema
+    assert CostEstimator().estimate(QUERY, {**variables, 'per': 20}) > without_schema
+
+
+def test_query_within_budget_is_not_split():
+    """Test cheap queries run as a single request."""
+    plan = QueryPlanner(max_cost=10_000, items_path=PATH, schema=SCHEMA).plan(QUERY, {'id': 1, 'page': 1, 'per': 10})
+    assert plan.strategy == SINGLE and len(plan.parts) == 1
+
+
+def test_horizontal_split_and_merge():
+    """Test an expensive page is split into smaller pages and concatenated."""
+    planner = QueryPlanner(max_cost=300, items_path=PATH, schema=SCHEMA, default_list_size=5)
+    plan = planner.plan(QUERY, {'id': 1, 'page': 3, 'per': 40})
+
+    assert plan.strategy == HORIZONTAL
+    assert [v for _, v in plan.parts] == [
+        {'id': 1, 'page': page, 'per': 10} for page in (9, 10, 11, 12)
+    ]
+    assert all(cost <= 300 for cost in plan.part_costs)
+
+    results = [
+        {'data': {'organisationAthletes': {'athletes': [{'id': page}], 'totalCount': 100}}}
+        for page in (9, 10, 11, 12)
+    ]
+    merged = planner.merge(plan, results)
+    assert merged['data']['organisationAthletes']['athletes'] == [{'id': 9}, {'id': 10}, {'id': 11}, {'id': 12}]
+
+
+def test_vertical_split_and_merge():
+    """Test records too expensive for one request are split into field groups joined on id."""
+    planner = QueryPlanner(max_cost=28, items_path=PATH, schema=SCHEMA, default_list_size=5)
+    plan = planner.plan(QUERY, {'id': 1, 'page': 1, 'per': 1})
+
+    assert plan.strategy == VERTICAL
+    assert len(plan.parts) == 2
+    assert all(cost <= 28 for cost in plan.part_costs)
+    assert 'totalCount' in plan.parts[0][0] and 'totalCount' not in plan.parts[1][0]
+    assert all('id' in q for q, _ in plan.parts)
+
+    results = [
+        {'data': {'organisationAthletes': {'athletes': [{'id': 'a', 'name': 'A', 'memberships': []}], 'totalCount': 1}}},
+        {'data': {'organisationAthletes': {'athletes': [{'id': 'a', 'users': [{'phone': '1'}]}]}}},
+    ]
+    merged = planner.merge(plan, results)
+    assert merged == {'data': {'organisationAthletes': {
+        'athletes': [{'id': 'a', 'name': 'A', 'memberships': [], 'users': [{'phone': '1'}]}],
+        'totalCount': 1,
+    }}}
+
+
+def test_vertical_parts_keep_only_used_fragments_and_variables():
+    """Test every vertically split part is a valid document on its own."""
+    query = """
+    query Athletes($id: ID!, $page: Int!, $per: Int!, $active: Boolean) {
+        organisationAthletes(id: $id, page: $page, per: $per) {
+            athletes {
+                id
+                name
+                memberships(active: $active) { ...MembershipFields }
+                users { ...UserFields }
+            }
+            totalCount
+        }
+    }
+    fragment MembershipFields on Membership { id organisation { ...OrganisationFields } }
+    fragment OrganisationFields on Organisation { id name }
+    fragment UserFields on User { phone }
+    """
+    planner = QueryPlanner(max_cost=28, items_path=PATH, schema=SCHEMA, default_list_size=5)
+    plan = planner.plan(query, {'id': 1, 'page': 1, 'per': 1, 'active': True})
+
+    assert plan.strategy == VERTICAL
+    assert len(plan.parts) == 2
+    for part, variables in plan.parts:
+        assert validate(SCHEMA, parse(part)) == []
+    assert 'OrganisationFields' in plan.parts[0][0] and 'UserFields' not in plan.parts[0][0]
+    assert '$active' not in plan.parts[1][0] and 'MembershipFields' not in plan.parts[1][0]
+    assert plan.parts[0][1] == {'id': 1, 'page': 1, 'per': 1, 'active': True}
+    assert plan.parts[1][1] == {'id': 1, 'page': 1, 'per': 1}
+
+
+def test_execute_runs_parts_and_merges():
+    """Test execute sends every part through the given function."""
+    planner = QueryPlanner(max_cost=300, items_path=PATH, schema=SCHEMA, default_list_size=5)
+    sent = []
+
+    def execute_query(query, variables):
+        sent.append(variables)
+        return {'data': {'organisationAthletes': {'athletes': [{'id': variables['page']}]}}}
+
+    result = planner.execute(execute_query, QUERY, {'id': 1, 'page': 1, 'per': 20})
+    assert len(sent) == 2
+    assert result['data']['organisationAthletes']['athletes'] == [{'id': 1}, {'id': 2}]
@@ -0,0 +1,55 @@
+"""Tests for the token-bucket rate limiter."""
+
+import asyncio
+import time
+
+import pytest
+
+from ingestion.utils.rate_limiter import TokenBucketRateLimiter
+
+
+def test_burst_is_not_delayed():
+    """Test requests up to the burst size go through immediately."""
+    limiter = TokenBucketRateLimiter(requests_per_second=2, burst=3)
+
+    waits = [limiter.acquire() for _ in range(3)]
+
+    assert waits == [0.0, 0.0, 0.0]
+    assert limiter.stats()['delayed_requests'] == 0
+
+
+def test_requests_beyond_burst_are_spaced():
+    """Test the sustained rate is enforced once the burst is used up."""
+    limiter = TokenBucketRateLimiter(requests_per_second=20, burst=2)
+
+    start = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+    elapsed = time.monotonic() - start
+
+    # 2 burst requests + 4 at 20/s
+    assert elapsed >= 0.18
+    stats = limiter.stats()
+    assert stats['requests'] == 6
+    assert stats['delayed_requests'] == 4
+    assert stats['total_wait_seconds'] > 0
+
+
+@pytest.mark.asyncio
+async def test_async_acquire_enforces_rate():
+    """Test concurrent coroutines share the bucket."""
+    limiter = TokenBucketRateLimiter(requests_per_second=50, burst=1)
+
+    start = time.monotonic()
+    await asyncio.gather(*[limiter.acquire_async() for _ in range(6)])
+    elapsed = time.monotonic() - start
+
+    assert elapsed >= 0.09
+    assert limiter.stats()['max_wait_seconds'] >= 0.09
+
+
+@pytest.mark.parametrize('rate, burst', [(0, 1), (-1, 1), (1, 0)])
+def test_invalid_configuration(rate, burst):
+    """Test non-positive settings are rejected."""
+    with pytest.raises(ValueError):
+        TokenBucketRateLimiter(requests_per_second=rate, burst=burst)
@@ -0,0 +1,211 @@
+"""Tests for the GraphQL response cache."""
+
+import asyncio
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from gql.transport.exceptions import TransportAlreadyConnected
+
+from ingestion.utils.graphql_client import GraphQLOAuthClient
+from ingestion.utils.response_cache import FRESH, MISS, ResponseCache
+
+URL = 'https://api.example.com/graphql'
+QUERY = 'query Athletes($id: ID!) { organisationAthletes(id: $id) { totalCount } }'
+
+
+def counting_fetch():
+    """Create a fetch function returning the number of calls made."""
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {'data': {'calls': len(calls)}}
+
+    return fetch, calls
+
+
+def test_key_ignores_formatting_and_variable_order():
+    """Test equivalent requests share a key."""
+    key = ResponseCache.make_key(URL, QUERY, {'id': 1, 'per': 10})
+    assert ResponseCache.make_key(URL, ' '.join(QUERY.split()) + '\n', {'per': 10, 'id': 1}) == key
+    assert ResponseCache.make_key(URL, QUERY, {'id': 2, 'per': 10}) != key
+    assert ResponseCache.make_key(URL + '/v2', QUERY, {'id': 1, 'per': 10}) != key
+
+
+def test_fresh_hit_skips_fetch():
+    """Test a fresh entry is served without calling upstream."""
+    cache = ResponseCache(ttl=60)
+    fetch, calls = counting_fetch()
+
+    assert cache.get_or_fetch(URL, QUERY, {'id': 1}, fetch) == {'data': {'calls': 1}}
+    assert cache.get_or_fetch(URL, QUERY, {'id': 1}, fetch) == {'data': {'calls': 1}}
+    assert len(calls) == 1
+    assert cache.stats() == {'hits': 1, 'stale_hits': 0, 'misses': 1}
+
+
+def test_stale_entry_is_served_and_refreshed():
+    """Test a stale entry is returned at once and replaced in the background."""
+    cache = ResponseCache(ttl=0.01, stale_ttl=60)
+    fetch, calls = counting_fetch()
+    cache.get_or_fetch(URL, QUERY, {'id': 1}, fetch)
+    time.sleep(0.02)
+
+    assert cache.get_or_fetch(URL, QUERY, {'id': 1}, fetch) == {'data': {'calls': 1}}
+    cache._executor.shutdown(wait=True)
+    assert len(calls) == 2
+    assert cache.lookup(cache.make_key(URL, QUERY, {'id': 1}))[1] == {'data': {'calls': 2}}
+
+
+def test_expired_entry_is_refetched():
+    """Test entries past their stale window are fetched synchronously."""
+    cache = ResponseCache(ttl=0.01, stale_ttl=0)
+    fetch, calls = counting_fetch()
+    cache.get_or_fetch(URL, QUERY, None, fetch)
+    time.sleep(0.02)
+
+    assert cache.get_or_fetch(URL, QUERY, None, fetch) == {'data': {'calls': 2}}
+
+
+def test_lru_eviction_and_disk_tier(tmp_path):
+    """Test evicted entries are still found on disk by a new process."""
+    cache = ResponseCache(cache_dir=tmp_path, max_entries=2, max_disk_entries=3)
+    for i in range(4):
+        cache.store(str(i), {'i': i})
+
+    assert list(cache._memory) == ['2', '3']
+    assert len(list(tmp_path.glob('*.json'))) == 3
+
+    reloaded = ResponseCache(cache_dir=tmp_path)
+    assert reloaded.lookup('3') == (FRESH, {'i': 3})
+    assert reloaded.lookup('missing') == (MISS, None)
+
+
+def test_query_ttls_by_operation_name():
+    """Test per-query TTLs override the default."""
+    cache = ResponseCache(ttl=60, query_ttls={'Athletes': 5})
+    assert cache.ttl_for(QUERY) == 5
+    assert cache.ttl_for('query Other { a }') == 60
+    assert cache.ttl_for('{ a }') == 60
+
+
+def test_invalidate(tmp_path):
+    """Test invalidated entries are dropped from both tiers."""
+    cache = ResponseCache(cache_dir=tmp_path)
+    cache.store('a', 1)
+    cache.invalidate('a')
+    assert cache.lookup('a') == (MISS, None)
+
+
+@pytest.mark.asyncio
+async def test_async_stale_while_revalidate():
+    """Test the async path refreshes stale entries in a background task."""
+    cache = ResponseCache(ttl=0.01, stale_ttl=60)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return len(calls)
+
+    assert await cache.get_or_fetch_async(URL, QUERY, None, fetch) == 1
+    await asyncio.sleep(0.02)
+    assert await cache.get_or_fetch_async(URL, QUERY, None, fetch) == 1
+    await asyncio.gather(*cache._tasks)
+    assert cache.lookup(cache.make_key(URL, QUERY))[0] == FRESH
+    assert await cache.get_or_fetch_async(URL, QUERY, None, fetch) == 2
+    assert cache.stats()['stale_hits'] == 1
+
+
+def test_callers_cannot_mutate_cached_responses():
+    """Test changes to a returned response never reach the cache."""
+    cache = ResponseCache(ttl=60)
+    fetched = cache.get_or_fetch(URL, QUERY, {'id': 1}, lambda: {'data': {'items': [1]}})
+    fetched['data']['items'].extend([2, 3])
+
+    hit = cache.get_or_fetch(URL, QUERY, {'id': 1}, lambda: None)
+    hit['data']['items'].append(4)
+
+    assert cache.get_or_fetch(URL, QUERY, {'id': 1}, lambda: None) == {'data': {'items': [1]}}
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_background_refreshes():
+    """Test drain lets a pending refresh finish before the loop ends."""
+    cache = ResponseCache(ttl=0.01, stale_ttl=60)
+    calls = []
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        calls.append(1)
+        return len(calls)
+
+    await cache.get_or_fetch_async(URL, QUERY, None, fetch)
+    await asyncio.sleep(0.02)
+    assert await cache.get_or_fetch_async(URL, QUERY, None, fetch) == 1
+
+    await cache.drain()
+
+    assert cache.lookup(cache.make_key(URL, QUERY)) == (FRESH, 2)
+
+
+def test_disk_tier_is_listed_once(tmp_path, monkeypatch):
+    """Test stores track the disk tier instead of listing the directory each time."""
+    cache = ResponseCache(cache_dir=tmp_path, max_disk_entries=2)
+    cache.store('a', 1)
+    monkeypatch.setattr(Path, 'glob', lambda *args: pytest.fail('cache directory listed again'))
+
+    for key in 'bcd':
+        cache.store(key, 1)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['c.json', 'd.json']
+
+
+def test_shared_warns_about_ignored_settings(tmp_path, caplog):
+    """Test settings differing from an existing shared cache's are logged."""
+    first = ResponseCache.shared(tmp_path, ttl=60)
+
+    with caplog.at_level('WARNING'):
+        assert ResponseCache.shared(tmp_path, ttl=60, query_ttls=None) is first
+        assert not caplog.records
+        assert ResponseCache.shared(tmp_path, ttl=5) is first
+
+    assert first.ttl == 60
+    assert "ignoring {'ttl': 5}" in caplog.text
+
+
+class SerialGqlClient:
+    """Fake gql client failing like gql's sync client when requests overlap."""
+
+    def __init__(self):
+        self.transport = SimpleNamespace(headers={})
+        self.busy = False
+        self.calls = 0
+
+    def execute(self, document, variable_values=None):
+        if self.busy:
+            raise TransportAlreadyConnected('Transport is already connected')
+        self.busy = True
+        try:
+            time.sleep(0.05)
+            self.calls += 1
+            return {'calls': self.calls}
+        finally:
+            self.busy = False
+
+
+def test_sync_refresh_does_not_overlap_caller_requests():
+    """Test a background refresh and the caller's next query take turns on the sync client."""
+    cache = ResponseCache(ttl=60, stale_ttl=60)
+    client = GraphQLOAuthClient(URL, 'http://token', 'id', 'secret', response_cache=cache)
+    client.client = SerialGqlClient()
+    cache.store(cache.make_key(URL, QUERY, {'id': 1}), {'data': {'calls': 0}}, ttl=0)
+
+    with patch.object(client, '_get_oauth_token', return_value={'access_token': 'token'}):
+        assert client.execute_query(QUERY, {'id': 1}) == {'data': {'calls': 0}}
+        assert client.execute_query(QUERY, {'id': 2})['data']['calls'] in (1, 2)
+        cache._executor.shutdown(wait=True)
+
+    assert cache.lookup(cache.make_key(URL, QUERY, {'id': 1}))[0] == FRESH
+    assert client.client.calls == 2
@@ -0,0 +1,183 @@
+"""Tests for retry policies and the circuit breaker."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+import requests
+from gql.transport.exceptions import TransportQueryError, TransportServerError
+
+from ingestion.utils.graphql_client import GraphQLHTTPError, GraphQLOAuthClient
+from ingestion.utils.retry import (
+    CONNECTION,
+    GRAPHQL_TRANSIENT,
+    RATE_LIMITED,
+    SERVER_ERROR,
+    TIMEOUT,
+    CircuitBreaker,
+    CircuitOpenError,
+    Retrier,
+    RetryPolicy,
+    classify_error,
+)
+
+FAST = RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.01)
+FAST_POLICIES = {name: FAST for name in (TIMEOUT, CONNECTION, RATE_LIMITED, SERVER_ERROR, GRAPHQL_TRANSIENT)}
+
+
+def flaky(failures):
+    """Create a function raising the given exceptions before succeeding."""
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) <= len(failures):
+            raise failures[len(calls) - 1]
+        return 'ok'
+
+    return fn, calls
+
+
+def test_classify_error():
+    """Test exceptions map to the expected error classes."""
+    assert classify_error(requests.Timeout()) == TIMEOUT
+    assert classify_error(asyncio.TimeoutError()) == TIMEOUT
+    assert classify_error(requests.ConnectionError()) == CONNECTION
+    assert classify_error(TransportServerError('throttled', 429)) == RATE_LIMITED
+    assert classify_error(TransportServerError('down', 503)) == SERVER_ERROR
+    assert classify_error(TransportServerError('bad request', 400)) is None
+    assert classify_error(
+        TransportQueryError('busy', errors=[{'message': 'busy', 'extensions': {'code': 'THROTTLED'}}])
+    ) == GRAPHQL_TRANSIENT
+    assert classify_error(TransportQueryError('invalid', errors=[{'message': 'invalid'}])) is None
+    assert classify_error(ValueError()) is None
+
+
+def test_next_delay_is_bounded():
+    """Test decorrelated jitter stays between base_delay and max_delay."""
+    policy = RetryPolicy(base_delay=0.5, max_delay=4.0)
+    delay = policy.base_delay
+    for _ in range(50):
+        delay = policy.next_delay(delay)
+        assert 0.5 <= delay <= 4.0
+
+
+def test_retries_transient_errors():
+    """Test transient errors are retried until the call succeeds."""
+    fn, calls = flaky([requests.ConnectionError(), TransportServerError('down', 502)])
+    assert Retrier(policies=FAST_POLICIES).call(fn) == 'ok'
+    assert len(calls) == 3
+
+
+def test_gives_up_after_max_attempts():
+    """Test the last error is raised once the policy is exhausted."""
+    fn, calls = flaky([requests.Timeout()] * 5)
+    with pytest.raises(requests.Timeout):
+        Retrier(policies=FAST_POLICIES).call(fn)
+    assert len(calls) == 3
+
+
+def test_does_not_retry_client_errors():
+    """Test 4xx responses are raised immediately."""
+    fn, calls = flaky([TransportServerError('bad request', 400)])
+    with pytest.raises(TransportServerError):
+        Retrier(policies=FAST_POLICIES).call(fn)
+    assert len(calls) == 1
+
+
+def test_honours_retry_after():
+    """Test Retry-After overrides a shorter backoff delay."""
+    fn, calls = flaky([GraphQLHTTPError(429, retry_after=0.1)])
+    start = time.monotonic()
+    assert Retrier(policies=FAST_POLICIES).call(fn) == 'ok'
+    assert time.monotonic() - start >= 0.1
+
+
+def test_circuit_opens_and_recovers():
+    """Test the circuit fails fast when open and closes after a good trial call."""
+    breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=0.05)
+    retrier = Retrier(policies={SERVER_ERROR: RetryPolicy(max_attempts=1)}, circuit_breaker=breaker)
+    fn, calls = flaky([TransportServerError('down', 500)] * 2)
+
+    for _ in range(2):
+        with pytest.raises(TransportServerError):
+            retrier.call(fn)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        retrier.call(fn)
+    assert len(calls) == 2
+
+    time.sleep(0.06)
+    assert retrier.call(fn) == 'ok'
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_trial_reopens_circuit():
+    """Test a failed half-open trial opens the circuit again."""
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_for_endpoint_shares_breaker():
+    """Test clients of the same endpoint share one breaker."""
+    first = CircuitBreaker.for_endpoint('https://api.example.com/graphql-shared')
+    assert CircuitBreaker.for_endpoint('https://api.example.com/graphql-shared') is first
+
+
+def test_for_endpoint_warns_about_ignored_settings(caplog):
+    """Test settings differing from an existing breaker's are logged."""
+    url = 'https://api.example.com/graphql-settings'
+    first = CircuitBreaker.for_endpoint(url, failure_threshold=5)
+
+    with caplog.at_level('WARNING'):
+        assert CircuitBreaker.for_endpoint(url, failure_threshold=2, reset_timeout=30.0) is first
+
+    assert first.failure_threshold == 5
+    assert "ignoring {'failure_threshold': 2}" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_call_async_retries():
+    """Test coroutine functions are retried the same way."""
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        if len(calls) < 3:
+            raise asyncio.TimeoutError()
+        return 'ok'
+
+    assert await Retrier(policies=FAST_POLICIES).call_async(fn) == 'ok'
+    assert len(calls) == 3
+
+
+def test_sync_client_errors_carry_retry_after():
+    """Test HTTP errors from the sync client carry the Retry-After header for the retrier."""
+    def execute(document, variable_values=None):
+        raise TransportServerError('429 Client Error: Too Many Requests', 429)
+
+    client = GraphQLOAuthClient('https://api.example.com/graphql-sync', 'http://token', 'id', 'secret')
+    client.client = SimpleNamespace(
+        execute=execute, transport=SimpleNamespace(headers={}, response_headers={'Retry-After': '7'})
+    )
+    retrier = Retrier(policies={RATE_LIMITED: RetryPolicy(max_attempts=2, base_delay=0.01)})
+    sleeps = []
+
+    with patch('ingestion.utils.retry.time.sleep', side_effect=sleeps.append):
+        with pytest.raises(TransportServerError) as error:
+            retrier.call(client._execute, None, None)
+
+    assert error.value.retry_after == 7.0
+    assert sleeps == [7.0]
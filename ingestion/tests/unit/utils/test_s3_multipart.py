@@ -0,0 +1,78 @@
+"""Tests for the streaming S3 multipart writer."""
+
+import os
+
+import boto3
+import pytest
+from moto import mock_s3
+
+from ingestion.utils.s3_multipart import MIN_PART_SIZE, S3MultipartWriter
+
+BUCKET = 'ingestion-test'
+
+
+@pytest.fixture
+def s3():
+    """Create a mocked S3 bucket."""
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    with mock_s3():
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def test_small_object_uses_single_put(s3):
+    """Test objects smaller than a part skip the multipart upload."""
+    with S3MultipartWriter(BUCKET, 'small.json', client=s3, extra_args={'ContentType': 'application/json'}) as stream:
+        stream.write(b'{"id": 1}')
+
+    assert stream.upload_id is None
+    obj = s3.get_object(Bucket=BUCKET, Key='small.json')
+    assert obj['Body'].read() == b'{"id": 1}'
+    assert obj['ContentType'] == 'application/json'
+
+
+def test_large_object_is_uploaded_in_parts(s3):
+    """Test data spanning several parts is reassembled in order."""
+    chunk = bytes(range(256)) * 4096
+    expected = b''.join(bytes([i]) + chunk for i in range(12))
+
+    with S3MultipartWriter(BUCKET, 'large.bin', client=s3, part_size=MIN_PART_SIZE, max_concurrency=2) as stream:
+        for i in range(12):
+            stream.write(bytes([i]) + chunk)
+        assert stream.upload_id is not None
+
+    body = s3.get_object(Bucket=BUCKET, Key='large.bin')['Body'].read()
+    assert body == expected
+    assert stream.tell() == len(expected)
+
+
+def test_failure_aborts_upload(s3):
+    """Test an error while writing aborts the multipart upload."""
+    with pytest.raises(RuntimeError, match='serialization failed'):
+        with S3MultipartWriter(BUCKET, 'broken.bin', client=s3, part_size=MIN_PART_SIZE) as stream:
+            stream.write(b'x' * (MIN_PART_SIZE + 1))
+            raise RuntimeError('serialization failed')
+
+    assert s3.list_multipart_uploads(Bucket=BUCKET).get('Uploads', []) == []
+    assert s3.list_objects_v2(Bucket=BUCKET).get('KeyCount') == 0
+
+
+def test_part_size_must_meet_s3_minimum(s3):
+    """Test parts below the S3 minimum are rejected."""
+    with pytest.raises(ValueError, match='part_size'):
+        S3MultipartWriter(BUCKET, 'key', client=s3, part_size=1024)
+
+
+def test_failed_part_upload_aborts(s3, monkeypatch):
+    """Test a part that fails to upload surfaces its error and aborts the upload."""
+    def failing_upload_part(**kwargs):
+        raise ConnectionError('connection reset')
+
+    monkeypatch.setattr(s3, 'upload_part', failing_upload_part)
+
+    with pytest.raises(ConnectionError, match='connection reset'):
+        with S3MultipartWriter(BUCKET, 'failed.bin', client=s3, part_size=MIN_PART_SIZE) as stream:
+            stream.write(b'x' * (MIN_PART_SIZE + 1))
+
+    assert s3.list_multipart_uploads(Bucket=BUCKET).get('Uploads', []) == []
@@ -0,0 +1,78 @@
+"""Tests for the on-disk GraphQL schema cache."""
+
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from graphql import GraphQLError, build_schema, introspection_from_schema
+
+from ingestion.utils.graphql_client import AsyncGraphQLOAuthClient, GraphQLOAuthClient
+from ingestion.utils.schema_cache import SchemaCache
+
+URL = "https://liveheats.com/api/graphql"
+
+SDL = """
+type Athlete { id: ID! name: String }
+type Query { athlete(id: ID!): Athlete }
+"""
+
+
+@pytest.fixture
+def introspection():
+    """Introspection result of a small schema."""
+    return introspection_from_schema(build_schema(SDL))
+
+
+def test_save_and_load_schema(tmp_path, introspection):
+    """Test a saved introspection is loaded back as a schema."""
+    cache = SchemaCache(cache_dir=tmp_path)
+    assert cache.load_schema(URL) is None
+
+    cache.save(URL, introspection)
+    schema = cache.load_schema(URL)
+
+    assert schema is not None
+    assert 'athlete' in schema.query_type.fields
+    assert cache.load_schema("https://other.example.com/graphql") is None
+
+
+def test_expired_schema_is_ignored(tmp_path, introspection):
+    """Test schemas older than the TTL are not used."""
+    cache = SchemaCache(cache_dir=tmp_path, ttl_seconds=60)
+    cache.save(URL, introspection)
+
+    with patch('ingestion.utils.schema_cache.time.time', return_value=time.time() + 120):
+        assert cache.load_introspection(URL) is None
+
+
+def test_invalidate(tmp_path, introspection):
+    """Test invalidation removes the cached schema."""
+    cache = SchemaCache(cache_dir=tmp_path)
+    cache.save(URL, introspection)
+    cache.invalidate(URL)
+    assert cache.load_introspection(URL) is None
+
+
+def test_setup_client_uses_cached_schema(tmp_path, introspection):
+    """Test the client skips introspection when a schema is cached."""
+    cache = SchemaCache(cache_dir=tmp_path)
+    cache.save(URL, introspection)
+    client = GraphQLOAuthClient(URL, "https://token", "id", "secret", schema_cache=cache)
+
+    with patch.object(client, '_make_transport', return_value=MagicMock()), \
+         patch.object(cache, 'refresh') as refresh:
+        client._setup_client()
+
+    refresh.assert_not_called()
+    assert client.client.schema is not None
+
+
+def test_async_client_validates_against_cached_schema(tmp_path, introspection):
+    """Test invalid queries are rejected locally."""
+    cache = SchemaCache(cache_dir=tmp_path)
+    cache.save(URL, introspection)
+    client = AsyncGraphQLOAuthClient(URL, "https://token", "id", "secret", schema_cache=cache)
+
+    client._validate('query { athlete(id: 1) { id name } }')
+    with pytest.raises(GraphQLError):
+        client._validate('query { athlete(id: 1) { unknownField } }')
@@ -0,0 +1,88 @@
+"""Tests for single-flight request deduplication."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ingestion.utils.single_flight import SingleFlight
+
+
+def test_concurrent_threads_share_one_call():
+    """Test threads asking for the same key run the function once."""
+    flights = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return {'items': [1, 2]}
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        results = list(executor.map(lambda _: flights.do('key', fetch), range(5)))
+
+    assert len(calls) == 1
+    assert flights.deduplicated == 4
+    assert all(r == {'items': [1, 2]} for r in results)
+    assert len({id(r) for r in results}) == 5
+
+
+def test_errors_are_shared_and_key_is_released():
+    """Test waiting callers see the error and later calls run again."""
+    flights = SingleFlight()
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.05)
+        raise RuntimeError('boom')
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(flights.do, 'key', failing)
+        started.wait()
+        second = executor.submit(flights.do, 'key', failing)
+        for future in (first, second):
+            with pytest.raises(RuntimeError):
+                future.result()
+
+    assert flights.do('key', lambda: 'again') == 'again'
+
+
+@pytest.mark.asyncio
+async def test_concurrent_tasks_share_one_call():
+    """Test tasks asking for the same key await a single request."""
+    flights = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {'items': [1]}
+
+    results = await asyncio.gather(*[flights.do_async('key', fetch) for _ in range(3)])
+    other = await flights.do_async('other', fetch)
+
+    assert len(calls) == 2
+    assert results == [{'items': [1]}] * 3 and other == {'items': [1]}
+    results[1]['items'].append(2)
+    assert results[0] == {'items': [1]}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_others():
+    """Test cancelling the first caller leaves the shared request running."""
+    flights = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return 'done'
+
+    first = asyncio.ensure_future(flights.do_async('key', fetch))
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(flights.do_async('key', fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == 'done'
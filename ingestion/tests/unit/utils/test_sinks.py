@@ -0,0 +1,114 @@
+"""Tests for the async data sinks."""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from ingestion.utils.s3_multipart import MIN_PART_SIZE
+from ingestion.utils.sinks import DataSink, LocalSink, S3Sink
+
+
+class FakeS3Client:
+    """Fake aioboto3 S3 client recording uploads."""
+
+    def __init__(self):
+        self.objects = {}
+        self.multipart_keys = []
+
+    async def put_object(self, Bucket, Key, Body):
+        await asyncio.sleep(0.05)
+        self.objects[(Bucket, Key)] = Body
+
+    async def upload_fileobj(self, Fileobj, Bucket, Key):
+        self.multipart_keys.append(Key)
+        self.objects[(Bucket, Key)] = Fileobj.read()
+
+
+class FakeSession:
+    """Fake aioboto3 session counting the clients it opens and closes."""
+
+    def __init__(self):
+        self.client_obj = FakeS3Client()
+        self.opened = 0
+        self.closed = 0
+
+    def client(self, service_name, config=None):
+        session = self
+
+        class Context:
+            async def __aenter__(self):
+                session.opened += 1
+                return session.client_obj
+
+            async def __aexit__(self, *exc):
+                session.closed += 1
+
+        return Context()
+
+
+def test_create_sinks(tmp_path):
+    """Test sinks are created from configuration."""
+    assert isinstance(DataSink.create({'type': 'local', 'base_path': str(tmp_path)}), LocalSink)
+    assert isinstance(DataSink.create({'type': 's3', 'bucket_url': 'bucket'}), S3Sink)
+    with pytest.raises(ValueError):
+        DataSink.create({'type': 'ftp'})
+
+
+@pytest.mark.asyncio
+async def test_s3_sink_shares_one_client():
+    """Test concurrent writes overlap on one long-lived client."""
+    session = FakeSession()
+
+    start = time.monotonic()
+    async with S3Sink({'bucket_url': 'bucket', 'key_prefix': 'graphql/athletes'}, session=session) as sink:
+        await asyncio.gather(*(sink.write([{'id': i}], f'part-{i}.json') for i in range(5)))
+    elapsed = time.monotonic() - start
+
+    assert session.opened == 1
+    assert session.closed == 1
+    assert elapsed < 0.2
+    assert json.loads(session.client_obj.objects[('bucket', 'graphql/athletes/part-3.json')]) == [{'id': 3}]
+
+
+@pytest.mark.asyncio
+async def test_s3_sink_uploads_large_bodies_in_parts():
+    """Test bodies above one part use the concurrent multipart upload."""
+    session = FakeSession()
+    sink = S3Sink({'bucket_url': 'bucket'}, session=session)
+
+    await sink.write(b'x' * (MIN_PART_SIZE + 1), 'large.bin')
+    await sink.close()
+
+    assert session.client_obj.multipart_keys == ['large.bin']
+
+
+@pytest.mark.asyncio
+async def test_local_sink_does_not_block_event_loop(tmp_path, monkeypatch):
+    """Test local writes run on worker threads while the event loop keeps running."""
+    write_file = LocalSink._write_file
+
+    def slow_write_file(full_path, data):
+        time.sleep(0.1)
+        write_file(full_path, data)
+
+    monkeypatch.setattr(LocalSink, '_write_file', staticmethod(slow_write_file))
+    sink = LocalSink({'base_path': str(tmp_path), 'key_prefix': 'athletes'})
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticking = asyncio.create_task(ticker())
+    start = time.monotonic()
+    await asyncio.gather(*(sink.write({'id': i}, f'part-{i}.json') for i in range(4)))
+    elapsed = time.monotonic() - start
+    ticking.cancel()
+
+    assert elapsed < 0.3
+    assert ticks >= 5
+    assert json.loads((tmp_path / 'athletes' / 'part-2.json').read_text()) == {'id': 2}
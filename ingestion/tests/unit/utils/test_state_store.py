@@ -0,0 +1,60 @@
+"""Tests for the run state stores."""
+
+import pytest
+
+from ingestion.utils.state_store import JSONStateStore, SQLiteStateStore, StateStore
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def store(request, tmp_path):
+    """Create each backend in a temporary directory."""
+    return StateStore.create({'type': request.param, 'path': str(tmp_path / 'state')})
+
+
+def test_create_picks_backend_and_suffix(tmp_path):
+    """Test create selects the backend and file suffix."""
+    json_store = StateStore.create({'type': 'json', 'path': str(tmp_path / 'state')})
+    sqlite_store = StateStore.create({'path': str(tmp_path / 'state')})
+
+    assert isinstance(json_store, JSONStateStore)
+    assert json_store.path.name == 'state.json'
+    assert isinstance(sqlite_store, SQLiteStateStore)
+    assert sqlite_store.path.name == 'state.db'
+
+
+def test_create_uses_env_path(tmp_path, monkeypatch):
+    """Test the state path falls back to INGESTION_STATE_PATH."""
+    monkeypatch.setenv('INGESTION_STATE_PATH', str(tmp_path / 'env_state'))
+
+    assert StateStore.create({'type': 'sqlite'}).path == tmp_path / 'env_state.db'
+
+
+def test_create_rejects_unknown_type():
+    """Test unsupported store types are rejected."""
+    with pytest.raises(ValueError):
+        StateStore.create({'type': 'redis'})
+
+
+def test_get_set_delete(store):
+    """Test values can be read, written and removed."""
+    assert store.get('athletes') is None
+    assert store.get('athletes', '2024-01-01') == '2024-01-01'
+
+    store.set('athletes', '2024-05-01T00:00:00Z')
+    store.set('teams', {'page': 3})
+
+    assert store.get('athletes') == '2024-05-01T00:00:00Z'
+    assert store.get('teams') == {'page': 3}
+
+    store.delete('athletes')
+    store.delete('missing')
+
+    assert store.get('athletes') is None
+    assert store.get('teams') == {'page': 3}
+
+
+def test_state_persists_across_instances(store):
+    """Test state survives reopening the store."""
+    store.set('athletes', 42)
+
+    assert type(store)(store.path).get('athletes') == 42
@@ -0,0 +1,110 @@
+"""Tests for the OAuth token manager."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ingestion.utils.token_manager import OAuthTokenManager
+
+
+class TokenSource:
+    """Counts token fetches and hands out numbered tokens."""
+
+    def __init__(self, expires_in=3600, delay=0.0):
+        self.expires_in = expires_in
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def fetch(self):
+        with self._lock:
+            self.calls += 1
+            number = self.calls
+        time.sleep(self.delay)
+        return {'access_token': f'token-{number}', 'expires_in': self.expires_in}
+
+    async def fetch_async(self):
+        self.calls += 1
+        number = self.calls
+        await asyncio.sleep(self.delay)
+        return {'access_token': f'token-{number}', 'expires_in': self.expires_in}
+
+
+def test_token_is_reused_until_refresh_window():
+    """Test a valid token is cached and an expiring one is refreshed."""
+    source = TokenSource(expires_in=3600)
+    manager = OAuthTokenManager(refresh_margin=300)
+
+    assert manager.get_token(source.fetch)['access_token'] == 'token-1'
+    assert manager.get_token(source.fetch)['access_token'] == 'token-1'
+    assert source.calls == 1
+
+    manager.token['expires_at'] = time.time() + 60
+    assert manager.get_token(source.fetch)['access_token'] == 'token-2'
+
+
+def test_concurrent_threads_trigger_one_refresh():
+    """Test concurrent callers share a single token fetch."""
+    source = TokenSource(delay=0.05)
+    manager = OAuthTokenManager()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        tokens = list(executor.map(lambda _: manager.get_token(source.fetch), range(8)))
+
+    assert source.calls == 1
+    assert {t['access_token'] for t in tokens} == {'token-1'}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_coroutines_trigger_one_refresh():
+    """Test concurrent coroutines await the same refresh."""
+    source = TokenSource(delay=0.01)
+    manager = OAuthTokenManager()
+
+    tokens = await asyncio.gather(*[manager.get_token_async(source.fetch_async) for _ in range(8)])
+
+    assert source.calls == 1
+    assert {t['access_token'] for t in tokens} == {'token-1'}
+
+
+@pytest.mark.asyncio
+async def test_async_refresh_runs_in_background():
+    """Test a token in the refresh window is returned while a new one is fetched."""
+    source = TokenSource()
+    manager = OAuthTokenManager(refresh_margin=300, min_validity=30)
+    await manager.get_token_async(source.fetch_async)
+    manager.token['expires_at'] = time.time() + 120
+
+    token = await manager.get_token_async(source.fetch_async)
+    assert token['access_token'] == 'token-1'
+
+    await manager._refresh_task
+    assert manager.token['access_token'] == 'token-2'
+
+
+def test_file_cache_is_shared_between_managers(tmp_path):
+    """Test a second process reuses the token written by the first."""
+    source = TokenSource()
+    cache_path = tmp_path / 'token.json'
+
+    first = OAuthTokenManager(cache_path=cache_path)
+    second = OAuthTokenManager(cache_path=cache_path)
+
+    assert first.get_token(source.fetch)['access_token'] == 'token-1'
+    assert second.get_token(source.fetch)['access_token'] == 'token-1'
+    assert source.calls == 1
+    assert oct(cache_path.stat().st_mode & 0o777) == '0o600'
+
+
+def test_invalidate_forces_new_token(tmp_path):
+    """Test a rejected token is not reused, even from the file cache."""
+    source = TokenSource()
+    manager = OAuthTokenManager(cache_path=tmp_path / 'token.json')
+
+    rejected = manager.get_token(source.fetch)
+    manager.invalidate(rejected)
+
+    assert manager.get_token(source.fetch)['access_token'] == 'token-2'
@@ -0,0 +1,90 @@
+"""Tests for the fan-out worker pool."""
+
+import asyncio
+
+import pytest
+from gql.transport.exceptions import TransportServerError
+
+from ingestion.utils.retry import CircuitOpenError
+from ingestion.utils.worker_pool import (
+    CANCELLED, FAILED, SUCCEEDED, WorkerPool, is_fatal_error, summarize
+)
+
+
+def test_is_fatal_error():
+    """Test rejected credentials and open circuits are fatal."""
+    assert is_fatal_error(TransportServerError('unauthorized', 401))
+    assert is_fatal_error(CircuitOpenError('open'))
+    assert not is_fatal_error(TransportServerError('server error', 500))
+    assert not is_fatal_error(ValueError('bad item'))
+
+
+@pytest.mark.asyncio
+async def test_runs_items_with_bounded_concurrency():
+    """Test every item runs, results keep item order and at most max_workers run at once."""
+    in_flight = []
+    max_in_flight = []
+
+    async def double(item):
+        in_flight.append(item)
+        max_in_flight.append(len(in_flight))
+        await asyncio.sleep(0.01 * (item % 3))
+        in_flight.remove(item)
+        return item * 2
+
+    outcomes = await WorkerPool(max_workers=3).run(range(10), double)
+
+    assert [o.result for o in outcomes] == [i * 2 for i in range(10)]
+    assert all(o.status == SUCCEEDED for o in outcomes)
+    assert max(max_in_flight) == 3
+
+
+@pytest.mark.asyncio
+async def test_item_failures_are_reported_and_others_continue():
+    """Test a failing item does not stop the others."""
+    async def fetch(item):
+        if item == 2:
+            raise ValueError('no such organisation')
+        return {'id': item}
+
+    pool = WorkerPool(max_workers=2)
+    outcomes = await pool.run([1, 2, 3], fetch)
+
+    assert [o.status for o in outcomes] == [SUCCEEDED, FAILED, SUCCEEDED]
+    assert outcomes[1].to_dict()['error'] == 'ValueError: no such organisation'
+    assert pool.fatal_error is None
+    assert summarize(outcomes) == {SUCCEEDED: 2, FAILED: 1, CANCELLED: 0}
+
+
+@pytest.mark.asyncio
+async def test_fatal_error_cancels_remaining_items():
+    """Test a fatal error cancels running items and skips the rest."""
+    started = []
+
+    async def fetch(item):
+        started.append(item)
+        if item == 0:
+            await asyncio.sleep(0.01)
+            raise TransportServerError('unauthorized', 401)
+        await asyncio.sleep(1)
+        return item
+
+    pool = WorkerPool(max_workers=2)
+    outcomes = await pool.run(range(5), fetch)
+
+    assert isinstance(pool.fatal_error, TransportServerError)
+    assert started == [0, 1]
+    assert [o.status for o in outcomes] == [FAILED] + [CANCELLED] * 4
+
+
+@pytest.mark.asyncio
+async def test_fail_fast_treats_any_error_as_fatal():
+    """Test fail_fast cancels the fan-out on the first failure."""
+    async def fetch(item):
+        raise ValueError('bad item')
+
+    pool = WorkerPool(max_workers=1, fail_fast=True)
+    outcomes = await pool.run(range(3), fetch)
+
+    assert isinstance(pool.fatal_error, ValueError)
+    assert summarize(outcomes) == {SUCCEEDED: 0, FAILED: 1, CANCELLED: 2}